@@ -0,0 +1,76 @@
+"""
+Benchmark of the vectorized get_delta against the previous per-frame loop on MFCC-sized matrices
+of 2k to 20k frames. Run from the repository root: python -m Benchmarks.delta_benchmark
+"""
+
+import timeit
+
+import numpy as np
+
+from utils.praat_feature_extraction import get_delta, get_deltas
+
+
+# Previous implementation, kept here as the reference for correctness and speed
+def get_delta_loop(matrix, step_size=2):
+    num_frames, num_coefficients = matrix.shape[0], matrix.shape[1]
+
+    delta = np.zeros((num_frames, num_coefficients))
+
+    for frame_no in range(num_frames):
+        numerator, denominator = 0.0, 0.0
+
+        for step_no in range(step_size):
+            start_coefficients, end_coefficients = matrix[0, :], matrix[num_frames - 1, :]
+            if frame_no - step_no >= 0:
+                start_coefficients = matrix[frame_no - step_no, :]
+            if frame_no + step_no < num_frames:
+                end_coefficients = matrix[frame_no + step_no, :]
+
+            numerator += step_no * (end_coefficients - start_coefficients)
+            denominator += step_no**2
+
+        denominator *= 2
+        delta[frame_no, :] = numerator / denominator
+
+    return delta
+
+
+def time_function(fn, repeat=3):
+    number = 1
+    while timeit.timeit(fn, number=number) < 0.2:
+        number *= 2
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main(frame_counts=(2000, 5000, 10000, 20000), num_coefficients=12, step_size=2):
+    rng = np.random.default_rng(0)
+
+    print(f"Delta + delta-delta of (frames x {num_coefficients}) matrices, step_size={step_size}")
+    print(f"{'frames':>7} {'loop':>11} {'vectorized':>11} {'speedup':>8}")
+
+    for num_frames in frame_counts:
+        matrix = rng.standard_normal((num_frames, num_coefficients))
+
+        delta_loop = get_delta_loop(matrix, step_size)
+        delta_delta_loop = get_delta_loop(delta_loop, step_size)
+        delta, delta_delta = get_deltas(matrix, step_size, order=2)
+        assert np.array_equal(delta, delta_loop) and np.allclose(delta_delta, delta_delta_loop)
+
+        loop_time = time_function(
+            lambda: get_delta_loop(get_delta_loop(matrix, step_size), step_size), repeat=1
+        )
+        vectorized_time = time_function(lambda: get_deltas(matrix, step_size, order=2))
+        print(
+            f"{num_frames:>7} {loop_time * 1e3:>9.1f}ms {vectorized_time * 1e3:>9.2f}ms "
+            f"{loop_time / vectorized_time:>7.0f}x"
+        )
+
+    # A whole batch of equally long matrices in one call
+    batch = rng.standard_normal((32, frame_counts[0], num_coefficients))
+    assert np.array_equal(get_delta(batch, step_size)[5], get_delta_loop(batch[5], step_size))
+    batch_time = time_function(lambda: get_deltas(batch, step_size, order=2))
+    print(f"batch of {len(batch)} x {frame_counts[0]} frames: {batch_time * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Validation of the batched speaker embeddings (utils.embedding_service) against per-file
+`Inference(model, window="whole")` on the synthetic benchmark corpus (see
+Benchmarks.synthetic_corpus). Every item is also truncated to a few shorter lengths, so the batches
+contain padded files. Exits with an error when an embedding deviates by more than --tolerance.
+
+Run from the repository root:
+    python -m Benchmarks.embedding_validation --output ./outputs/embedding_validation.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+from pyannote.audio import Inference
+from pyannote.audio.core.task import Problem, Resolution, Specifications
+from pyannote.audio.models.embedding import WeSpeakerResNet34
+
+from Benchmarks.synthetic_corpus import make_corpus
+from utils.embedding_service import EmbeddingService
+
+# Largest cosine distance between a batched and a per-file embedding that passes the validation
+DEFAULT_TOLERANCE = 1e-3
+
+
+def get_cosine_distance(embedding, reference):
+    return float(
+        1.0 - np.dot(embedding, reference) / (np.linalg.norm(embedding) * np.linalg.norm(reference))
+    )
+
+
+def main(
+    output=None,
+    durations=(1.0, 5.0, 30.0),
+    fractions=(1.0, 0.97, 0.93),
+    max_length_ratio=1.1,
+    tolerance=DEFAULT_TOLERANCE,
+):
+    # Randomly initialized weights: no download, same computation as the checkpoint, which also
+    # carries these specifications (see pyannote.audio.models.embedding.wespeaker.convert)
+    torch.manual_seed(0)
+    model = WeSpeakerResNet34()
+    model.specifications = Specifications(
+        problem=Problem.REPRESENTATION, resolution=Resolution.CHUNK, duration=5.0
+    )
+    service = EmbeddingService(model, max_length_ratio=max_length_ratio)
+    inference = Inference(service.model, window="whole", device=service.device)
+    model_rate = service.audio.sample_rate
+
+    names, waveforms = [], []
+    for item in make_corpus(durations, (model_rate,)):
+        waveform = torch.from_numpy(item.samples).float().unsqueeze(0)
+        for fraction in fractions:
+            names.append(f"{item.name}_{fraction:g}")
+            waveforms.append(waveform[:, : int(fraction * waveform.shape[-1])])
+
+    batched = service.embed_waveforms(waveforms)
+    records = []
+    buckets = service.make_buckets([waveform.shape[-1] for waveform in waveforms])
+    print(f"{len(waveforms)} waveforms in {len(buckets)} batches")
+    print(f"{'item':>20} {'cosine distance':>16} {'max abs deviation':>18}")
+    for name, waveform, embedding in zip(names, waveforms, batched):
+        reference = np.asarray(
+            inference({"waveform": waveform, "sample_rate": model_rate})
+        ).reshape(-1)
+        record = {
+            "item": name,
+            "num_samples": waveform.shape[-1],
+            "cosine_distance": get_cosine_distance(embedding, reference),
+            "max_abs_deviation": float(np.max(np.abs(embedding - reference))),
+        }
+        records.append(record)
+        print(f"{name:>20} {record['cosine_distance']:>16.2e} {record['max_abs_deviation']:>18.2e}")
+
+    failures = [r for r in records if not r["cosine_distance"] <= tolerance]
+    for record in failures:
+        print(
+            f"FAIL {record['item']}: cosine distance {record['cosine_distance']:.2e} > {tolerance}"
+        )
+    if not failures:
+        print(f"Batched embeddings within a cosine distance of {tolerance} of per-file inference")
+
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(records, f, indent=2)
+        print(f"Results saved to {output}")
+    return records, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default=None, help="JSON file for the validation records")
+    parser.add_argument("--durations", type=float, nargs="+", default=[1.0, 5.0, 30.0])
+    parser.add_argument(
+        "--fractions",
+        type=float,
+        nargs="+",
+        default=[1.0, 0.97, 0.93],
+        help="lengths every item is truncated to, as fractions of its duration",
+    )
+    parser.add_argument("--max-length-ratio", type=float, default=1.1)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="largest cosine distance to the per-file embedding",
+    )
+    args = parser.parse_args()
+
+    _, failures = main(
+        output=args.output,
+        durations=args.durations,
+        fractions=args.fractions,
+        max_length_ratio=args.max_length_ratio,
+        tolerance=args.tolerance,
+    )
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,406 @@
+"""
+End-to-end and per-stage benchmark of every extraction path on a deterministic synthetic corpus
+(see Benchmarks.synthetic_corpus): pyAudioAnalysis short-term features, torchaudio mel statistics,
+every Praat feature function, deltas and the speaker-embedding model with randomly initialized
+weights. Results are written to JSON and can be compared with a previous run to spot regressions.
+
+Run from the repository root:
+    python -m Benchmarks.extraction_benchmark --output ./outputs/extraction_benchmark.json
+    python -m Benchmarks.extraction_benchmark --baseline ./outputs/extraction_benchmark.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+import parselmouth
+
+import utils.praat_feature_extraction as praat_features
+from Benchmarks.synthetic_corpus import make_corpus, write_corpus
+from utils.augment import load_audio
+from utils.feature_plan import FEATURES, FeaturePlan
+
+PACKAGES = [
+    "numpy",
+    "scipy",
+    "praat-parselmouth",
+    "torch",
+    "torchaudio",
+    "pyAudioAnalysis",
+    "pyannote.audio",
+]
+
+# Every feature function of utils.praat_feature_extraction with the arguments it is benchmarked with
+PRAAT_FEATURES = {
+    "get_intensity_attributes": {},
+    "get_pitch_attributes": {},
+    "get_energy": {},
+    "get_harmonics_to_noise_ratio_attributes": {},
+    "get_glottal_to_noise_ratio_attributes": {},
+    "get_local_jitter": {},
+    "get_local_shimmer": {},
+    "get_spectrum_attributes": {},
+    "get_formant_attributes": {},
+    "get_speaking_rate": {"text": "Please keep your distance from the platform edge."},
+    "get_voiced_unvoiced_segments": {},
+    "get_lfcc": {},
+    "get_mfcc": {},
+}
+# get_* helpers that are not features on their own; deltas are benchmarked separately
+PRAAT_HELPERS = {
+    "get_analyzer",
+    "get_cepstral_matrix",
+    "get_delta",
+    "get_deltas",
+    "get_formant_tracks",
+    "get_matrix_cells",
+    "get_point_times",
+    "get_segment_bounds",
+    "get_segmented_gne_attributes",
+    "get_track",
+    "get_track_attribute_names",
+    "get_track_attributes",
+    "get_track_attributes_batch",
+    "get_track_values",
+    "get_welch_spectrum",
+}
+
+EXTRACTORS = ["pyaudioanalysis", "mel", "praat", "delta", "embedding"]
+
+
+class BenchmarkRecorder:
+    """
+    Collects timing records of (extractor, stage, corpus item) and prints them as they come in.
+    """
+
+    def __init__(self, repeat=3):
+        """
+        :param (int) repeat: number of timed runs of every stage, after one untimed warm-up run
+               (default: 3)
+        """
+        self.repeat = repeat
+        self.records = []
+
+    def time(self, extractor, stage, item, fn):
+        """
+        Function to time @fn and record the fastest and the median run.
+
+        :param (str) extractor: extractor name, e.g. 'mel'
+        :param (str) stage: stage name, e.g. 'end_to_end'
+        :param (CorpusItem) item: corpus item the stage runs on
+        :param (callable) fn: function without arguments running the stage
+        :return: True if the stage ran, False if it raised an error
+        """
+        record = {
+            "extractor": extractor,
+            "stage": stage,
+            "item": item.name,
+            "duration": item.duration,
+            "sample_rate": item.sample_rate,
+        }
+        try:
+            fn()
+            times = []
+            for _ in range(self.repeat):
+                start_time = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start_time)
+        except Exception as e:
+            record["error"] = repr(e)
+            print(f"{extractor:>15} {stage:>40} {item.name:>14}   error: {e!r}")
+            self.records.append(record)
+            return False
+
+        record["min_seconds"] = min(times)
+        record["median_seconds"] = statistics.median(times)
+        record["realtime_factor"] = item.duration / min(times)
+        print(
+            f"{extractor:>15} {stage:>40} {item.name:>14} {min(times) * 1e3:>10.2f}ms "
+            f"{item.duration / min(times):>9.1f}x"
+        )
+        self.records.append(record)
+        return True
+
+    def skip(self, extractor, reason):
+        """
+        :param (str) extractor: extractor that cannot run, e.g. because a dependency is missing
+        :param (str) reason: why it was skipped
+        """
+        self.records.append({"extractor": extractor, "skipped": reason})
+        print(f"{extractor:>15} skipped: {reason}")
+
+
+def benchmark_pyaudioanalysis(recorder, corpus, paths):
+    from pyAudioAnalysis import ShortTermFeatures, audioBasicIO
+
+    from FeatureProcessing.feature_extraction_mfcc import extract_short_term_features
+
+    for item, path in zip(corpus, paths):
+        x, sr = item.samples * 32768.0, item.sample_rate
+        F, _ = ShortTermFeatures.feature_extraction(x, sr, 0.050 * sr, 0.025 * sr)
+
+        recorder.time("pyaudioanalysis", "decode", item, lambda: audioBasicIO.read_audio_file(path))
+        recorder.time(
+            "pyaudioanalysis",
+            "short_term_features",
+            item,
+            lambda: ShortTermFeatures.feature_extraction(x, sr, 0.050 * sr, 0.025 * sr),
+        )
+        recorder.time(
+            "pyaudioanalysis",
+            "stats",
+            item,
+            lambda: np.concatenate((np.mean(F, axis=1), np.std(F, axis=1))),
+        )
+        recorder.time(
+            "pyaudioanalysis", "end_to_end", item, lambda: extract_short_term_features(path)
+        )
+
+
+def benchmark_mel(recorder, corpus, paths):
+    import torch
+
+    from utils.mel_engine import get_mel_engine
+
+    engine = get_mel_engine(sample_rate=16000, n_mels=128, n_fft=1024, hop_length=512)
+    for item, path in zip(corpus, paths):
+        waveform = torch.from_numpy(item.samples)
+        resampled = engine.resample(waveform, item.sample_rate)
+        mel_db, mask = engine.compute([resampled])
+
+        def end_to_end():
+            samples, sample_rate = load_audio(path)
+            return engine.compute_file_stats([torch.from_numpy(samples)], [sample_rate])
+
+        recorder.time("mel", "decode", item, lambda: load_audio(path))
+        recorder.time("mel", "resample", item, lambda: engine.resample(waveform, item.sample_rate))
+        recorder.time("mel", "mel_spectrogram", item, lambda: engine.compute([resampled]))
+        recorder.time("mel", "stats", item, lambda: engine.masked_stats(mel_db, mask))
+        recorder.time("mel", "end_to_end", item, end_to_end)
+
+
+def benchmark_praat(recorder, corpus, paths):
+    unlisted = (
+        {
+            name
+            for name in dir(praat_features)
+            if name.startswith("get_")
+            and callable(getattr(praat_features, name))
+            and getattr(praat_features, name).__module__ == praat_features.__name__
+        }
+        - PRAAT_HELPERS
+        - set(PRAAT_FEATURES)
+    )
+    if unlisted:
+        print("WARNING: feature functions not benchmarked:", ", ".join(sorted(unlisted)))
+
+    plan = FeaturePlan(list(FEATURES))
+    for item in corpus:
+        sound = parselmouth.Sound(item.samples.astype(np.float64), item.sample_rate)
+
+        # Every function on its own, building all the Praat objects it needs
+        succeeded = []
+        for name, kwargs in PRAAT_FEATURES.items():
+            fn = getattr(praat_features, name)
+            if recorder.time("praat", name, item, lambda: fn(sound, **kwargs)):
+                succeeded.append(name)
+
+        # All functions sharing the intermediates of one analyzer, like praat_feats_extract; the
+        # ones that fail on this signal (e.g. get_energy with a single voiced segment) are left out
+        def shared_analyzer():
+            analyzer = praat_features.PraatAnalyzer(sound)
+            for name in succeeded:
+                getattr(praat_features, name)(analyzer, **PRAAT_FEATURES[name])
+
+        recorder.time(
+            "praat",
+            "sound",
+            item,
+            lambda: parselmouth.Sound(item.samples.astype(np.float64), item.sample_rate),
+        )
+        recorder.time("praat", "all_shared_analyzer", item, shared_analyzer)
+        # The same features through a FeaturePlan filling a preallocated row
+        recorder.time(
+            "praat",
+            "feature_plan",
+            item,
+            lambda: plan.extract(sound, PRAAT_FEATURES["get_speaking_rate"]["text"]),
+        )
+
+
+def benchmark_delta(recorder, corpus, paths):
+    for item in corpus:
+        sound = parselmouth.Sound(item.samples.astype(np.float64), item.sample_rate)
+        mfcc = praat_features.get_mfcc(sound)
+
+        recorder.time("delta", "delta", item, lambda: praat_features.get_delta(mfcc))
+        recorder.time(
+            "delta", "delta_delta", item, lambda: praat_features.get_deltas(mfcc, order=2)
+        )
+
+
+def benchmark_embedding(recorder, corpus, paths):
+    import torch
+    import torchaudio
+    from pyannote.audio.models.embedding import WeSpeakerResNet34
+
+    from utils.embedding_service import EmbeddingService
+
+    # Randomly initialized weights: no download, same architecture and cost as the checkpoint
+    torch.manual_seed(0)
+    service = EmbeddingService(WeSpeakerResNet34(), num_threads=torch.get_num_threads())
+    model_rate = service.audio.sample_rate
+
+    for item in corpus:
+        waveform = torch.from_numpy(item.samples).unsqueeze(0)
+        resampled = torchaudio.functional.resample(waveform, item.sample_rate, model_rate)
+
+        recorder.time(
+            "embedding",
+            "resample",
+            item,
+            lambda: torchaudio.functional.resample(waveform, item.sample_rate, model_rate),
+        )
+        recorder.time("embedding", "inference", item, lambda: service.embed_waveforms([resampled]))
+        recorder.time(
+            "embedding",
+            "end_to_end",
+            item,
+            lambda: service.embed_samples([(item.samples, item.sample_rate)]),
+        )
+
+
+def get_environment():
+    """
+    :return: a dictionary describing the machine, the code revision and the package versions
+    """
+    packages = dict()
+    for package in PACKAGES:
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_revision": revision,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "packages": packages,
+    }
+
+
+def compare_results(results, baseline, threshold=1.2):
+    """
+    Function to print the stages that got slower (or faster) than in a baseline run.
+
+    :param (list) results: records of the current run
+    :param (list) baseline: records of the baseline run
+    :param (float) threshold: minimum ratio between the two fastest runs to report (default: 1.2)
+    """
+    baseline_times = {
+        (record["extractor"], record["stage"], record["item"]): record["min_seconds"]
+        for record in baseline
+        if "min_seconds" in record
+    }
+
+    num_compared = 0
+    for record in results:
+        key = (record["extractor"], record.get("stage"), record.get("item"))
+        if "min_seconds" not in record or key not in baseline_times:
+            continue
+        num_compared += 1
+        ratio = record["min_seconds"] / baseline_times[key]
+        if ratio >= threshold or ratio <= 1 / threshold:
+            label = "SLOWER" if ratio > 1 else "faster"
+            print(f"{label:>6} {ratio:>6.2f}x  " + " / ".join(key))
+    print(f"{num_compared} stages compared with the baseline")
+
+
+def main(
+    output="./outputs/extraction_benchmark.json",
+    baseline=None,
+    durations=(1.0, 5.0, 30.0),
+    sample_rates=(16000, 44100),
+    repeat=3,
+    extractors=EXTRACTORS,
+):
+    corpus = make_corpus(durations, sample_rates)
+    recorder = BenchmarkRecorder(repeat)
+    benchmarks = {
+        "pyaudioanalysis": benchmark_pyaudioanalysis,
+        "mel": benchmark_mel,
+        "praat": benchmark_praat,
+        "delta": benchmark_delta,
+        "embedding": benchmark_embedding,
+    }
+
+    print(f"{len(corpus)} synthetic signals, {repeat} timed runs per stage")
+    print(f"{'extractor':>15} {'stage':>40} {'item':>14} {'fastest':>12} {'realtime':>9}")
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        paths = write_corpus(corpus, corpus_dir)
+        for extractor in extractors:
+            try:
+                benchmarks[extractor](recorder, corpus, paths)
+            except ImportError as e:
+                recorder.skip(extractor, repr(e))
+
+    report = {
+        "environment": get_environment(),
+        "config": {
+            "durations": list(durations),
+            "sample_rates": list(sample_rates),
+            "repeat": repeat,
+            "extractors": list(extractors),
+        },
+        "results": recorder.records,
+    }
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {output}")
+
+    if baseline:
+        with open(baseline) as f:
+            compare_results(recorder.records, json.load(f)["results"])
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default="./outputs/extraction_benchmark.json")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run")
+    parser.add_argument("--durations", type=float, nargs="+", default=[1.0, 5.0, 30.0])
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[16000, 44100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extractors", nargs="+", choices=EXTRACTORS, default=EXTRACTORS)
+    args = parser.parse_args()
+
+    main(
+        output=args.output,
+        baseline=args.baseline,
+        durations=args.durations,
+        sample_rates=args.sample_rates,
+        repeat=args.repeat,
+        extractors=args.extractors,
+    )
@@ -0,0 +1,152 @@
+"""
+Deterministic synthetic speech-like corpus for the benchmarks: harmonic voiced segments following a
+slowly moving pitch contour with vibrato, separated by near-silent pauses, at several durations and
+sample rates.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+import soundfile as sf
+
+CorpusItem = namedtuple("CorpusItem", ["name", "samples", "sample_rate", "duration"])
+
+# Lengths of the voiced segments and pauses, in seconds
+VOICED_RANGE = (0.4, 1.2)
+PAUSE_RANGE = (0.15, 0.4)
+# Shorter lengths for signals too short for two segments of the lengths above (3 pauses and 2
+# voiced segments of up to 3.6s): two of these segments fit in 1s, and the pauses stay longer than
+# the minimum silent interval of 'To TextGrid (silences)'
+SHORT_VOICED_RANGE = (0.15, 0.2)
+SHORT_PAUSE_RANGE = (0.15, 0.2)
+
+
+def get_voicing_envelope(
+    num_samples,
+    sample_rate,
+    rng,
+    ramp=0.01,
+    voiced_range=VOICED_RANGE,
+    pause_range=PAUSE_RANGE,
+):
+    """
+    Function to get an amplitude envelope of alternating voiced segments and pauses, starting and
+    ending with a pause, with raised-cosine ramps at every boundary.
+
+    :param (int) num_samples: length of the envelope
+    :param (int) sample_rate: sample rate of the envelope
+    :param (np.random.Generator) rng: random generator of the segment lengths
+    :param (float) ramp: duration of the onset/offset ramps, in seconds (default: 0.01)
+    :param (tuple) voiced_range: shortest and longest voiced segment, in seconds
+           (default: (0.4, 1.2))
+    :param (tuple) pause_range: shortest and longest pause, in seconds (default: (0.15, 0.4))
+    :return: a float envelope (np.array) in [0, 1] of shape (num_samples,)
+    """
+    envelope = np.zeros(num_samples)
+    ramp_length = int(ramp * sample_rate)
+    fade_in = 0.5 - 0.5 * np.cos(np.linspace(0, np.pi, ramp_length))
+
+    start = int(rng.uniform(*pause_range) * sample_rate)
+    while True:
+        end = start + int(rng.uniform(*voiced_range) * sample_rate)
+        if end > num_samples - int(pause_range[0] * sample_rate):
+            break
+        envelope[start:end] = 1.0
+        envelope[start : start + ramp_length] = fade_in
+        envelope[end - ramp_length : end] = fade_in[::-1]
+        start = end + int(rng.uniform(*pause_range) * sample_rate)
+    return envelope
+
+
+def make_voiced_signal(
+    duration,
+    sample_rate,
+    f0=150.0,
+    f0_range=0.15,
+    vibrato_rate=5.5,
+    vibrato_depth=0.02,
+    max_harmonics=30,
+    noise_level=0.001,
+    seed=0,
+):
+    """
+    Function to synthesize a speech-like signal: a sum of harmonics with a -6 dB/octave tilt whose
+    fundamental follows a smooth pitch contour, gated by a voiced/pause envelope. Signals of at
+    least 1s have at least two voiced segments, so that every benchmark stage has statistics over
+    several sounding intervals.
+
+    :param (float) duration: duration of the signal, in seconds
+    :param (int) sample_rate: sample rate of the signal
+    :param (float) f0: mean fundamental frequency, in Hertz (default: 150.)
+    :param (float) f0_range: relative amplitude of the slow pitch movement (default: 0.15)
+    :param (float) vibrato_rate: vibrato frequency, in Hertz (default: 5.5)
+    :param (float) vibrato_depth: relative vibrato amplitude (default: 0.02)
+    :param (int) max_harmonics: maximum number of harmonics, all kept below 0.45 * sample_rate
+           (default: 30)
+    :param (float) noise_level: standard deviation of the background noise (default: 0.001)
+    :param (int) seed: seed of the pitch contour, the segment lengths and the noise (default: 0)
+    :return: float32 samples (np.array) in [-1, 1] of shape (num_samples,)
+    """
+    rng = np.random.default_rng(seed)
+    num_samples = int(duration * sample_rate)
+    t = np.arange(num_samples) / sample_rate
+
+    contour_rate, contour_phase = rng.uniform(0.2, 0.6), rng.uniform(0, 2 * np.pi)
+    f0_track = f0 * (1 + f0_range * np.sin(2 * np.pi * contour_rate * t + contour_phase))
+    f0_track *= 1 + vibrato_depth * np.sin(2 * np.pi * vibrato_rate * t)
+    phase = 2 * np.pi * np.cumsum(f0_track) / sample_rate
+
+    num_harmonics = min(max_harmonics, int(0.45 * sample_rate / (f0 * (1 + f0_range))))
+    signal = np.zeros(num_samples)
+    for k in range(1, num_harmonics + 1):
+        signal += np.sin(k * phase) / k
+
+    if duration < 3 * PAUSE_RANGE[1] + 2 * VOICED_RANGE[1]:
+        envelope = get_voicing_envelope(
+            num_samples,
+            sample_rate,
+            rng,
+            voiced_range=SHORT_VOICED_RANGE,
+            pause_range=SHORT_PAUSE_RANGE,
+        )
+    else:
+        envelope = get_voicing_envelope(num_samples, sample_rate, rng)
+    signal *= envelope
+    signal *= 0.5 / np.abs(signal).max()
+    signal += noise_level * rng.standard_normal(num_samples)
+    return signal.astype(np.float32)
+
+
+def make_corpus(durations=(1.0, 5.0, 30.0), sample_rates=(16000, 44100), seed=0):
+    """
+    :param (list) durations: signal durations, in seconds (default: (1., 5., 30.))
+    :param (list) sample_rates: sample rates (default: (16000, 44100))
+    :param (int) seed: base seed; every item gets its own seed and fundamental (default: 0)
+    :return: a list of CorpusItem, one per (sample rate, duration)
+    """
+    corpus = []
+    for sample_rate in sample_rates:
+        for i, duration in enumerate(durations):
+            item_seed = seed + i
+            f0 = 110.0 + 20.0 * (item_seed % 6)
+            samples = make_voiced_signal(duration, sample_rate, f0=f0, seed=item_seed)
+            corpus.append(
+                CorpusItem(f"{sample_rate}Hz_{duration:g}s", samples, sample_rate, duration)
+            )
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """
+    :param (list) corpus: CorpusItem tuples (see make_corpus)
+    :param (str) directory: output directory
+    :return: a list of the written 16-bit wav paths, aligned with @corpus
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for item in corpus:
+        path = os.path.join(directory, f"{item.name}.wav")
+        sf.write(path, item.samples, item.sample_rate, subtype="PCM_16")
+        paths.append(path)
+    return paths
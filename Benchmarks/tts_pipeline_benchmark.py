@@ -0,0 +1,42 @@
+"""
+Benchmark of the concurrent TTS pipeline against a fake backend with simulated network latency.
+Run from the repository root: python -m Benchmarks.tts_pipeline_benchmark
+"""
+
+import time
+
+from utils.tts_pipeline import FakeSynthesisBackend, SynthesisJob, run_synthesis
+
+
+def make_jobs(num_voices=20, num_texts=5):
+    return [
+        SynthesisJob(f"en-US-Voice{v}Neural", "Please keep your distance. " * (t + 1), None, 16000)
+        for v in range(num_voices)
+        for t in range(num_texts)
+    ]
+
+
+def main(latency=0.2, failure_rate=0.05, worker_counts=(1, 4, 8, 16)):
+    jobs = make_jobs()
+    print(f"{len(jobs)} jobs, {latency * 1e3:.0f}ms latency, {failure_rate:.0%} failures")
+    print(f"{'workers':>7} {'time':>8} {'jobs/s':>8} {'requests':>9} {'failed':>7}")
+
+    for num_workers in worker_counts:
+        backend = FakeSynthesisBackend(latency=latency, failure_rate=failure_rate, seed=0)
+        start_time = time.perf_counter()
+        _, errors = run_synthesis(
+            jobs,
+            backend,
+            lambda job, audio_data: len(audio_data),
+            num_workers=num_workers,
+            backoff=0.1,
+        )
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"{num_workers:>7} {elapsed:>7.2f}s {len(jobs) / elapsed:>8.1f} "
+            f"{backend.num_requests:>9} {len(errors):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
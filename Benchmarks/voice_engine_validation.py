@@ -0,0 +1,247 @@
+"""
+Validation of the NumPy voice engine (utils.voice_engine) against the Praat reference on the
+synthetic benchmark corpus (see Benchmarks.synthetic_corpus): deviation of every stage (pitch,
+intensity, pulses, jitter, shimmer, silent/sounding intervals) and the time of both engines. Exits
+with an error when jitter or shimmer deviate from Praat by more than --tolerance.
+
+Run from the repository root:
+    python -m Benchmarks.voice_engine_validation --output ./outputs/voice_engine_validation.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import parselmouth
+
+from Benchmarks.synthetic_corpus import make_corpus
+from utils import voice_engine
+from utils.praat_feature_extraction import (
+    PraatAnalyzer,
+    call,
+    get_local_jitter,
+    get_local_shimmer,
+    get_point_times,
+    get_track,
+    get_voiced_unvoiced_segments,
+)
+
+# Largest relative deviation of jitter and shimmer from Praat that passes the validation
+DEFAULT_TOLERANCE = 0.03
+
+SEGMENT_ATTRIBUTES = [
+    "voice_length_mean",
+    "voice_length_std",
+    "unvoice_length_mean",
+    "unvoice_length_std",
+    "speech_ratio",
+]
+
+
+def get_relative_deviation(value, reference):
+    if reference == 0.0 or np.isnan(reference) or np.isnan(value):
+        return float("nan")
+    return float(abs(value - reference) / abs(reference))
+
+
+def run_features(sound, engine):
+    """
+    :return: jitter, shimmer and segment attributes of @sound computed by @engine on a fresh
+             analyzer, and the time it took
+    """
+    start_time = time.perf_counter()
+    analyzer = PraatAnalyzer(sound)
+    features = {
+        "local_jitter": get_local_jitter(analyzer, engine=engine),
+        "local_shimmer": get_local_shimmer(analyzer, engine=engine),
+    }
+    segments, _ = get_voiced_unvoiced_segments(analyzer, engine=engine)
+    features.update((name, segments[name]) for name in SEGMENT_ATTRIBUTES)
+    features["num_intervals"] = len(segments["voice_lengths"]) + len(segments["unvoice_lengths"])
+    return features, analyzer, time.perf_counter() - start_time
+
+
+def validate_stages(item, analyzer):
+    """
+    Function to compare every stage of the NumPy engine with Praat on one corpus item.
+
+    :param (CorpusItem) item: corpus item
+    :param (PraatAnalyzer) analyzer: analyzer that already ran the Praat features of @item
+    :return: a dictionary of deviations
+    """
+    samples, sample_rate = analyzer.samples, item.sample_rate
+    record = dict()
+
+    # Pitch: voicing decisions and frequencies of the frames voiced in both
+    pitch = analyzer.pitch()
+    reference = pitch.selected_array["frequency"]
+    reference[reference == 0.0] = np.nan
+    values = voice_engine.track_pitch([samples], sample_rate)[0].values
+    both = ~np.isnan(reference) & ~np.isnan(values)
+    record["pitch_voicing_agreement"] = float(np.mean(np.isnan(reference) == np.isnan(values)))
+    record["pitch_median_relative_deviation"] = float(
+        np.median(np.abs(values[both] / reference[both] - 1.0))
+    )
+
+    # Intensity of the silence detection
+    reference = call(analyzer.sound, "To Intensity", 100.0, 0.0, "yes").values[0]
+    values = voice_engine.get_intensity([samples], sample_rate)[0].values
+    record["intensity_max_deviation_db"] = float(np.max(np.abs(values - reference)))
+
+    # Pulses, and jitter/shimmer of the Praat pulses, which must equal Praat's up to rounding
+    point_process = analyzer.point_process()
+    praat_pulses = get_point_times(point_process)
+    record["num_pulses_praat"] = len(praat_pulses)
+    record["num_pulses_numpy"] = len(analyzer.native_pulses())
+    # Pulses of the Praat pitch isolate the cross-correlation walk from the pitch tracker
+    pulses = voice_engine.get_pulses(samples, sample_rate, get_track(pitch))
+    record["pulses_same_count"] = len(pulses) == len(praat_pulses)
+    record["pulses_max_deviation"] = (
+        float(np.max(np.abs(pulses - praat_pulses), initial=0.0))
+        if record["pulses_same_count"]
+        else None
+    )
+    record["jitter_formula_deviation"] = abs(
+        voice_engine.get_jitter_local(praat_pulses)
+        - call(point_process, "Get jitter (local)", 0.0, 0.0, 0.0001, 0.02, 1.3)
+    )
+    record["shimmer_formula_deviation"] = abs(
+        voice_engine.get_shimmer_local(samples, sample_rate, praat_pulses)
+        - call(
+            [analyzer.sound, point_process],
+            "Get shimmer (local)",
+            0.0,
+            0.0,
+            0.0001,
+            0.02,
+            1.3,
+            1.6,
+        )
+    )
+
+    # Silent/sounding intervals: same labels, and the largest boundary shift if so
+    praat_intervals = analyzer.silence_intervals()
+    numpy_intervals = analyzer.native_silence_intervals()
+    same_labels = [label for _, _, label in praat_intervals] == [
+        label for _, _, label in numpy_intervals
+    ]
+    record["intervals_same_labels"] = same_labels
+    record["intervals_max_boundary_deviation"] = (
+        max(abs(a[1] - b[1]) for a, b in zip(praat_intervals, numpy_intervals))
+        if same_labels
+        else None
+    )
+    return record
+
+
+def main(
+    output=None,
+    durations=(1.0, 5.0, 30.0),
+    sample_rates=(16000, 44100),
+    tolerance=DEFAULT_TOLERANCE,
+):
+    corpus = make_corpus(durations, sample_rates)
+    records = []
+
+    print(f"{len(corpus)} synthetic signals")
+    print(
+        f"{'item':>14} {'jitter':>17} {'shimmer':>17} {'speech_ratio':>17} "
+        f"{'praat':>9} {'numpy':>9} {'speedup':>8}"
+    )
+    for item in corpus:
+        sound = parselmouth.Sound(item.samples.astype(np.float64), item.sample_rate)
+        praat_features, analyzer, praat_time = run_features(sound, "praat")
+        numpy_features, analyzer, numpy_time = run_features(sound, "numpy")
+        # The second analyzer holds the NumPy intermediates, the Praat ones are added to it
+        record = {"item": item.name, "duration": item.duration, "sample_rate": item.sample_rate}
+        record.update(validate_stages(item, analyzer))
+        for name in praat_features:
+            record[f"{name}_praat"] = praat_features[name]
+            record[f"{name}_numpy"] = numpy_features[name]
+            record[f"{name}_relative_deviation"] = get_relative_deviation(
+                numpy_features[name], praat_features[name]
+            )
+        record["praat_seconds"] = praat_time
+        record["numpy_seconds"] = numpy_time
+        records.append(record)
+
+        print(
+            f"{item.name:>14} "
+            + " ".join(
+                f"{record[f'{name}_relative_deviation'] * 100:>16.2f}%"
+                for name in ("local_jitter", "local_shimmer", "speech_ratio")
+            )
+            + f" {praat_time * 1e3:>7.1f}ms {numpy_time * 1e3:>7.1f}ms"
+            f" {praat_time / numpy_time:>7.1f}x"
+        )
+
+    # Every sample rate of the corpus as one batch
+    for sample_rate in sample_rates:
+        signals = [item.samples.astype(np.float64) for item in corpus]
+        signals = [s for s, item in zip(signals, corpus) if item.sample_rate == sample_rate]
+        start_time = time.perf_counter()
+        voice_engine.get_voice_attributes_batch(signals, sample_rate)
+        batch_time = time.perf_counter() - start_time
+        print(f"batch of {len(signals)} signals at {sample_rate} Hz: {batch_time * 1e3:.1f}ms")
+        records.append(
+            {"batch_sample_rate": sample_rate, "num_signals": len(signals), "seconds": batch_time}
+        )
+
+    print("Formula checks on the Praat pulses (should be ~1e-16):")
+    print(
+        "  jitter",
+        max(r["jitter_formula_deviation"] for r in records if "item" in r),
+        "shimmer",
+        max(r["shimmer_formula_deviation"] for r in records if "item" in r),
+    )
+
+    print(
+        "Pulses of the Praat pitch: same count as Praat on",
+        sum(r["pulses_same_count"] for r in records if "item" in r),
+        "items, largest time deviation",
+        max((r["pulses_max_deviation"] or 0.0) for r in records if "item" in r),
+    )
+
+    failures = [
+        (r["item"], name, r[f"{name}_relative_deviation"])
+        for r in records
+        if "item" in r
+        for name in ("local_jitter", "local_shimmer")
+        if not r[f"{name}_relative_deviation"] <= tolerance
+    ]
+    for name, feature, deviation in failures:
+        print(f"FAIL {name} {feature}: {deviation * 100:.2f}% > {tolerance * 100:.2f}%")
+    if not failures:
+        print(f"Jitter and shimmer within {tolerance * 100:.2f}% of Praat on every item")
+
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(records, f, indent=2)
+        print(f"Results saved to {output}")
+    return records, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default=None, help="JSON file for the validation records")
+    parser.add_argument("--durations", type=float, nargs="+", default=[1.0, 5.0, 30.0])
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[16000, 44100])
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="largest relative deviation of jitter and shimmer from Praat",
+    )
+    args = parser.parse_args()
+
+    _, failures = main(
+        output=args.output,
+        durations=args.durations,
+        sample_rates=args.sample_rates,
+        tolerance=args.tolerance,
+    )
+    sys.exit(1 if failures else 0)
@@ -3,81 +3,171 @@ Extract embeddings of acoustic features from audio files using pyannote.audio
 """
 
 import glob
-from pathlib import Path
+import os
+import time
+from functools import partial
+from importlib.metadata import version
 
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import seaborn as sns
 import torch
-from pyannote.audio import Inference, Model
-from tqdm.auto import tqdm
+
+from utils import profiling
+from utils.augmented_loader import AugmentedExtractor
+from utils.batch_extraction import report_errors, run_batch
+from utils.embedding_service import EmbeddingService
+from utils.feature_cache import CachedExtractor, FeatureCache
+from utils.feature_store import write_feature_table
+from utils.mel_engine import get_default_device
+from utils.voice_metadata import build_feature_table, load_voice_profiles
 
 torch.backends.cuda.matmul.allow_tf32 = True
 torch.backends.cudnn.allow_tf32 = True
 
-print("Audio Analysis with Python")
-
-
-audio_files = glob.glob("./wav_files/*.wav", recursive=True) + glob.glob(
-    "./wav_files_modified/*.wav", recursive=True
-)
-print(f"Number of audio files: {len(audio_files)}")
-
-voice_profiles = pd.read_csv("./outputs/voices.csv")  # Load the voice profiles
-# get only en- locale voices
-voice_profiles = voice_profiles[voice_profiles["locale"].str.contains("en-")]
-# drop voice_type and style_list columns
-voice_profiles.drop(columns=["voice_type", "style_list"], inplace=True)
-# print(voice_profiles.head())
-# ["locale", "local_name", "short_name", "gender"]
-
+# Set in every worker by init_worker, so the model is loaded once per process and not per file
+service = None
 
-feats_len = 0
-feature_stats = []
-feature_names = []
 
-model = Model.from_pretrained("pyannote/wespeaker-voxceleb-resnet34-LM")
-inference = Inference(model, window="whole").to(torch.device("cuda"))
+def init_worker(device, num_threads, quantize, max_length_ratio):
+    global service
+    service = EmbeddingService(
+        "pyannote/wespeaker-voxceleb-resnet34-LM",
+        device=device,
+        max_length_ratio=max_length_ratio,
+        num_threads=num_threads,
+        quantize=quantize,
+    )
 
-for audio_file in tqdm(audio_files):
-    pitch_shifted = 100
-    speed_changed = 100
-    short_name = Path(audio_file).stem
 
-    if "pitch_shifted" in audio_file:
-        short_name, pitch_shifted = Path(audio_file).stem.split("_pitch_shifted_")
+def extract_embedding_samples(items):
+    return service.embed_samples(items)
 
-    if "speed_changed" in audio_file:
-        short_name, speed_changed = Path(audio_file).stem.split("_speed_changed_")
 
-    row = voice_profiles.loc[voice_profiles["short_name"] == short_name].values[0]
+def extract_counted(extract_fn, file_paths):
+    # Cache hits and failed files never reach the service, so its counters only grow with the
+    # embeddings actually computed for this work item
+    num_embeddings, inference_time = service.num_embeddings, service.inference_time
+    results = extract_fn(file_paths)
+    return results, service.num_embeddings - num_embeddings, service.inference_time - inference_time
 
-    emb = inference(audio_file).reshape(-1)
 
-    feats_len = len(emb)
+if __name__ == "__main__":
+    print("Audio Analysis with Python")
 
-    # Prepare a single row with mean and std for current file
-    feature_stats.append(
-        list(row[-4:-1]) + [int(pitch_shifted), int(speed_changed)] + list(row[-1:]) + list(emb)
-    )
+    device = get_default_device()
+    quantize = False  # int8 dynamic quantization, CPU only
+    # Longest / shortest file allowed in one batch, see Benchmarks.embedding_validation for the
+    # deviation from per-file inference
+    max_length_ratio = 1.1
+    batch_size = 16
+    # A single process owns the GPU; on CPU every worker process runs single-threaded
+    num_workers = 1 if device.type == "cuda" else os.cpu_count()
+    num_threads = None if device.type == "cuda" else 1
+    export_excel = False  # Also write the feature table to Excel
+    profile = False  # Print per-stage timings, counters and peak memory at the end
+    trace_file_path = None  # e.g. "./outputs/emb_trace.json", Chrome trace of a profiled run
 
-# Create column names: Mean and Std for each Mel band
-feat_names = [f"Feats_{i+1}" for i in range(feats_len)]
-all_feature_names = (
-    list(voice_profiles.columns[:-1]) + ["Pitch shifted", "Speed changed", "Gender"] + feat_names
-)
+    if profile:
+        profiling.enable(trace=trace_file_path is not None)
 
-print(f"Number of features extracted: {len(all_feature_names) - 6}")
+    # Pitch/speed variants are generated in memory from every source file, in percent
+    pitch_factors = [85, 90, 95, 105, 110, 115]
+    speed_factors = [85, 90, 95, 105, 110, 115]
 
-# Convert list to DataFrame
-df = pd.DataFrame(feature_stats, columns=all_feature_names)
+    audio_files = glob.glob("./wav_files/*.wav", recursive=True)
+    print(f"Number of audio files: {len(audio_files)}")
 
-# Save to CSV
+    # Load the en- locale voice profiles, indexed by short name
+    voice_profiles = load_voice_profiles("./outputs/voices.csv", locale_filter="en-")
 
-excel_file_path = (
-    "./outputs/output_emb_feature_stats.xlsx"  # Update this to your desired output file path
-)
-df.to_excel(excel_file_path, index=False)
-print(f"Feature statistics saved to {excel_file_path}")
-print(df.head())
+    # Only new or changed files are extracted, everything else comes from the cache
+    cache = FeatureCache("./outputs/feature_cache")
+    augmenter = AugmentedExtractor(
+        extract_embedding_samples, pitch_factors, speed_factors, batched=True
+    )
+    extract_fn = CachedExtractor(
+        augmenter,
+        cache,
+        "pyannote_embedding",
+        params={
+            "model": "pyannote/wespeaker-voxceleb-resnet34-LM",
+            "window": "whole",
+            "quantize": quantize,
+            "max_length_ratio": max_length_ratio,
+            **augmenter.params,
+        },
+        version=version("pyannote.audio"),
+        batched=True,
+    )
+    # Every work item is a batch of files; the service splits it further into length buckets
+    file_batches = [
+        tuple(audio_files[i : i + batch_size]) for i in range(0, len(audio_files), batch_size)
+    ]
+    start_time = time.perf_counter()
+    with profiling.timer("extract"):
+        batch_results, errors = run_batch(
+            partial(extract_counted, extract_fn),
+            file_batches,
+            num_workers=num_workers,
+            initializer=init_worker,
+            initargs=(device, num_threads, quantize, max_length_ratio),
+        )
+    elapsed_time = time.perf_counter() - start_time
+    results, num_embeddings, inference_time = [], 0, 0.0
+    for file_batch, batch_result in zip(file_batches, batch_results):
+        if batch_result is None:
+            results += [None] * len(file_batch)
+            continue
+        results += batch_result[0]
+        num_embeddings += batch_result[1]
+        inference_time += batch_result[2]
+    # Only the embeddings computed in this run, not the cached ones or the failed files
+    print(f"Embeddings computed: {num_embeddings}")
+    if num_embeddings:
+        print(
+            f"Embeddings per second: {num_embeddings / elapsed_time:.2f} "
+            f"({num_embeddings / inference_time:.2f} per second of inference)"
+        )
+    report_errors(errors)
+    cache.evict()
+    variant_files, results = augmenter.expand(audio_files, results)
+
+    # Create column names: one per embedding dimension
+    feats_len = next((len(emb) for emb in results if emb is not None), None)
+    if feats_len is None:
+        raise SystemExit("No embeddings were extracted")
+    feat_names = [f"Feats_{i+1}" for i in range(feats_len)]
+
+    with profiling.timer("feature_table"):
+        df = build_feature_table(
+            variant_files,
+            results,
+            feat_names,
+            voice_profiles,
+            short_name_from="stem",
+            default_factor=100,
+        )
+
+    print(f"Number of features extracted: {len(feat_names)}")
+
+    # Save to Parquet (Excel is only written on request, it is slow for large tables)
+
+    feature_file_path = (
+        "./outputs/output_emb_feature_stats.parquet"  # Update this to your desired output file path
+    )
+    with profiling.timer("write_parquet"):
+        write_feature_table(df, feature_file_path)
+    print(f"Feature statistics saved to {feature_file_path}")
+
+    if export_excel:
+        excel_file_path = "./outputs/output_emb_feature_stats.xlsx"
+        with profiling.timer("write_excel"):
+            df.to_excel(excel_file_path, index=False)
+        print(f"Feature statistics saved to {excel_file_path}")
+    print(df.head())
+
+    if profile:
+        profiling.print_summary()
+        if trace_file_path:
+            profiling.write_chrome_trace(trace_file_path)
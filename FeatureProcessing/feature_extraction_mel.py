@@ -3,177 +3,177 @@ Extract Mel spectrogram features from audio files and save them to a CSV file.
 """
 
 import glob
-from pathlib import Path
+import os
 
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import seaborn as sns
 import torch
 import torchaudio
 from pyAudioAnalysis import ShortTermFeatures, audioBasicIO
-from tqdm.auto import tqdm
 
-print("Audio Analysis with Python")
-
-
-audio_files = glob.glob(
-    "./generated/characters_wav_files_44100Hz/generated_combined/**/*.wav", recursive=True
-)
-print(f"Number of audio files: {len(audio_files)}")
-
-voice_profiles = pd.read_csv("./outputs/voices.csv")  # Load the voice profiles
-# get only en- locale voices
-voice_profiles = voice_profiles[voice_profiles["locale"].str.contains("en-")]
-# drop voice_type and style_list columns
-voice_profiles.drop(columns=["voice_type", "style_list"], inplace=True)
-# print(voice_profiles.head())
-# ["locale", "local_name", "short_name", "gender"]
+from utils import profiling
+from utils.augmented_loader import AugmentedExtractor
+from utils.batch_extraction import report_errors, run_batch
+from utils.feature_cache import CachedExtractor, FeatureCache
+from utils.feature_store import write_feature_table
+from utils.frame_export import iter_frame_chunks, write_frame_chunks
+from utils.mel_engine import get_default_device, get_mel_engine
+from utils.voice_metadata import build_feature_table, load_voice_profiles, resolve_metadata
 
 
 # Function to calculate the mean and std for each Mel band over an entire audio file
 def extract_mel_features(file_path, sample_rate=16000, n_mels=128):
+    # Transforms are built once per configuration and reused for every file
+    engine = get_mel_engine(sample_rate=sample_rate, n_mels=n_mels, n_fft=1024, hop_length=512)
+
     waveform, sr = torchaudio.load(file_path)
 
     # Resample to the target sample rate if needed
-    if sr != sample_rate:
-        resampler = torchaudio.transforms.Resample(orig_freq=sr, new_freq=sample_rate)
-        waveform = resampler(waveform)
-
-    # Extract Mel spectrogram
-    mel_spectrogram_transform = torchaudio.transforms.MelSpectrogram(
-        sample_rate=sample_rate,
-        n_mels=n_mels,
-        n_fft=1024,
-        hop_length=512,
-        center=True,
-        pad_mode="reflect",
-        power=2.0,
-        norm="slaney",
-        mel_scale="htk",
-        win_length=None,
-    )
-    mel_spectrogram = mel_spectrogram_transform(waveform)
-
-    # Convert to decibels (log scale)
-    mel_spectrogram_db = torchaudio.transforms.AmplitudeToDB()(mel_spectrogram)
+    waveform = engine.resample(waveform.mean(dim=0), sr)
 
-    mel_features = mel_spectrogram_db
+    # Extract Mel spectrogram in decibels (log scale)
+    mel_features, mask = engine.compute([waveform])
 
     # Compute mean and std for each Mel band (across time frames)
-    mel_mean = torch.mean(mel_features, dim=-1).squeeze().numpy()  # Mean along time axis
-    mel_std = torch.std(mel_features, dim=-1).squeeze().numpy()  # Std along time axis
+    mel_mean, mel_std = engine.masked_stats(mel_features, mask)
+
+    return mel_mean[0], mel_std[0], mel_features[0].cpu().numpy()
+
 
-    return mel_mean, mel_std, mel_features.squeeze().numpy()
+def init_worker():
+    # One intra-op thread per worker process, otherwise N workers x N torch threads oversubscribe
+    torch.set_num_threads(1)
 
 
-n_mels = 128
-feature_stats = []
-feature_names = []
+# Function to calculate the mean and std for each Mel band for a batch of decoded signals at once
+def extract_mel_stats_from_samples(items, sample_rate=16000, n_mels=128, batch_size=32):
+    engine = get_mel_engine(sample_rate=sample_rate, n_mels=n_mels, n_fft=1024, hop_length=512)
 
-for audio_file in tqdm(audio_files):
-    pitch_shifted = 100
-    speed_changed = 100
-    short_name = Path(audio_file).parent.stem
+    waveforms = [torch.from_numpy(samples) for samples, _ in items]
+    sample_rates = [sr for _, sr in items]
+    mel_mean, mel_std = engine.compute_file_stats(waveforms, sample_rates, batch_size)
+    return list(np.concatenate((mel_mean, mel_std), axis=1))
 
-    if "pitch_shifted" in audio_file:
-        short_name, pitch_shifted = Path(audio_file).stem.split("_pitch_shifted_")
 
-    if "speed_changed" in audio_file:
-        short_name, speed_changed = Path(audio_file).stem.split("_speed_changed_")
+# Function to get the (num_frames, n_mels) dB mel spectrogram of an audio file
+def extract_mel_frames(file_path):
+    _, _, mel_spectrogram = extract_mel_features(file_path)
+    return mel_spectrogram.T
 
-    row = voice_profiles.loc[voice_profiles["short_name"] == short_name].values[0]
 
-    mel_mean, mel_std, _ = extract_mel_features(audio_file)
+if __name__ == "__main__":
+    print("Audio Analysis with Python")
 
-    # Prepare a single row with mean and std for current file
-    features_row = np.concatenate((mel_mean, mel_std))
-    feature_stats.append(
-        list(row[-4:-1])
-        + [int(pitch_shifted), int(speed_changed)]
-        + list(row[-1:])
-        + list(features_row)
+    batch_size = 32
+    # A single process owns the GPU; worker processes only pay off for CPU extraction
+    num_workers = 1 if get_default_device().type == "cuda" else os.cpu_count()
+    export_excel = False  # Also write the feature table to Excel
+    export_frames = False  # Also stream frame-level features to disk
+    profile = False  # Print per-stage timings, counters and peak memory at the end
+    trace_file_path = None  # e.g. "./outputs/mel_trace.json", Chrome trace of a profiled run
+
+    if profile:
+        profiling.enable(trace=trace_file_path is not None)
+
+    # Pitch/speed variants generated in memory from every source file, in percent (default: none)
+    pitch_factors = []
+    speed_factors = []
+
+    audio_files = glob.glob(
+        "./generated/characters_wav_files_44100Hz/generated_combined/**/*.wav", recursive=True
     )
+    print(f"Number of audio files: {len(audio_files)}")
+
+    # Load the en- locale voice profiles, indexed by short name
+    voice_profiles = load_voice_profiles("./outputs/voices.csv", locale_filter="en-")
 
-# Create column names: Mean and Std for each Mel band
-mean_names = [f"Mel_Band_{i+1}_mean" for i in range(n_mels)]
-std_names = [f"Mel_Band_{i+1}_std" for i in range(n_mels)]
-columns = mean_names + std_names
-all_feature_names = (
-    list(voice_profiles.columns[:-1])
-    + ["Pitch shifted", "Speed changed", "Gender"]
-    + mean_names
-    + std_names
-)
-
-print(f"Number of features extracted: {len(all_feature_names) - 6}")
-
-# Convert list to DataFrame
-df = pd.DataFrame(feature_stats, columns=all_feature_names)
-
-# Save to CSV
-
-excel_file_path = "./outputs/combined_feats.xlsx"  # Update this to your desired output file path
-df.to_excel(excel_file_path, index=False)
-print(f"Feature statistics saved to {excel_file_path}")
-print(df.head())
-
-# # frame
-
-# n_mels = 128
-# feature_stats = []
-# feature_names = []
-
-# for audio_file in tqdm(audio_files):
-#     pitch_shifted = 100
-#     speed_changed = 100
-#     short_name = Path(audio_file).parent.stem
-
-#     if "pitch_shifted" in audio_file:
-#         short_name, pitch_shifted = Path(audio_file).stem.split("_pitch_shifted_")
-
-#     if "speed_changed" in audio_file:
-#         short_name, speed_changed = Path(audio_file).stem.split("_speed_changed_")
-
-#     row = voice_profiles.loc[voice_profiles["short_name"] == short_name].values[0]
-
-#     _, _, mel_spectrogram = extract_mel_features(audio_file)
-
-#     # print(mel_spectrogram.shape)
-#     feature_names = [
-#         "locale",
-#         "local_name",
-#         "short_name",
-#         "Pitch shifted",
-#         "Speed changed",
-#         "Gender",
-#         "Frame",
-#     ]
-#     n_frames = mel_spectrogram.shape[1]
-#     feature_names += [f"Mel_{i+1}" for i in range(mel_spectrogram.shape[0])]
-#     for i in range(n_frames):
-#         features_row = mel_spectrogram[:, i]
-
-#         if not np.any(features_row):
-#             continue
-
-#         feature_stats.append(
-#             list(row[:-1])
-#             + [int(pitch_shifted), int(speed_changed)]
-#             + list(row[-1:])
-#             + [i]
-#             + list(features_row)
-#         )
-
-
-# # # Convert list to DataFrame
-# df = pd.DataFrame(feature_stats, columns=feature_names)
-
-# # # Save to CSV
-
-# excel_file_path = (
-#     "./outputs/output_mel_frame_feature_stats.xlsx"  # Update this to your desired output file path
-# )
-# df.to_excel(excel_file_path, index=False)
-# print(f"Feature statistics saved to {excel_file_path}")
-# print(df.head())
+    n_mels = 128
+    # Only new or changed files are extracted, everything else comes from the cache
+    cache = FeatureCache("./outputs/feature_cache")
+    augmenter = AugmentedExtractor(
+        extract_mel_stats_from_samples, pitch_factors, speed_factors, batched=True
+    )
+    extract_fn = CachedExtractor(
+        augmenter,
+        cache,
+        "torchaudio_mel",
+        params={
+            "sample_rate": 16000,
+            "n_mels": n_mels,
+            "n_fft": 1024,
+            "hop_length": 512,
+            **augmenter.params,
+        },
+        version=torchaudio.__version__,
+        batched=True,
+    )
+    # Every work item is a batch of files, so each worker runs batched forward passes
+    file_batches = [
+        tuple(audio_files[i : i + batch_size]) for i in range(0, len(audio_files), batch_size)
+    ]
+    with profiling.timer("extract"):
+        batch_results, errors = run_batch(
+            extract_fn, file_batches, num_workers=num_workers, initializer=init_worker
+        )
+    report_errors(errors)
+    results = []
+    for file_batch, batch_result in zip(file_batches, batch_results):
+        results += batch_result if batch_result is not None else [None] * len(file_batch)
+    cache.evict()
+
+    # Create column names: Mean and Std for each Mel band
+    mean_names = [f"Mel_Band_{i+1}_mean" for i in range(n_mels)]
+    std_names = [f"Mel_Band_{i+1}_std" for i in range(n_mels)]
+
+    variant_files, features = augmenter.expand(audio_files, results, short_name_from="parent")
+    with profiling.timer("feature_table"):
+        df = build_feature_table(
+            variant_files,
+            features,
+            mean_names + std_names,
+            voice_profiles,
+            short_name_from="parent",
+            default_factor=100,
+        )
+
+    print(f"Number of features extracted: {len(mean_names) + len(std_names)}")
+
+    # Save to Parquet (Excel is only written on request, it is slow for large tables)
+
+    feature_file_path = (
+        "./outputs/combined_feats.parquet"  # Update this to your desired output file path
+    )
+    with profiling.timer("write_parquet"):
+        write_feature_table(df, feature_file_path)
+    print(f"Feature statistics saved to {feature_file_path}")
+
+    if export_excel:
+        excel_file_path = "./outputs/combined_feats.xlsx"
+        with profiling.timer("write_excel"):
+            df.to_excel(excel_file_path, index=False)
+        print(f"Feature statistics saved to {excel_file_path}")
+    print(df.head())
+
+    # NOTE: frame-level features
+    if export_frames:
+        # Frames are written in fixed-size row groups while they are computed; per-file metadata
+        # goes to a separate small table keyed by file_id instead of being repeated on every frame
+        frame_file_path = "./outputs/output_mel_frame_features.parquet"
+        chunks = iter_frame_chunks(audio_files, extract_mel_frames, chunk_size=65536)
+        with profiling.timer("write_frames"):
+            num_frames = write_frame_chunks(
+                chunks, frame_file_path, [f"Mel_{i+1}" for i in range(n_mels)]
+            )
+        print(f"{num_frames} frame-level features saved to {frame_file_path}")
+
+        metadata, found = resolve_metadata(
+            audio_files, voice_profiles, short_name_from="parent", default_factor=100
+        )
+        metadata.insert(0, "file_id", np.flatnonzero(found))
+        write_feature_table(metadata, "./outputs/output_mel_frame_files.parquet")
+
+    if profile:
+        profiling.print_summary()
+        if trace_file_path:
+            profiling.write_chrome_trace(trace_file_path)
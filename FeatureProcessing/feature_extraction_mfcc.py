@@ -3,82 +3,119 @@ Feature extraction from audio files using pyAudioAnalysis library
 """
 
 import glob
-from pathlib import Path
+import os
+from importlib.metadata import version
 
 import numpy as np
-import pandas as pd
 from pyAudioAnalysis import ShortTermFeatures, audioBasicIO
-from tqdm.auto import tqdm
 
-print("Audio Analysis with Python")
+from utils import profiling
+from utils.augmented_loader import AugmentedExtractor
+from utils.batch_extraction import report_errors, run_batch
+from utils.feature_cache import CachedExtractor, FeatureCache
+from utils.feature_store import write_feature_table
+from utils.voice_metadata import build_feature_table, load_voice_profiles
 
 
-audio_files = glob.glob("./wav_files/*.wav", recursive=True) + glob.glob(
-    "./wav_files_modified/*.wav", recursive=True
-)
-print(f"Number of audio files: {len(audio_files)}")
+def get_short_term_stats(x, Fs):
+    # Extract short-term features
+    with profiling.timer("pyaudioanalysis.short_term_features"):
+        F, feature_names = ShortTermFeatures.feature_extraction(x, Fs, 0.050 * Fs, 0.025 * Fs)
+
+    # Compute mean and std for each feature across all frames
+    feature_means = np.mean(F, axis=1)
+    feature_stds = np.std(F, axis=1)
 
-voice_profiles = pd.read_csv("./outputs/voices.csv")  # Load the voice profiles
-# get only en- locale voices
-voice_profiles = voice_profiles[voice_profiles["locale"].str.contains("en-")]
-# drop voice_type and style_list columns
-voice_profiles.drop(columns=["voice_type", "style_list"], inplace=True)
-# print(voice_profiles.head())
-# ["locale", "local_name", "short_name", "gender"]
+    return np.concatenate((feature_means, feature_stds)), feature_names
 
-feature_stats = []
-feature_names = []
 
-for audio_file in tqdm(audio_files):
+def extract_short_term_features(file_path):
     # Read audio file
-    [Fs, x] = audioBasicIO.read_audio_file(audio_file)
-    #
-    pitch_shifted = 0
-    speed_changed = 0
-    short_name = Path(audio_file).stem
+    with profiling.timer("pyaudioanalysis.decode"):
+        [Fs, x] = audioBasicIO.read_audio_file(file_path)
+    return get_short_term_stats(x, Fs)
 
-    if "pitch_shifted" in audio_file:
-        short_name, pitch_shifted = Path(audio_file).stem.split("_pitch_shifted_")
 
-    if "speed_changed" in audio_file:
-        short_name, speed_changed = Path(audio_file).stem.split("_speed_changed_")
+def extract_short_term_features_from_samples(samples, sample_rate):
+    # pyAudioAnalysis expects 16-bit amplitudes, so float samples in [-1, 1] are scaled back
+    return get_short_term_stats(samples * 32768.0, sample_rate)
 
-    row = voice_profiles.loc[voice_profiles["short_name"] == short_name].values[0]
 
-    # Extract short-term features
-    F, feature_names = ShortTermFeatures.feature_extraction(x, Fs, 0.050 * Fs, 0.025 * Fs)
+if __name__ == "__main__":
+    print("Audio Analysis with Python")
 
-    # Compute mean and std for each feature across all frames
-    feature_means = np.mean(F, axis=1)
-    feature_stds = np.std(F, axis=1)
+    num_workers = os.cpu_count()
+    export_excel = False  # Also write the feature table to Excel
+    profile = False  # Print per-stage timings, counters and peak memory at the end
+    trace_file_path = None  # e.g. "./outputs/mfcc_trace.json", Chrome trace of a profiled run
 
-    # Prepare a single row with mean and std for current file
-    features_row = np.concatenate((feature_means, feature_stds))
-    feature_stats.append(
-        list(row[-4:-1]) + [pitch_shifted, speed_changed] + list(row[-1:]) + list(features_row)
-    )
+    if profile:
+        profiling.enable(trace=trace_file_path is not None)
+
+    # Pitch/speed variants are generated in memory from every source file, in percent
+    pitch_factors = [85, 90, 95, 105, 110, 115]
+    speed_factors = [85, 90, 95, 105, 110, 115]
+
+    audio_files = glob.glob("./wav_files/*.wav", recursive=True)
+    print(f"Number of audio files: {len(audio_files)}")
+
+    # Load the en- locale voice profiles, indexed by short name
+    voice_profiles = load_voice_profiles("./outputs/voices.csv", locale_filter="en-")
 
-# NOTE Creating a DataFrame
-# Add 'audio_id' to feature names for mean and std
-mean_names = [f"{name}_mean" for name in feature_names]
-std_names = [f"{name}_std" for name in feature_names]
-all_feature_names = (
-    list(voice_profiles.columns[:-1])
-    + ["Pitch shifted", "Speed changed", "Gender"]
-    + mean_names
-    + std_names
-)
-
-print(f"Number of features extracted: {len(all_feature_names) - 6}")
-
-# Convert list to DataFrame
-df = pd.DataFrame(feature_stats, columns=all_feature_names)
-
-# Save to CSV
-
-excel_file_path = (
-    "./outputs/output_feature_stats.xlsx"  # Update this to your desired output file path
-)
-df.to_excel(excel_file_path, index=False)
-print(f"Feature statistics saved to {excel_file_path}")
-# NOTE: Mel spectrogram extraction
+    # Only new or changed files are extracted, everything else comes from the cache
+    cache = FeatureCache("./outputs/feature_cache")
+    augmenter = AugmentedExtractor(
+        extract_short_term_features_from_samples, pitch_factors, speed_factors
+    )
+    extract_fn = CachedExtractor(
+        augmenter,
+        cache,
+        "pyaudioanalysis_short_term",
+        params={"window": 0.050, "step": 0.025, **augmenter.params},
+        version=version("pyAudioAnalysis"),
+    )
+    with profiling.timer("extract"):
+        results, errors = run_batch(extract_fn, audio_files, num_workers=num_workers)
+    report_errors(errors)
+    cache.evict()
+
+    # NOTE Creating a DataFrame
+    feature_names = next(result[1] for result in results if result is not None)
+    mean_names = [f"{name}_mean" for name in feature_names]
+    std_names = [f"{name}_std" for name in feature_names]
+
+    variant_files, features = augmenter.expand(
+        audio_files, [result[0] if result is not None else None for result in results]
+    )
+    with profiling.timer("feature_table"):
+        df = build_feature_table(
+            variant_files,
+            features,
+            mean_names + std_names,
+            voice_profiles,
+            short_name_from="stem",
+            default_factor=0,
+        )
+
+    print(f"Number of features extracted: {len(mean_names) + len(std_names)}")
+
+    # Save to Parquet (Excel is only written on request, it is slow for large tables)
+
+    feature_file_path = (
+        "./outputs/output_feature_stats.parquet"  # Update this to your desired output file path
+    )
+    with profiling.timer("write_parquet"):
+        write_feature_table(df, feature_file_path)
+    print(f"Feature statistics saved to {feature_file_path}")
+
+    if export_excel:
+        excel_file_path = "./outputs/output_feature_stats.xlsx"
+        with profiling.timer("write_excel"):
+            df.to_excel(excel_file_path, index=False)
+        print(f"Feature statistics saved to {excel_file_path}")
+
+    if profile:
+        profiling.print_summary()
+        if trace_file_path:
+            profiling.write_chrome_trace(trace_file_path)
+    # NOTE: Mel spectrogram extraction
@@ -1,41 +1,92 @@
 import glob
 import os
+import time
 from pathlib import Path
 
-audio_filepaths = glob.glob(
-    "./generated/characters_wav_files_44100Hz/generated/**/*.wav", recursive=True
-)
-img_path = "./generated/sound.gif"
-
-# for audio_filepath in audio_filepaths:
-#     audio_filepath = Path(audio_filepath)
-#     char_name = audio_filepath.parent.stem
-#     video_filepath = audio_filepath.parent.parent / "final" / f"{char_name}.mp4"
-#     if video_filepath.exists():
-#         os.system(f"rm {video_filepath}")
-
-#     os.system(
-#         f'ffmpeg -hide_banner -i {audio_filepath} -ignore_loop 0 -i {img_path} -vf "scale=trunc(iw/2)*2:trunc(ih/2)*2" -shortest -strict -2 -c:v libx264 -threads 4 -c:a aac -b:a 192k -pix_fmt yuv420p -shortest {video_filepath}'
-#     )
-print("Total:", len(audio_filepaths))
-for audio_filepath in audio_filepaths:
-    saving_path = str(audio_filepath).replace("characters_wav_files_44100Hz", "videos")
-    saving_path = Path(saving_path)
+from utils.render_jobs import RenderJob, report_render_results, run_render_job, run_render_jobs
+
+FFMPEG = "ffmpeg"
+
+
+def predecode_gif(gif_path, video_path):
+    """
+    Function to decode the looping GIF once into an H.264 video at the final scale and pixel format,
+    so every clip can stream-copy it instead of decoding the GIF and encoding video again.
+
+    NOTE: Every frame is a keyframe, so cutting the looped video at the end of the audio (-shortest)
+    is frame accurate even though the video stream is copied.
+
+    :param (str) gif_path: path to the GIF
+    :param (str) video_path: path to the intermediate video
+    :return: a RenderResult
+    """
+    # fmt: off
+    command = [
+        FFMPEG, "-hide_banner", "-y",
+        "-i", gif_path,
+        "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+        "-c:v", "libx264", "-g", "1", "-pix_fmt", "yuv420p", "-an",
+    ]
+    # fmt: on
+    return run_render_job(RenderJob(command, [gif_path], video_path))
+
+
+def make_video_job(audio_filepath, loop_video_path, video_filepath):
+    """
+    :param (str) audio_filepath: path to the character audio
+    :param (str) loop_video_path: path to the pre-decoded GIF video (see predecode_gif)
+    :param (str) video_filepath: path to the rendered clip
+    :return: a RenderJob that loops the GIF video for the duration of the audio
+    """
+    # fmt: off
+    command = [
+        FFMPEG, "-hide_banner", "-y",
+        "-i", audio_filepath,
+        "-stream_loop", "-1", "-i", loop_video_path,
+        "-map", "1:v", "-map", "0:a",
+        "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
+        "-shortest", "-threads", "1",
+    ]
+    # fmt: on
+    return RenderJob(command, [audio_filepath, loop_video_path], str(video_filepath))
+
+
+def get_video_filepath(audio_filepath):
+    """
+    :param (str) audio_filepath: path like .../characters_wav_files_44100Hz/generated/<gender>/
+           <voice>/<lang>-<local>-<char>-<content>.wav
+    :return: path like .../videos/generated/<content>/<gender>/<lang>-<local>-<char>.mp4
+    """
+    saving_path = Path(str(audio_filepath).replace("characters_wav_files_44100Hz", "videos"))
     fname = saving_path.stem
     gender = saving_path.parent.parent.stem
-    try:
-        lang, local, char_name, content = str(fname).split("-")
-        video_filepath = (
-            saving_path.parent.parent.parent / content / gender / f"{lang}-{local}-{char_name}.mp4"
-        )
-        os.makedirs(video_filepath.parent, exist_ok=True)
-        if video_filepath.exists():
-            os.system(f"rm {video_filepath}")
-
-        os.system(
-            f'ffmpeg -hide_banner -i {audio_filepath} -ignore_loop 0 -i {img_path} -vf "scale=trunc(iw/2)*2:trunc(ih/2)*2" -shortest -strict -2 -c:v libx264 -threads 4 -c:a aac -b:a 192k -pix_fmt yuv420p -shortest {video_filepath}'
-        )
-        print(audio_filepath, "->", video_filepath)
-    except Exception as e:
-        print("Error:", repr(e), str(fname).split("-"))
-        pass
+    lang, local, char_name, content = str(fname).split("-")
+    return saving_path.parent.parent.parent / content / gender / f"{lang}-{local}-{char_name}.mp4"
+
+
+if __name__ == "__main__":
+    num_workers = os.cpu_count()
+
+    audio_filepaths = glob.glob(
+        "./generated/characters_wav_files_44100Hz/generated/**/*.wav", recursive=True
+    )
+    img_path = "./generated/sound.gif"
+    loop_video_path = "./generated/sound_loop.mp4"
+    print("Total:", len(audio_filepaths))
+
+    result = predecode_gif(img_path, loop_video_path)
+    if result.error is not None:
+        raise RuntimeError(f"Could not decode {img_path}: {result.error}")
+
+    jobs = []
+    for audio_filepath in audio_filepaths:
+        try:
+            video_filepath = get_video_filepath(audio_filepath)
+        except ValueError:
+            print("Error:", audio_filepath, Path(audio_filepath).stem.split("-"))
+            continue
+        jobs.append(make_video_job(audio_filepath, loop_video_path, video_filepath))
+
+    start_time = time.perf_counter()
+    results = run_render_jobs(jobs, num_workers=num_workers, desc="Rendering")
+    report_render_results(results, wall_time=time.perf_counter() - start_time)
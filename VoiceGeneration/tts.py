@@ -3,76 +3,119 @@
 
 import json
 import os
-import wave
+from functools import partial
 from pprint import pprint
+from xml.sax.saxutils import escape
 
 import azure.cognitiveservices.speech as speechsdk
-import numpy as np
 import pandas as pd
-from scipy.io.wavfile import write as write_wav
-from tqdm import tqdm
 
-# cspell: ignore cognitiveservices frombuffer speechsdk wavfile
-
-sentence_lists = json.load(open("sentences.json", "r"))
-pprint(sentence_lists)
-# combine 5 sentences into 1
-# sample_sentence = ""
-# for per, contents in range(sentence_lists.items()):
-#     for intent, sentence in contents.items():
-#         sample_sentence += sentence + ". "
-
-
-def text2speech(text, voice_name, speech_config, save_path, sample_rate=44100):
-    # Write the raw audio data to a temporary file
-    temp_file = "temp.wav"
-    # Initialize the speech synthesizer
-    speech_config.speech_synthesis_voice_name = voice_name
-    audio_config = speechsdk.audio.AudioOutputConfig(use_default_speaker=True, filename=temp_file)
-    synthesizer = speechsdk.SpeechSynthesizer(
-        speech_config=speech_config, audio_config=audio_config
-    )
-    # Synthesize speech to a memory stream
-    result = synthesizer.speak_text_async(text).get()
+from utils import profiling
+from utils.audio_io import save_wav_bytes
+from utils.batch_extraction import report_errors
+from utils.tts_manifest import GenerationManifest
+from utils.tts_pipeline import SynthesisError, SynthesisJob, run_synthesis
 
-    if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-        print("Speech synthesis succeeded.")
-
-        # Get the audio data as bytes
-        audio_data = result.audio_data
+# cspell: ignore cognitiveservices frombuffer speechsdk wavfile
 
-        with open(temp_file, "wb") as f:
-            f.write(audio_data)
 
-        # Resample the audio to 44100 Hz
-        with wave.open(temp_file, "rb") as original_wave:
-            params = original_wave.getparams()
-            original_sample_rate = params.framerate
-            original_audio = original_wave.readframes(params.nframes)
+class AzureSynthesisBackend:
+    """
+    Azure Speech backend for utils.tts_pipeline. Every synthesizer keeps its service connection
+    open and serves any voice, because the voice is selected per request through SSML.
+    """
+
+    # Cancellations worth retrying: throttling, timeouts and dropped connections
+    RETRYABLE_ERRORS = ["TooManyRequests", "ServiceTimeout", "ConnectionFailure", "ServiceError"]
+
+    def __init__(self, speech_config):
+        """
+        :param (speechsdk.SpeechConfig) speech_config: subscription and region of the service
+        """
+        self.speech_config = speech_config
+
+    def create_synthesizer(self):
+        # audio_config=None keeps the result in memory instead of playing or writing it
+        synthesizer = speechsdk.SpeechSynthesizer(
+            speech_config=self.speech_config, audio_config=None
+        )
+        connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
+        connection.open(True)
+        return synthesizer
+
+    def synthesize(self, synthesizer, text, voice_name):
+        locale = "-".join(voice_name.split("-")[:2])
+        ssml = (
+            f"<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='{locale}'>"
+            f"<voice name='{voice_name}'>{escape(text)}</voice></speak>"
+        )
+        result = synthesizer.speak_ssml_async(ssml).get()
+
+        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+            return result.audio_data
+
+        details = result.cancellation_details
+        error_code = str(getattr(details, "error_code", ""))
+        raise SynthesisError(
+            f"Speech synthesis failed: {result.reason} {error_code} {details.error_details}",
+            retryable=any(code in error_code for code in self.RETRYABLE_ERRORS),
+        )
+
+
+def save_audio(audio_data, save_path, sample_rate=44100, dtype="int16"):
+    """
+    Function to resample synthesized WAV bytes and save them, without a temporary file.
+
+    :param (bytes) audio_data: synthesized audio in WAV (RIFF) format
+    :param (str) save_path: output WAV path
+    :param (int) sample_rate: sample rate of the saved audio (default: 44100)
+    :param (str) dtype: 'int16' or 'float32' samples in the saved file (default: 'int16')
+    :return: duration of the saved audio, in seconds
+    """
+    return save_wav_bytes(audio_data, save_path, sample_rate=sample_rate, dtype=dtype)
 
-        # Convert raw audio to numpy array
-        audio_array = np.frombuffer(original_audio, dtype=np.int16)
 
-        # Resample if needed
-        if original_sample_rate != sample_rate:
-            import resampy
+def text2speech(text, voice_name, speech_config, save_path, sample_rate=44100):
+    backend = AzureSynthesisBackend(speech_config)
+    try:
+        audio_data = backend.synthesize(backend.create_synthesizer(), text, voice_name)
+    except SynthesisError as e:
+        print(e)
+        return
 
-            audio_array_resampled = resampy.resample(
-                audio_array, original_sample_rate, sample_rate
-            )
-        else:
-            audio_array_resampled = audio_array
+    print("Speech synthesis succeeded.")
+    save_audio(audio_data, save_path, sample_rate)
+    print(f"Audio saved to {save_path} with sample rate {sample_rate} Hz.")
 
-        # Save the resampled audio to the output file
-        write_wav(save_path, sample_rate, audio_array_resampled.astype(np.int16))
 
-        print(f"Audio saved to {save_path} with sample rate 44100 Hz.")
-    else:
-        print(f"Speech synthesis failed: {result.reason}")
+def handle_audio(job, audio_data, manifest=None, dtype="int16"):
+    duration = save_audio(audio_data, job.save_path, job.sample_rate, dtype=dtype)
+    if manifest is not None:
+        with profiling.timer("tts.manifest"):
+            manifest.mark_done(job, duration)
+    return duration
 
 
 if __name__ == "__main__":
+    sentence_lists = json.load(open("sentences.json", "r"))
+    pprint(sentence_lists)
+    # combine 5 sentences into 1
+    # sample_sentence = ""
+    # for per, contents in range(sentence_lists.items()):
+    #     for intent, sentence in contents.items():
+    #         sample_sentence += sentence + ". "
+
     # configurations
+    num_workers = 8
+    max_requests_per_second = 20
+    # Anything that changes the generated audio besides voice, text and sample rate
+    # float32 output lets the feature extractors read the samples without integer conversion
+    output_dtype = "int16"
+    generation_config = {"backend": "azure", "output": output_dtype, "resampler": "polyphase"}
+    profile = False  # Print per-stage timings, counters and peak memory at the end
+    trace_file_path = None  # e.g. "./outputs/tts_trace.json", Chrome trace of a profiled run
+    if profile:
+        profiling.enable(trace=trace_file_path is not None)
     save_dir = r"./generated/eHMI/"
     os.makedirs(save_dir, exist_ok=True)
 
@@ -111,51 +154,54 @@ if __name__ == "__main__":
     voice_df = pd.read_csv("outputs/voices.csv")
 
     # df to csv
-    try:
-        for i, row in tqdm(voices_df.iterrows(), total=len(voices_df)):
-            voice_name = str(row["short_name"])
-            gender = str(row["gender"])
-            if (
-                ("en-" not in row["locale"])
-                or (":" in voice_name)
-                or ("Multilingual" in voice_name)
-            ):
-                continue
-
-            ##NOTE: Generate single audio file
-
-            # os.makedirs(os.path.join(save_dir, f"{voice_name}"), exist_ok=True)
-            # audio_file = os.path.join(save_dir, f"{voice_name}/{voice_name}-combined.wav")
-            # text2speech(
-            #     text=sample_sentence,
-            #     voice_name=voice_name,
-            #     speech_config=speech_config,
-            #     save_path=audio_file,
-            # )
-
-            ##NOTE: Personality
-            # for personality, sentence in sentence_list.items():
-            #     os.makedirs(os.path.join(save_dir, f"{gender}/{voice_name}"), exist_ok=True)
-            #     audio_file_personality = os.path.join(
-            #         save_dir, f"{gender}/{voice_name}/{voice_name}-{personality}.wav"
-            #     )
-            #     text2speech(
-            #         text=sentence,
-            #         voice_name=voice_name,
-            #         speech_config=speech_config,
-            #         save_path=audio_file_personality,
-            #     )
-
-            ##NOTE: Intents
-            for intent, text in sentence_lists["CON"].items():
-                os.makedirs(os.path.join(save_dir, f"{voice_name}"), exist_ok=True)
-                audio_file_intent = os.path.join(save_dir, f"{voice_name}/{intent}.wav")
-                text2speech(
-                    text=text,
-                    voice_name=voice_name,
-                    speech_config=speech_config,
-                    save_path=audio_file_intent,
-                )
-
-    except Exception as e:
-        print(repr(e))
+    jobs = []
+    for i, row in voices_df.iterrows():
+        voice_name = str(row["short_name"])
+        gender = str(row["gender"])
+        if ("en-" not in row["locale"]) or (":" in voice_name) or ("Multilingual" in voice_name):
+            continue
+
+        ##NOTE: Generate single audio file
+
+        # os.makedirs(os.path.join(save_dir, f"{voice_name}"), exist_ok=True)
+        # audio_file = os.path.join(save_dir, f"{voice_name}/{voice_name}-combined.wav")
+        # jobs.append(SynthesisJob(voice_name, sample_sentence, audio_file, 44100))
+
+        ##NOTE: Personality
+        # for personality, sentence in sentence_list.items():
+        #     os.makedirs(os.path.join(save_dir, f"{gender}/{voice_name}"), exist_ok=True)
+        #     audio_file_personality = os.path.join(
+        #         save_dir, f"{gender}/{voice_name}/{voice_name}-{personality}.wav"
+        #     )
+        #     jobs.append(SynthesisJob(voice_name, sentence, audio_file_personality, 44100))
+
+        ##NOTE: Intents
+        for intent, text in sentence_lists["CON"].items():
+            os.makedirs(os.path.join(save_dir, f"{voice_name}"), exist_ok=True)
+            audio_file_intent = os.path.join(save_dir, f"{voice_name}/{intent}.wav")
+            jobs.append(SynthesisJob(voice_name, text, audio_file_intent, 44100))
+
+    # Skip outputs that are already up to date, retry failed and changed ones
+    manifest = GenerationManifest("./outputs/tts_manifest.sqlite", config=generation_config)
+    pending_jobs = manifest.pending_jobs(jobs)
+    print(f"{len(jobs) - len(pending_jobs)}/{len(jobs)} files up to date")
+
+    # Synthesize concurrently, every worker reuses one synthesizer connection
+    _, errors = run_synthesis(
+        pending_jobs,
+        AzureSynthesisBackend(speech_config),
+        partial(handle_audio, manifest=manifest, dtype=output_dtype),
+        num_workers=num_workers,
+        max_requests_per_second=max_requests_per_second,
+    )
+    for job, error in errors.items():
+        manifest.mark_failed(job, error)
+
+    report_errors(errors)
+    print(manifest.summary())
+    manifest.close()
+
+    if profile:
+        profiling.print_summary()
+        if trace_file_path:
+            profiling.write_chrome_trace(trace_file_path)
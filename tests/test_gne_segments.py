@@ -0,0 +1,44 @@
+"""
+Tests of the segmented GNE analysis (utils.praat_feature_extraction) against the analysis of the
+whole sound.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import numpy as np
+import parselmouth
+import pytest
+
+from Benchmarks.synthetic_corpus import make_voiced_signal
+from utils.praat_feature_extraction import get_glottal_to_noise_ratio_attributes
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def sound():
+    samples = make_voiced_signal(4.0, SAMPLE_RATE, seed=1)
+    return parselmouth.Sound(samples.astype(np.float64), SAMPLE_RATE)
+
+
+@pytest.fixture(scope="module")
+def whole_attributes(sound):
+    return get_glottal_to_noise_ratio_attributes(sound)[0]
+
+
+def test_single_segment_is_exact(sound, whole_attributes):
+    attributes = get_glottal_to_noise_ratio_attributes(sound, segment_duration=10.0)[0]
+    assert attributes == pytest.approx(whole_attributes, rel=1e-12, abs=1e-12)
+
+
+def test_segments_match_whole_sound(sound, whole_attributes):
+    attributes = get_glottal_to_noise_ratio_attributes(sound, segment_duration=2.0)[0]
+    assert attributes.keys() == whole_attributes.keys()
+
+    # GNE cells lie in [0, 1]; only segment edges and overlaps differ from the whole sound
+    for name in attributes:
+        if name == "sum_gne":
+            assert attributes[name] == pytest.approx(whole_attributes[name], rel=0.02)
+        else:
+            assert attributes[name] == pytest.approx(whole_attributes[name], abs=0.02)
@@ -0,0 +1,131 @@
+"""
+Regression tests of the bulk reads of Praat objects (utils.praat_feature_extraction) against the
+per-frame 'Get value in frame' / 'Get value at time' queries they replace.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import numpy as np
+import parselmouth
+import pytest
+
+from utils.praat_feature_extraction import (
+    call,
+    get_formant_tracks,
+    get_lfcc,
+    get_mfcc,
+    get_track_values,
+)
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def sound():
+    """
+    :return: a synthetic voiced sound: two harmonic segments with a gliding pitch, separated and
+             surrounded by near-silent noise, so every track has voiced and unvoiced frames
+    """
+    rng = np.random.default_rng(0)
+    segments = [rng.normal(0.0, 1e-4, int(0.2 * SAMPLE_RATE))]
+    for start_pitch, end_pitch in [(120.0, 180.0), (220.0, 150.0)]:
+        num_samples = int(0.4 * SAMPLE_RATE)
+        pitch = np.linspace(start_pitch, end_pitch, num_samples)
+        phase = 2.0 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 11)) * np.hanning(num_samples)
+        segments += [0.3 * voiced, rng.normal(0.0, 1e-4, int(0.2 * SAMPLE_RATE))]
+    return parselmouth.Sound(np.concatenate(segments), SAMPLE_RATE)
+
+
+def get_frame_values(praat_object, *args):
+    return np.array(
+        [
+            call(praat_object, "Get value in frame", frame_no, *args)
+            for frame_no in range(1, praat_object.n_frames + 1)
+        ]
+    )
+
+
+def get_cepstral_frame_values(cepstrum, num_coefficients):
+    return np.array(
+        [
+            [
+                call(cepstrum, "Get value in frame", frame_no, coefficient_no)
+                for coefficient_no in range(1, num_coefficients + 1)
+            ]
+            for frame_no in range(1, call(cepstrum, "Get number of frames") + 1)
+        ]
+    )
+
+
+def test_mfcc(sound):
+    mfcc = call(sound, "To MFCC", 12, 0.015, 0.005, 100.0, 100.0, 0.0)
+    expected = get_cepstral_frame_values(mfcc, 12)
+    np.testing.assert_array_equal(get_mfcc(sound), expected)
+
+
+@pytest.mark.parametrize("lpc_method", ["autocorrelation", "burg"])
+def test_lfcc(sound, lpc_method):
+    lpc = call(sound, "To LPC (%s)" % lpc_method, 16, 0.025, 0.005, 50.0)
+    expected = get_cepstral_frame_values(call(lpc, "To LFCC", 12), 12)
+    np.testing.assert_array_equal(get_lfcc(sound, lpc_method=lpc_method), expected)
+
+
+@pytest.mark.parametrize("unit", ["Hertz", "mel", "semitones re 100 Hz", "ERB"])
+def test_pitch_values(sound, unit):
+    pitch = call(sound, "To Pitch", 0.0, 75.0, 600.0)
+    expected = get_frame_values(pitch, unit)
+    values = get_track_values(pitch, unit)
+
+    # Unvoiced frames are NaN in both
+    assert np.isnan(expected).any() and not np.isnan(expected).all()
+    np.testing.assert_array_equal(np.isnan(values), np.isnan(expected))
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_intensity_values(sound):
+    intensity = call(sound, "To Intensity", 100.0, 0.0, "yes")
+    np.testing.assert_array_equal(get_track_values(intensity), get_frame_values(intensity))
+
+
+def test_harmonicity_values(sound):
+    harmonicity = call(sound, "To Harmonicity (cc)", 0.01, 75.0, 0.1, 1.0)
+    expected = get_frame_values(harmonicity)
+    values = get_track_values(harmonicity)
+
+    # Unvoiced frames keep Praat's -200 dB sentinel
+    assert (expected == -200.0).any()
+    np.testing.assert_array_equal(values, expected)
+
+
+def test_track_values_unsupported_object(sound):
+    with pytest.raises(TypeError):
+        get_track_values(sound)
+
+
+@pytest.mark.parametrize("unit", ["Hertz", "Bark"])
+def test_formant_tracks(sound, unit):
+    formant = call(sound, "To Formant (burg)", 0.0, 5.0, 5500.0, 0.025, 50.0)
+    times = [call(formant, "Get time from frame number", i) for i in range(1, formant.n_frames + 1)]
+    expected = np.array(
+        [
+            [
+                call(formant, "Get value at time", formant_no, t, unit, "linear")
+                for formant_no in (1, 2, 3, 4, 5)
+            ]
+            for t in times
+        ]
+    )
+    tracks = get_formant_tracks(formant, num_formants=5, unit=unit)
+
+    # Frames with fewer formants than requested are NaN in both
+    assert np.isnan(expected).any()
+    np.testing.assert_array_equal(np.isnan(tracks), np.isnan(expected))
+    np.testing.assert_allclose(tracks, expected, rtol=1e-12)
+
+
+def test_formant_tracks_unit(sound):
+    formant = call(sound, "To Formant (burg)", 0.0, 5.0, 5500.0, 0.025, 50.0)
+    with pytest.raises(ValueError):
+        get_formant_tracks(formant, unit="mel")
@@ -0,0 +1,165 @@
+"""
+In-memory audio conversion for synthesized speech. WAV (RIFF) buffers are parsed without copying,
+resampled with a polyphase filter that is designed once per rate pair, and written to disk once.
+"""
+
+import math
+import struct
+from functools import lru_cache
+
+import numpy as np
+from scipy.io.wavfile import write as write_wav
+from scipy.signal import firwin, resample_poly
+
+from utils.profiling import timer
+
+# WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT and WAVE_FORMAT_EXTENSIBLE format tags
+PCM_FORMAT, FLOAT_FORMAT, EXTENSIBLE_FORMAT = 1, 3, 0xFFFE
+
+OUTPUT_DTYPES = ["int16", "float32"]
+
+
+def parse_wav_bytes(data):
+    """
+    Function to read the samples of a WAV (RIFF) buffer as a NumPy view on the buffer itself,
+    without a temporary file or a copy of the sample data.
+
+    NOTE: Streaming encoders may write a placeholder data chunk size, so the data chunk is clipped
+    to the end of the buffer.
+
+    :param (bytes) data: WAV file content
+    :return: (samples (np.array) of shape (num_samples,) or (num_samples, channels), sample rate)
+    """
+    data = memoryview(data)
+    if len(data) < 12 or bytes(data[:4]) != b"RIFF" or bytes(data[8:12]) != b"WAVE":
+        raise ValueError("Argument for @data is not a RIFF/WAVE buffer!")
+
+    fmt, offset = None, 12
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset : offset + 4])
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", data, body)
+            if fmt[0] == EXTENSIBLE_FORMAT:
+                # The actual format tag is the first field of the sub-format GUID
+                fmt = (struct.unpack_from("<H", data, body + 24)[0],) + fmt[1:]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV buffer has no fmt chunk before its data chunk!")
+            format_tag, channels, sample_rate, _, _, bits_per_sample = fmt
+
+            if format_tag == PCM_FORMAT and bits_per_sample in (8, 16, 32):
+                dtype = {8: np.uint8, 16: np.int16, 32: np.int32}[bits_per_sample]
+            elif format_tag == FLOAT_FORMAT and bits_per_sample in (32, 64):
+                dtype = {32: np.float32, 64: np.float64}[bits_per_sample]
+            else:
+                raise ValueError(
+                    f"Unsupported WAV format {format_tag} with {bits_per_sample} bits per sample!"
+                )
+
+            frame_size = channels * np.dtype(dtype).itemsize
+            num_frames = min(chunk_size, len(data) - body) // frame_size
+            samples = np.frombuffer(
+                data,
+                dtype=np.dtype(dtype).newbyteorder("<"),
+                count=num_frames * channels,
+                offset=body,
+            )
+            if channels > 1:
+                samples = samples.reshape(-1, channels)
+            return samples, sample_rate
+
+        # Chunks are padded to an even number of bytes
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV buffer has no data chunk!")
+
+
+def to_float32(samples):
+    """
+    :param (np.array) samples: integer PCM or floating point samples
+    :return: float32 samples in [-1, 1]
+    """
+    if samples.dtype == np.uint8:
+        return (samples.astype(np.float32) - 128.0) / 128.0
+    if np.issubdtype(samples.dtype, np.integer):
+        return samples.astype(np.float32) / -float(np.iinfo(samples.dtype).min)
+    return samples.astype(np.float32, copy=False)
+
+
+@lru_cache(maxsize=None)
+def get_resampling_filter(source_rate, target_rate):
+    """
+    Function to design the anti-aliasing low-pass filter of a polyphase resampler once per
+    (source, target) rate pair. It is the same Kaiser-windowed filter scipy's resample_poly designs
+    on every call.
+
+    :param (int) source_rate: sample rate of the input
+    :param (int) target_rate: sample rate of the output
+    :return: (up factor, down factor, FIR coefficients)
+    """
+    gcd = math.gcd(source_rate, target_rate)
+    up, down = target_rate // gcd, source_rate // gcd
+    max_rate = max(up, down)
+    coefficients = firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    coefficients.setflags(write=False)
+    return up, down, coefficients
+
+
+def resample(samples, source_rate, target_rate):
+    """
+    Function to resample audio with a cached polyphase filter.
+
+    :param (np.array) samples: float samples of shape (num_samples,) or (num_samples, channels)
+    :param (int) source_rate: sample rate of @samples
+    :param (int) target_rate: sample rate of the result
+    :return: resampled float32 samples
+    """
+    if source_rate == target_rate:
+        return samples
+    up, down, coefficients = get_resampling_filter(source_rate, target_rate)
+    return resample_poly(samples, up, down, axis=0, window=coefficients).astype(np.float32)
+
+
+def convert_wav_bytes(data, sample_rate=None, dtype="int16"):
+    """
+    Function to convert a WAV buffer to samples of the requested rate and type, all in memory.
+
+    :param (bytes) data: WAV file content
+    :param (int) sample_rate: target sample rate (default: None, keep the original rate)
+    :param (str) dtype: output sample type, 'int16' or 'float32' (default: 'int16')
+    :return: (samples (np.array), sample rate)
+    """
+    if dtype not in OUTPUT_DTYPES:
+        raise ValueError("Argument for @dtype is not recognized!")
+
+    samples, source_rate = parse_wav_bytes(data)
+    target_rate = sample_rate or source_rate
+
+    if target_rate == source_rate and samples.dtype == np.dtype(dtype):
+        return samples, target_rate
+
+    samples = resample(to_float32(samples), source_rate, target_rate)
+    if dtype == "int16":
+        samples = np.clip(np.round(samples * 32768.0), -32768, 32767).astype(np.int16)
+    return samples, target_rate
+
+
+def save_wav_bytes(data, save_path, sample_rate=None, dtype="int16"):
+    """
+    Function to resample a WAV buffer and write it to disk in a single write.
+
+    :param (bytes) data: WAV file content
+    :param (str) save_path: output WAV path
+    :param (int) sample_rate: target sample rate (default: None, keep the original rate)
+    :param (str) dtype: 'int16' for 16-bit PCM or 'float32' for IEEE float WAV files that
+           extractors can read without integer conversion (default: 'int16')
+    :return: duration of the saved audio, in seconds
+    """
+    with timer("audio.convert"):
+        samples, sample_rate = convert_wav_bytes(data, sample_rate=sample_rate, dtype=dtype)
+    with timer("audio.write"):
+        write_wav(save_path, sample_rate, samples)
+    return len(samples) / sample_rate
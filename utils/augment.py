@@ -1,21 +1,81 @@
+"""
+Audio augmentation on float32 NumPy arrays in [-1, 1]: gain normalization and resampling-based
+pitch/speed changes, with a whole grid of factors applied to a single decoded signal.
+
+NOTE: Like the former pydub implementation, pitch and speed changes play the samples back at a
+different rate and resample the result, so both change pitch and tempo together. The resampling
+filter of every rate pair is designed once and reused (see utils.audio_io.resample).
+"""
+
+import os
+from pathlib import Path
+
 import numpy as np
 import soundfile as sf
-from pydub import AudioSegment
-from scipy import signal
-from scipy.io import wavfile
+
+from utils.audio_io import resample
+
+PITCH_SHIFTED, SPEED_CHANGED = "pitch_shifted", "speed_changed"
 
 # ====================================================Audio Augmentation utils==================================
 # Time domain
 
 
-def gain_target_amplitude(sound, target_dBFS=-10):
+def load_audio(file_path, mono=True):
+    """
+    :param (str) file_path: path to the audio file
+    :param (bool) mono: average the channels (default: True)
+    :return: (float32 samples of shape (num_samples,) or (num_samples, channels), sample rate)
+    """
+    samples, sample_rate = sf.read(file_path, dtype="float32", always_2d=True)
+    if mono:
+        samples = samples.mean(axis=1)
+    return samples, sample_rate
+
+
+def get_dbfs(samples):
+    """
+    :param (np.array) samples: float samples in [-1, 1]
+    :return: RMS level relative to full scale, in dB (-inf for silence)
+    """
+    rms = np.sqrt(np.mean(np.square(samples, dtype=np.float64)))
+    return 20 * np.log10(rms) if rms > 0 else -np.inf
+
+
+def apply_gain(samples, gain_db):
+    """
+    :param (np.array) samples: float samples in [-1, 1]
+    :param (float) gain_db: gain in dB
+    :return: amplified float32 samples, clipped to full scale like integer audio would be
+    """
+    return np.clip(samples * 10 ** (gain_db / 20), -1.0, 1.0).astype(np.float32)
+
+
+def gain_target_amplitude(samples, target_dBFS=-10):
     if target_dBFS > 0:
-        return sound
-    change_in_dBFS = target_dBFS - sound.dBFS
-    return sound.apply_gain(change_in_dBFS)
+        return samples
+    dbfs = get_dbfs(samples)
+    if np.isinf(dbfs):
+        return samples
+    change_in_dBFS = target_dBFS - dbfs
+    return apply_gain(samples, change_in_dBFS)
 
 
-def pitch_shift(sound, changes=None, n_step=0.0, n_octave_bin=12, sr=8000):
+def change_playback_rate(samples, sample_rate, factor, output_rate=None):
+    """
+    Function to play samples back at @factor times their sample rate and resample the result.
+
+    :param (np.array) samples: float samples of shape (num_samples,) or (num_samples, channels)
+    :param (int) sample_rate: sample rate of @samples
+    :param (float) factor: playback rate factor, > 1 is higher and faster
+    :param (int) output_rate: sample rate of the result (default: None, @sample_rate)
+    :return: float32 samples at @output_rate
+    """
+    playback_rate = int(sample_rate * factor)
+    return resample(samples, playback_rate, output_rate or sample_rate).astype(np.float32)
+
+
+def pitch_shift(samples, sample_rate, changes=None, n_step=0.0, n_octave_bin=12, sr=8000):
     # shift the pitch up by half an octave (speed will increase proportionally)
     # 1 octave = 12 half steps = 12 semitones
     if changes is not None:
@@ -23,29 +83,102 @@ def pitch_shift(sound, changes=None, n_step=0.0, n_octave_bin=12, sr=8000):
     else:
         octaves = n_step / n_octave_bin
 
-    new_sample_rate = int(sound.frame_rate * (2.0**octaves))
+    # keep the same samples but play them at the new rate, then convert to a common sample rate
+    return change_playback_rate(samples, sample_rate, 2.0**octaves, output_rate=sr)
+
+
+def speed_change(samples, sample_rate, speed=1.0):
+    # slow_sound = speed_change(samples, sample_rate, 0.75)
+    # fast_sound = speed_change(samples, sample_rate, 2.0)
+    return change_playback_rate(samples, sample_rate, speed)
+
+
+def iter_variants(
+    samples,
+    sample_rate,
+    pitch_factors=(),
+    speed_factors=(),
+    output_rate=None,
+    target_dBFS=None,
+    include_original=True,
+):
+    """
+    Generator of the augmented variants of one decoded signal, named like the
+    <short_name>_pitch_shifted_NN / <short_name>_speed_changed_NN files.
+
+    :param (np.array) samples: float samples of shape (num_samples,) or (num_samples, channels)
+    :param (int) sample_rate: sample rate of @samples
+    :param (list) pitch_factors: pitch shift factors in percent, e.g. [90, 110] (default: none)
+    :param (list) speed_factors: speed change factors in percent (default: none)
+    :param (int) output_rate: sample rate of pitch-shifted variants (default: None, @sample_rate);
+           speed-changed variants keep @sample_rate
+    :param (float) target_dBFS: normalize the signal to this level once, before augmentation
+           (default: None, no normalization)
+    :param (bool) include_original: also yield the unmodified signal first (default: True)
+    :return: yields (tag, factor, samples), where tag is None for the original signal and
+             'pitch_shifted' or 'speed_changed' otherwise
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if target_dBFS is not None:
+        samples = gain_target_amplitude(samples, target_dBFS)
+
+    if include_original:
+        yield None, 100, samples
+    for factor in pitch_factors:
+        yield PITCH_SHIFTED, factor, change_playback_rate(
+            samples, sample_rate, factor / 100, output_rate
+        )
+    for factor in speed_factors:
+        yield SPEED_CHANGED, factor, change_playback_rate(samples, sample_rate, factor / 100)
+
 
-    # keep the same samples but tell the computer they ought to be played at the
-    # new, higher sample rate. This file sounds like a chipmunk but has a weird sample rate.
-    hipitch_sound = sound._spawn(sound.raw_data, overrides={"frame_rate": new_sample_rate})
+def get_variant_stem(stem, tag, factor):
+    """
+    :param (str) stem: file name of the original audio without extension
+    :param (str) tag: 'pitch_shifted', 'speed_changed' or None for the original
+    :param (int) factor: factor in percent
+    :return: file name of the variant without extension
+    """
+    return stem if tag is None else f"{stem}_{tag}_{factor}"
 
-    # now we just convert it to a common sample rate (44.1k - standard audio CD) to
-    # make sure it works in regular audio players. Other than potentially losing audio quality (if
-    # you set it too low - 44.1k is plenty) this should now noticeable change how the audio sounds.
-    hipitch_sound = hipitch_sound.set_frame_rate(sr)
-    return hipitch_sound
 
+def write_variants(
+    file_path,
+    output_dir,
+    pitch_factors=(),
+    speed_factors=(),
+    output_rate=None,
+    target_dBFS=None,
+    subtype="PCM_16",
+):
+    """
+    Function to decode an audio file once and write all of its pitch/speed variants.
 
-def speed_change(sound, speed=1.0):
-    # Manually override the frame_rate. This tells the computer how many
-    # samples to play per second
-    # slow_sound = speed_change(sound, 0.75)
-    # fast_sound = speed_change(sound, 2.0)
+    :param (str) file_path: path to the original audio file
+    :param (str) output_dir: directory of the variant files
+    :param (list) pitch_factors: see iter_variants (default: none)
+    :param (list) speed_factors: see iter_variants (default: none)
+    :param (int) output_rate: see iter_variants (default: None)
+    :param (float) target_dBFS: see iter_variants (default: None)
+    :param (str) subtype: soundfile subtype of the written files (default: 'PCM_16')
+    :return: a list of the written paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    samples, sample_rate = load_audio(file_path)
+    stem = Path(file_path).stem
 
-    sound_with_altered_frame_rate = sound._spawn(
-        sound.raw_data, overrides={"frame_rate": int(sound.frame_rate * speed)}
-    )
-    # convert the sound with altered frame rate to a standard frame rate
-    # so that regular playback programs will work right. They often only
-    # know how to play audio at standard frame rate (like 44.1k)
-    return sound_with_altered_frame_rate.set_frame_rate(sound.frame_rate)
+    written = []
+    for tag, factor, variant in iter_variants(
+        samples,
+        sample_rate,
+        pitch_factors,
+        speed_factors,
+        output_rate=output_rate,
+        target_dBFS=target_dBFS,
+        include_original=False,
+    ):
+        rate = (output_rate or sample_rate) if tag == PITCH_SHIFTED else sample_rate
+        save_path = os.path.join(output_dir, get_variant_stem(stem, tag, factor) + ".wav")
+        sf.write(save_path, variant, rate, subtype=subtype)
+        written.append(save_path)
+    return written
@@ -0,0 +1,167 @@
+"""
+Augmentation-aware loading for the feature extractors. Every source file is decoded once, its
+pitch/speed variants are generated in memory and passed straight to the extraction function, so no
+variant wav files have to be written to and read back from disk.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from utils.augment import PITCH_SHIFTED, SPEED_CHANGED, get_variant_stem, iter_variants, load_audio
+from utils.profiling import timer
+
+
+class AugmentedExtractor:
+    """
+    Picklable wrapper that turns a function of (samples, sample_rate) into a function of a source
+    file path returning the features of the original signal and all of its variants, stacked in
+    the order of @variants. It can be wrapped in a CachedExtractor and passed to run_batch like any
+    per-file extractor.
+    """
+
+    def __init__(
+        self,
+        extract_fn,
+        pitch_factors=(),
+        speed_factors=(),
+        output_rate=None,
+        target_dBFS=None,
+        batched=False,
+    ):
+        """
+        :param (callable) extract_fn: function of (float32 samples, sample rate) returning a
+               feature vector, or a tuple (feature vector, feature names)
+        :param (list) pitch_factors: pitch shift factors in percent, e.g. [90, 110] (default: none)
+        :param (list) speed_factors: speed change factors in percent (default: none)
+        :param (int) output_rate: sample rate of pitch-shifted variants (default: None, original)
+        :param (float) target_dBFS: normalize every source signal to this level first
+               (default: None, no normalization)
+        :param (bool) batched: whether @extract_fn takes a list of (samples, sample rate) pairs and
+               returns a list of feature vectors (None for failures); the wrapper then also takes a
+               list of files and passes the variants of all of them to @extract_fn at once
+               (default: False)
+        """
+        self.extract_fn = extract_fn
+        self.pitch_factors = list(pitch_factors)
+        self.speed_factors = list(speed_factors)
+        self.output_rate = output_rate
+        self.target_dBFS = target_dBFS
+        self.batched = batched
+
+    @property
+    def params(self):
+        """
+        :return: augmentation settings, to be included in the cache parameters of the extractor
+        """
+        return {
+            "pitch_factors": self.pitch_factors,
+            "speed_factors": self.speed_factors,
+            "output_rate": self.output_rate,
+            "target_dBFS": self.target_dBFS,
+        }
+
+    @property
+    def variants(self):
+        """
+        :return: a list of (tag, factor) of the original signal and every variant, in output order
+        """
+        return (
+            [(None, 100)]
+            + [(PITCH_SHIFTED, factor) for factor in self.pitch_factors]
+            + [(SPEED_CHANGED, factor) for factor in self.speed_factors]
+        )
+
+    def load_variants(self, file_path):
+        """
+        Function to decode a source file once and generate all of its variants.
+
+        :param (str) file_path: path to the source audio file
+        :return: a list of (float32 samples, sample rate) in the order of @variants
+        """
+        with timer("augment.decode"):
+            samples, sample_rate = load_audio(file_path)
+        with timer("augment.variants"):
+            return [
+                (
+                    variant,
+                    (self.output_rate or sample_rate) if tag == PITCH_SHIFTED else sample_rate,
+                )
+                for tag, _, variant in iter_variants(
+                    samples,
+                    sample_rate,
+                    self.pitch_factors,
+                    self.speed_factors,
+                    output_rate=self.output_rate,
+                    target_dBFS=self.target_dBFS,
+                )
+            ]
+
+    def __call__(self, file_path):
+        if self.batched:
+            return self._call_batch(file_path)
+
+        results = [self.extract_fn(samples, sr) for samples, sr in self.load_variants(file_path)]
+        if isinstance(results[0], tuple):
+            # (feature vector, feature names): the names are the same for every variant
+            return np.stack([result[0] for result in results]), results[0][1]
+        return np.stack(results)
+
+    def _call_batch(self, file_paths):
+        loaded, items = [], []
+        for i, file_path in enumerate(file_paths):
+            try:
+                items += self.load_variants(file_path)
+            except Exception as e:
+                print("Error:", file_path, repr(e))
+                continue
+            loaded.append(i)
+
+        features = self.extract_fn(items) if items else []
+
+        num_variants = len(self.variants)
+        values = [None] * len(file_paths)
+        for row, i in enumerate(loaded):
+            file_features = features[row * num_variants : (row + 1) * num_variants]
+            if all(feature is not None for feature in file_features):
+                values[i] = np.stack(file_features)
+        return values
+
+    def get_variant_paths(self, file_path, short_name_from="stem"):
+        """
+        :param (str) file_path: path to a source audio file
+        :param (str) short_name_from: 'stem' to tag the file name, 'parent' to tag the voice
+               directory of <short_name>/<content>.wav files (default: 'stem')
+        :return: the paths the variants would have as wav files, in the order of @variants; they
+                 are only used as row names and parsed by utils.voice_metadata
+        """
+        file_path = Path(file_path)
+        if short_name_from == "stem":
+            return [
+                str(
+                    file_path.with_name(
+                        get_variant_stem(file_path.stem, tag, factor) + file_path.suffix
+                    )
+                )
+                for tag, factor in self.variants
+            ]
+        voice_dir = file_path.parent
+        return [
+            str(voice_dir.with_name(get_variant_stem(voice_dir.name, tag, factor)) / file_path.name)
+            for tag, factor in self.variants
+        ]
+
+    def expand(self, file_paths, results, short_name_from="stem"):
+        """
+        Function to flatten per-source results into one row per variant.
+
+        :param (list) file_paths: paths to the source audio files
+        :param (list) results: stacked features per source file, None for failed files
+        :param (str) short_name_from: see get_variant_paths (default: 'stem')
+        :return: (variant paths, a list with one feature vector per variant, None for failed files)
+        """
+        variant_paths, features = [], []
+        for file_path, result in zip(file_paths, results):
+            variant_paths += self.get_variant_paths(file_path, short_name_from)
+            features += list(result) if result is not None else [None] * len(self.variants)
+        return variant_paths, features
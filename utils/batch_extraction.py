@@ -0,0 +1,128 @@
+"""
+Process-pool driver shared by the FeatureProcessing extractors. Each extractor plugs in a
+per-file function and gets back its results in the same order as the input file list.
+"""
+
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from tqdm.auto import tqdm
+
+from utils import profiling
+
+
+def _safe_call(process_fn, item):
+    """
+    Function to run @process_fn on a single item without letting an exception escape the worker.
+
+    :param (callable) process_fn: per-item function
+    :param item: the item (usually an audio file path) to process
+    :return: (result OR None, formatted error OR None)
+    """
+    try:
+        return process_fn(item), None
+    except Exception as e:
+        return None, f"{repr(e)}\n{traceback.format_exc()}"
+
+
+def _profiled_safe_call(profile_config, process_fn, item):
+    # Worker side of a profiled run: the profile of every item is sent back with its result
+    (result, error), state = profiling.collect(profile_config, _safe_call, process_fn, item)
+    return result, error, state
+
+
+def get_chunksize(num_items, num_workers, chunks_per_worker=4):
+    """
+    Function to pick how many items are sent to a worker at once. A few chunks per worker keeps
+    the pickling overhead low while still balancing files of different lengths.
+
+    :param (int) num_items: total number of items
+    :param (int) num_workers: number of worker processes
+    :param (int) chunks_per_worker: number of chunks each worker should receive (default: 4)
+    :return: chunk size
+    """
+    return max(1, num_items // (num_workers * chunks_per_worker))
+
+
+def run_batch(
+    process_fn,
+    items,
+    num_workers=None,
+    chunksize=None,
+    initializer=None,
+    initargs=(),
+    desc=None,
+):
+    """
+    Function to apply @process_fn to every item using a pool of worker processes.
+
+    NOTE: @process_fn, @initializer and the items must be picklable, i.e. functions have to be
+    defined at module level and the calling script has to be guarded by
+    `if __name__ == "__main__":`.
+
+    :param (callable) process_fn: per-item function, e.g. feature extraction for one audio file
+    :param (list) items: items to process
+    :param (int) num_workers: number of worker processes; <= 1 runs everything in the current
+           process (default: os.cpu_count())
+    :param (int) chunksize: number of items sent to a worker at once (default: see get_chunksize)
+    :param (callable) initializer: function called once in every worker before processing, e.g.
+           to load a model (default: None)
+    :param (tuple) initargs: arguments for @initializer (default: ())
+    :param (str) desc: progress bar description (default: None)
+    :return: (a list of results in the same order as @items with None for failed items,
+             a dictionary of {item: error message} for failed items)
+    """
+    items = list(items)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = min(num_workers, max(1, len(items)))
+
+    safe_fn = partial(_safe_call, process_fn)
+
+    if num_workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        outputs = [safe_fn(item) for item in tqdm(items, desc=desc)]
+    else:
+        if chunksize is None:
+            chunksize = get_chunksize(len(items), num_workers)
+        profile_config = profiling.get_worker_config()
+        if profile_config is not None:
+            safe_fn = partial(_profiled_safe_call, profile_config, process_fn)
+        with ProcessPoolExecutor(
+            max_workers=num_workers, initializer=initializer, initargs=initargs
+        ) as executor:
+            # executor.map yields results in submission order, so the output is deterministic
+            outputs = list(
+                tqdm(
+                    executor.map(safe_fn, items, chunksize=chunksize),
+                    total=len(items),
+                    desc=desc,
+                )
+            )
+
+    results = []
+    errors = dict()
+    for item, (result, error, *state) in zip(items, outputs):
+        if state:
+            profiling.merge(state[0])
+        results.append(result)
+        if error is not None:
+            errors[item] = error
+
+    return results, errors
+
+
+def report_errors(errors):
+    """
+    Function to print a short summary of the items that failed in run_batch.
+
+    :param (dict) errors: a dictionary of {item: error message}
+    """
+    if not errors:
+        return
+    print(f"{len(errors)} item(s) failed:")
+    for item, error in errors.items():
+        print(f"  {item}: {error.splitlines()[0]}")
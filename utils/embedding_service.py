@@ -0,0 +1,190 @@
+"""
+Speaker-embedding service around a pretrained pyannote.audio model. The model is loaded once, the
+device is picked automatically, and files are grouped into length buckets for batched inference.
+"""
+
+import time
+
+import numpy as np
+import torch
+import torchaudio
+from pyannote.audio import Model
+from pyannote.audio.core.io import Audio
+
+from utils.mel_engine import get_default_device
+from utils.profiling import timer
+
+
+class EmbeddingService:
+    """
+    Batched speaker-embedding inference for whole files, meant to match
+    `Inference(model, window="whole")` applied to every file separately (check with
+    Benchmarks.embedding_validation).
+
+    Files of similar length are put in the same batch. The filterbank features of every waveform
+    are computed on the unpadded waveform, so their mean normalization is that of the file alone,
+    and only the features are zero-padded to the longest file. The padding is excluded from the
+    statistics pooling through frame weights, so the remaining difference to per-file inference
+    only comes from the convolutions over the last frames of the shorter files (a cosine distance
+    below 5e-4 for up to 25% padding, see Benchmarks.embedding_validation); @max_length_ratio
+    bounds how much padding a batch may contain. Models without separate features (anything but
+    WeSpeaker) only batch files of identical length.
+    """
+
+    def __init__(
+        self,
+        model_name="pyannote/wespeaker-voxceleb-resnet34-LM",
+        device=None,
+        batch_size=16,
+        max_length_ratio=1.1,
+        num_threads=None,
+        quantize=False,
+        use_auth_token=None,
+    ):
+        """
+        :param (str or Model) model_name: pretrained model name, checkpoint path or an already
+               constructed model (default: 'pyannote/wespeaker-voxceleb-resnet34-LM')
+        :param (torch.device) device: inference device (default: CUDA if available, CPU otherwise)
+        :param (int) batch_size: maximum number of files per forward pass (default: 16)
+        :param (float) max_length_ratio: maximum ratio between the longest and the shortest file
+               in a batch; 1.0 only batches files of identical length (default: 1.1)
+        :param (int) num_threads: number of CPU threads used by torch (default: torch default)
+        :param (bool) quantize: apply int8 dynamic quantization to the linear layers, CPU only
+               (default: False)
+        :param (str) use_auth_token: Hugging Face token for gated models (default: None)
+        """
+        self.device = device if device is not None else get_default_device()
+        self.batch_size = batch_size
+        self.max_length_ratio = max_length_ratio
+
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
+        if isinstance(model_name, Model):
+            model = model_name
+        else:
+            model = Model.from_pretrained(model_name, use_auth_token=use_auth_token)
+        model.eval()
+
+        if quantize:
+            if self.device.type != "cpu":
+                raise ValueError("Dynamic quantization is only supported on CPU!")
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        self.model = model.to(self.device)
+        self.audio = Audio(sample_rate=model.audio.sample_rate, mono="downmix")
+        # WeSpeaker models compute their features separately from the network
+        self.has_features = (
+            hasattr(model, "compute_fbank")
+            and hasattr(model, "resnet")
+            and hasattr(model.resnet, "num_frames")
+        )
+        if not self.has_features:
+            self.max_length_ratio = 1.0
+
+        self.num_embeddings = 0
+        self.inference_time = 0.0
+
+    def make_buckets(self, lengths):
+        """
+        Function to group waveform indices into batches of similar lengths.
+
+        :param (list) lengths: number of samples of every waveform
+        :return: a list of index lists
+        """
+        buckets = []
+        for i in np.argsort(lengths, kind="stable"):
+            if (
+                buckets
+                and len(buckets[-1]) < self.batch_size
+                and lengths[i] <= lengths[buckets[-1][0]] * self.max_length_ratio
+            ):
+                buckets[-1].append(i)
+            else:
+                buckets.append([i])
+        return buckets
+
+    @torch.inference_mode()
+    def _forward(self, waveforms):
+        if not self.has_features:
+            # Identical lengths (see max_length_ratio), nothing to pad
+            batch = torch.stack(waveforms).to(self.device)
+            return self.model(batch).cpu().numpy()
+
+        # Features of every unpadded waveform, mean-normalized over that waveform only
+        features = [
+            self.model.compute_fbank(waveform.unsqueeze(0).to(self.device))[0]
+            for waveform in waveforms
+        ]
+        num_frames = [len(feature) for feature in features]
+        max_frames = max(num_frames)
+
+        batch = features[0].new_zeros((len(features), max_frames, features[0].shape[-1]))
+        for i, feature in enumerate(features):
+            batch[i, : num_frames[i]] = feature
+
+        if min(num_frames) == max_frames:
+            weights = None
+        else:
+            # Weights at the resolution of the pooled ResNet frames (8x fewer than the features):
+            # the pooling would otherwise resample them with nearest neighbours, and include or
+            # drop a whole pooled frame of every shorter file
+            pooled_frames = [self.model.resnet.num_frames(frames) for frames in num_frames]
+            weights = batch.new_zeros((len(features), max(pooled_frames)))
+            for i, frames in enumerate(pooled_frames):
+                weights[i, :frames] = 1.0
+
+        # Same as the model's forward pass, which returns the second output of the ResNet
+        return self.model.resnet(batch, weights=weights)[1].cpu().numpy()
+
+    def embed_waveforms(self, waveforms):
+        """
+        Function to compute the embeddings of a list of waveforms.
+
+        :param (list) waveforms: waveforms (torch.Tensor) of shape (1, num_samples) at the model
+               sample rate
+        :return: embeddings (np.array) of shape (num_waveforms, embedding_dim) in input order
+        """
+        start_time = time.perf_counter()
+
+        embeddings = [None] * len(waveforms)
+        for bucket in self.make_buckets([waveform.shape[-1] for waveform in waveforms]):
+            with timer("embedding.inference"):
+                batch_embeddings = self._forward([waveforms[i] for i in bucket])
+            for i, embedding in zip(bucket, batch_embeddings):
+                embeddings[i] = embedding
+
+        self.inference_time += time.perf_counter() - start_time
+        self.num_embeddings += len(waveforms)
+
+        return np.stack(embeddings)
+
+    def embed_samples(self, items):
+        """
+        Function to compute the embeddings of decoded mono signals, e.g. augmented variants
+        generated in memory (see utils.augmented_loader).
+
+        :param (list) items: (float32 samples (np.array) of shape (num_samples,), sample rate)
+        :return: a list with one embedding (np.array) per signal
+        """
+        waveforms = []
+        for samples, sample_rate in items:
+            waveform = torch.from_numpy(samples).unsqueeze(0)
+            if sample_rate != self.audio.sample_rate:
+                # Same resampling as Audio applies to files
+                waveform = torchaudio.functional.resample(
+                    waveform, sample_rate, self.audio.sample_rate
+                )
+            waveforms.append(waveform)
+        return list(self.embed_waveforms(waveforms)) if waveforms else []
+
+    @property
+    def embeddings_per_second(self):
+        """
+        :return: number of embeddings computed per second of inference time
+        """
+        if self.inference_time == 0.0:
+            return 0.0
+        return self.num_embeddings / self.inference_time
@@ -0,0 +1,118 @@
+"""
+Normalized Shannon entropy of feature tracks. Symbol counts come from a single np.unique (or
+np.histogram) pass instead of counting every distinct value separately, and continuous tracks can
+be quantized first so that near-identical float values fall into the same symbol.
+"""
+
+import numpy as np
+
+
+def quantize(signal, decimals=None, num_bins=None):
+    """
+    Function to map the values of a signal to discrete symbols.
+
+    :param (list or np.array) signal: values of the signal
+    :param (int) decimals: round values to this number of decimals (default: None, no rounding)
+    :param (int) num_bins: assign values to this many equal-width bins between the minimum and the
+           maximum of the signal; takes precedence over @decimals (default: None, no binning)
+    :return: a np.array of symbols with the same length as @signal
+    """
+    signal = np.asarray(signal)
+
+    if num_bins is not None:
+        if num_bins < 1:
+            raise ValueError("Argument for @num_bins must be a positive integer!")
+        edges = np.histogram_bin_edges(signal, bins=num_bins)
+        # Interior edges only, so the maximum falls into the last bin like in np.histogram
+        return np.searchsorted(edges[1:-1], signal, side="right")
+
+    if decimals is not None:
+        return np.round(signal, decimals)
+
+    return signal
+
+
+def get_symbol_counts(signal, decimals=None, num_bins=None):
+    """
+    Function to count the occurrences of every distinct symbol of a (quantized) signal.
+
+    :param (list or np.array) signal: values of the signal
+    :param (int) decimals: see quantize (default: None)
+    :param (int) num_bins: see quantize (default: None)
+    :return: a np.array with the count of every distinct symbol
+    """
+    symbols = quantize(signal, decimals=decimals, num_bins=num_bins)
+    if num_bins is not None:
+        counts = np.bincount(symbols, minlength=num_bins)
+        return counts[counts > 0]
+    return np.unique(symbols, return_counts=True)[1]
+
+
+def calculate_entropy(signal, decimals=None, num_bins=None):
+    """
+    Function to calculate entropy of a signal, normalized by the maximum entropy log2(k) of its
+    k distinct symbols so that the result lies in [0, 1].
+
+    NOTE: A signal made of a single distinct symbol carries no information and has entropy 0.
+    An empty signal (or None) has no defined entropy, NaN is returned.
+
+    :param (list or np.array) signal: a list of values representing the signal
+    :param (int) decimals: see quantize (default: None, exact values are the symbols)
+    :param (int) num_bins: see quantize (default: None, exact values are the symbols)
+    :return: entropy of the signal
+    """
+    if signal is None or len(signal) == 0:
+        return float("nan")
+
+    counts = get_symbol_counts(signal, decimals=decimals, num_bins=num_bins)
+    if len(counts) == 1:
+        return 0.0
+
+    probabilities = counts / counts.sum()
+    entropy = -np.sum(probabilities * np.log2(probabilities)) / np.log2(len(counts))
+    return float(entropy)
+
+
+def calculate_entropy_rows(signals, lengths=None):
+    """
+    Function to calculate the entropy of every row of a matrix at once, with the same result as
+    calculate_entropy of each row. Symbols are counted from the runs of equal values in the sorted
+    rows.
+
+    :param (np.array) signals: a matrix with shape (num_signals, num_values), without NaN values
+           in the first @lengths values of every row
+    :param (np.array) lengths: number of values of every signal, the rest of a row is padding
+           (default: None, all rows are complete)
+    :return: an array (np.array) with the entropy of every signal, NaN for empty signals
+    """
+    signals = np.asarray(signals, dtype=np.float64)
+    num_signals, num_values = signals.shape
+    if lengths is None:
+        lengths = np.full(num_signals, num_values)
+    lengths = np.asarray(lengths, dtype=np.int64)
+
+    # Padding is sorted to the end of every row and excluded below
+    in_signal = np.arange(num_values)[None, :] < lengths[:, None]
+    sorted_signals = np.sort(np.where(in_signal, signals, np.inf), axis=1)
+
+    is_start = in_signal.copy()
+    is_start[:, 1:] &= sorted_signals[:, 1:] != sorted_signals[:, :-1]
+    starts = np.flatnonzero(is_start)
+    rows = starts // max(num_values, 1)
+
+    # A run ends where the next one starts, or at the end of its signal
+    ends = np.empty_like(starts)
+    ends[:-1] = starts[1:]
+    last_in_row = np.ones(len(starts), dtype=bool)
+    last_in_row[:-1] = rows[1:] != rows[:-1]
+    ends[last_in_row] = rows[last_in_row] * num_values + lengths[rows[last_in_row]]
+
+    probabilities = (ends - starts) / lengths[rows]
+    num_symbols = np.bincount(rows, minlength=num_signals)
+    information = np.bincount(
+        rows, weights=-probabilities * np.log2(probabilities), minlength=num_signals
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = np.where(num_symbols > 1, information / np.log2(num_symbols), 0.0)
+    return np.where(lengths > 0, entropy, np.nan)
@@ -0,0 +1,207 @@
+"""
+Content-addressed on-disk cache for per-file features. Entries are keyed by the audio file content
+hash together with the extractor name, its parameters and the library version, so re-running an
+extractor only pays for new or changed files.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from utils.profiling import count
+
+
+def hash_file(file_path, block_size=1 << 20):
+    """
+    Function to calculate the SHA-256 hash of a file's content.
+
+    :param (str) file_path: path to the file
+    :param (int) block_size: number of bytes read at once (default: 1 MiB)
+    :return: hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    Persistent cache of feature vectors stored as uncompressed .npz files under @cache_dir.
+
+    The least recently used entries are evicted once the cache grows beyond @max_bytes. Access
+    times are tracked through the file modification time, so several worker processes can share
+    the same cache directory without a separate index.
+    """
+
+    def __init__(self, cache_dir="./outputs/feature_cache", max_bytes=2 << 30):
+        """
+        :param (str) cache_dir: directory where cache entries are stored
+                (default: './outputs/feature_cache')
+        :param (int) max_bytes: maximum total size of the cache in bytes; None disables eviction
+               (default: 2 GiB)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(file_hash, extractor, params=None, version=""):
+        """
+        Function to build a cache key from the file hash and the extractor configuration.
+
+        :param (str) file_hash: content hash of the audio file (see hash_file)
+        :param (str) extractor: name of the extractor, e.g. 'mel'
+        :param (dict) params: JSON-serializable extractor parameters (default: None)
+        :param (str) version: version of the library computing the features (default: '')
+        :return: hex digest identifying the entry
+        """
+        config = json.dumps(
+            {"extractor": extractor, "params": params or {}, "version": str(version)},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(f"{file_hash}:{config}".encode()).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.npz"
+
+    def get(self, key):
+        """
+        Function to load a cache entry.
+
+        :param (str) key: cache key (see make_key)
+        :return: the stored array, tuple of arrays, or None on a cache miss
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if "value" in data.files:
+                    value = data["value"]
+                else:
+                    value = tuple(data[f"value_{i}"] for i in range(len(data.files)))
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+
+        # Mark the entry as recently used
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        """
+        Function to store an array (or a tuple of arrays) under @key. The entry is written to a
+        temporary file first and renamed, so concurrent readers never see partial entries.
+
+        :param (str) key: cache key (see make_key)
+        :param (np.array or tuple) value: value to store
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if isinstance(value, tuple):
+            arrays = {f"value_{i}": np.asarray(v) for i, v in enumerate(value)}
+        else:
+            arrays = {"value": np.asarray(value)}
+
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def size(self):
+        """
+        :return: total size of the cache entries in bytes
+        """
+        return sum(path.stat().st_size for path in self.cache_dir.glob("*/*.npz"))
+
+    def evict(self, max_bytes=None):
+        """
+        Function to delete least recently used entries until the cache fits in @max_bytes.
+
+        :param (int) max_bytes: size limit in bytes (default: self.max_bytes)
+        :return: number of evicted entries
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return 0
+
+        entries = []
+        for path in self.cache_dir.glob("*/*.npz"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        num_evicted = 0
+        for _, size, path in sorted(entries):
+            if total_size <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+            num_evicted += 1
+
+        return num_evicted
+
+
+class CachedExtractor:
+    """
+    Picklable wrapper around a per-file extraction function that looks results up in a
+    FeatureCache first, so it can be passed straight to utils.batch_extraction.run_batch.
+    """
+
+    def __init__(self, extract_fn, cache, extractor, params=None, version="", batched=False):
+        """
+        :param (callable) extract_fn: per-file function returning an array or a tuple of arrays
+        :param (FeatureCache) cache: cache to read from and write to
+        :param (str) extractor: name of the extractor, e.g. 'mel'
+        :param (dict) params: parameters that change the output of @extract_fn (default: None)
+        :param (str) version: version of the library computing the features (default: '')
+        :param (bool) batched: whether @extract_fn takes a list of files and returns a list of
+               results (None for failed files); the wrapper then also takes a list of files and
+               only passes the cache misses on to @extract_fn (default: False)
+        """
+        self.extract_fn = extract_fn
+        self.cache = cache
+        self.extractor = extractor
+        self.params = params
+        self.version = version
+        self.batched = batched
+
+    def _key(self, file_path):
+        return self.cache.make_key(hash_file(file_path), self.extractor, self.params, self.version)
+
+    def __call__(self, file_path):
+        if self.batched:
+            return self._call_batch(file_path)
+
+        key = self._key(file_path)
+        value = self.cache.get(key)
+        count("cache.miss" if value is None else "cache.hit")
+        if value is None:
+            value = self.extract_fn(file_path)
+            self.cache.put(key, value)
+        return value
+
+    def _call_batch(self, file_paths):
+        keys = [self._key(file_path) for file_path in file_paths]
+        values = [self.cache.get(key) for key in keys]
+
+        misses = [i for i, value in enumerate(values) if value is None]
+        count("cache.miss", len(misses))
+        count("cache.hit", len(values) - len(misses))
+        if misses:
+            extracted = self.extract_fn([file_paths[i] for i in misses])
+            for i, value in zip(misses, extracted):
+                if value is not None:
+                    self.cache.put(keys[i], value)
+                values[i] = value
+
+        return values
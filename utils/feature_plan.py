@@ -0,0 +1,384 @@
+"""
+Declarative Praat feature extraction: a FeaturePlan resolves the dependencies of the requested
+features once (e.g. delta_delta_mfcc needs delta_mfcc, which needs mfcc), fixes the column layout
+of the output, and fills one row of a preallocated float matrix per file, so corpus-wide
+extraction builds no per-file dictionaries or DataFrames and the column order is always the same.
+
+Example:
+    options = {"formant": {"window_length": 0.04}}
+    plan = FeaturePlan(["intensity", "pitch", "formant"], options=options)
+    matrix, errors = plan.extract_corpus(paths)
+    df = plan.to_frame(matrix)
+"""
+
+import inspect
+import traceback
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import parselmouth
+from tqdm.auto import tqdm
+
+from utils.praat_feature_extraction import (
+    get_analyzer,
+    get_delta,
+    get_energy,
+    get_formant_attributes,
+    get_glottal_to_noise_ratio_attributes,
+    get_harmonics_to_noise_ratio_attributes,
+    get_intensity_attributes,
+    get_lfcc,
+    get_local_jitter,
+    get_local_shimmer,
+    get_mfcc,
+    get_pitch_attributes,
+    get_spectrum_attributes,
+    get_speaking_rate,
+    get_track_attribute_names,
+    get_voiced_unvoiced_segments,
+)
+
+# @requires: features whose outputs are passed to @compute, in this order
+# @columns: column names, or a function of the plan options returning them
+# @compute: function (analyzer, inputs, text, **options) -> (attributes, output), where the
+#           attributes fill the columns and the output is passed on to dependent features
+FeatureSpec = namedtuple("FeatureSpec", ["requires", "columns", "compute"])
+
+
+def _get_option(options, feature, name, function):
+    """
+    :return: option @name of @feature in the plan @options, or the default of that parameter
+             of the feature @function
+    """
+    feature_options = options.get(feature, dict())
+    if name in feature_options:
+        return feature_options[name]
+    return inspect.signature(function).parameters[name].default
+
+
+def _get_matrix_columns(name, num_coefficients):
+    return [
+        f"{statistic}_{name}_{coefficient_no}"
+        for statistic in ("mean", "stddev")
+        for coefficient_no in range(1, num_coefficients + 1)
+    ]
+
+
+def _get_matrix_attributes(name, matrix):
+    """
+    :return: (the mean and standard deviation of every coefficient of @matrix over the frames in
+              which it is defined, named as in _get_matrix_columns, @matrix)
+    """
+    num_coefficients = matrix.shape[1]
+    values = np.concatenate((np.nanmean(matrix, axis=0), np.nanstd(matrix, axis=0)))
+    return dict(zip(_get_matrix_columns(name, num_coefficients), values.tolist())), matrix
+
+
+def _compute_attributes(function, analyzer, inputs, text, **options):
+    # Features whose function returns (attributes, values)
+    return function(analyzer, **options)[0], None
+
+
+def _compute_scalar(name, function, analyzer, inputs, text, **options):
+    # Features whose function returns a single value
+    return {name: function(analyzer, **options)}, None
+
+
+def _get_intensity_columns(options):
+    percentiles = _get_option(options, "intensity", "percentiles", get_intensity_attributes)
+    return get_track_attribute_names("intensity", percentiles)
+
+
+def _get_pitch_columns(options):
+    percentiles = _get_option(options, "pitch", "percentiles", get_pitch_attributes)
+    return (
+        ["voiced_fraction"]
+        + get_track_attribute_names("pitch", percentiles)
+        + ["mean_absolute_pitch_slope", "pitch_slope_without_octave_jumps"]
+    )
+
+
+def _get_hnr_columns(options):
+    percentiles = _get_option(
+        options, "hnr", "percentiles", get_harmonics_to_noise_ratio_attributes
+    )
+    return get_track_attribute_names("hnr", percentiles)
+
+
+def _get_lfcc_columns(options):
+    return _get_matrix_columns("lfcc", _get_option(options, "lfcc", "num_coefficients", get_lfcc))
+
+
+def _get_mfcc_columns(options):
+    return _get_matrix_columns("mfcc", _get_option(options, "mfcc", "num_coefficients", get_mfcc))
+
+
+def _get_delta_mfcc_columns(options):
+    num_coefficients = _get_option(options, "mfcc", "num_coefficients", get_mfcc)
+    return _get_matrix_columns("delta_mfcc", num_coefficients)
+
+
+def _get_delta_delta_mfcc_columns(options):
+    num_coefficients = _get_option(options, "mfcc", "num_coefficients", get_mfcc)
+    return _get_matrix_columns("delta_delta_mfcc", num_coefficients)
+
+
+def _compute_lfcc(analyzer, inputs, text, **options):
+    return _get_matrix_attributes("lfcc", get_lfcc(analyzer, **options))
+
+
+def _compute_mfcc(analyzer, inputs, text, **options):
+    return _get_matrix_attributes("mfcc", get_mfcc(analyzer, **options))
+
+
+def _compute_delta_mfcc(analyzer, inputs, text, **options):
+    return _get_matrix_attributes("delta_mfcc", get_delta(inputs[0], **options))
+
+
+def _compute_delta_delta_mfcc(analyzer, inputs, text, **options):
+    return _get_matrix_attributes("delta_delta_mfcc", get_delta(inputs[0], **options))
+
+
+def _compute_speaking_rate(analyzer, inputs, text, **options):
+    return {"speaking_rate": get_speaking_rate(analyzer, text)}, None
+
+
+# Every feature a plan can extract, by the names praat_feats_extract used
+FEATURES = {
+    "intensity": FeatureSpec(
+        (), _get_intensity_columns, partial(_compute_attributes, get_intensity_attributes)
+    ),
+    "pitch": FeatureSpec(
+        (), _get_pitch_columns, partial(_compute_attributes, get_pitch_attributes)
+    ),
+    "hnr": FeatureSpec(
+        (), _get_hnr_columns, partial(_compute_attributes, get_harmonics_to_noise_ratio_attributes)
+    ),
+    "gne": FeatureSpec(
+        (),
+        [
+            f"{statistic}_gne"
+            for statistic in ("min", "max", "mean", "stddev", "q1", "median", "q3", "sum")
+        ],
+        partial(_compute_attributes, get_glottal_to_noise_ratio_attributes),
+    ),
+    "local_jitter": FeatureSpec(
+        (), ["local_jitter"], partial(_compute_scalar, "local_jitter", get_local_jitter)
+    ),
+    "local_shimmer": FeatureSpec(
+        (), ["local_shimmer"], partial(_compute_scalar, "local_shimmer", get_local_shimmer)
+    ),
+    "spectrum": FeatureSpec(
+        (),
+        [
+            "band_energy",
+            "band_density",
+            "band_energy_difference",
+            "band_density_difference",
+            "center_of_gravity_spectrum",
+            "stddev_spectrum",
+            "skewness_spectrum",
+            "kurtosis_spectrum",
+            "central_moment_spectrum",
+        ],
+        partial(_compute_attributes, get_spectrum_attributes),
+    ),
+    "formant": FeatureSpec(
+        (),
+        [
+            f"f{formant_no}_{statistic}"
+            for statistic in ("mean", "median", "max", "min", "entropy")
+            for formant_no in range(1, 5)
+        ]
+        + [
+            "formant_dispersion",
+            "average_formant",
+            "mff",
+            "fitch_vtl",
+            "delta_f",
+            "vtl_delta_f",
+        ],
+        partial(_compute_attributes, get_formant_attributes),
+    ),
+    "lfcc": FeatureSpec((), _get_lfcc_columns, _compute_lfcc),
+    "mfcc": FeatureSpec((), _get_mfcc_columns, _compute_mfcc),
+    "delta_mfcc": FeatureSpec(("mfcc",), _get_delta_mfcc_columns, _compute_delta_mfcc),
+    "delta_delta_mfcc": FeatureSpec(
+        ("delta_mfcc",), _get_delta_delta_mfcc_columns, _compute_delta_delta_mfcc
+    ),
+    "speaking_rate": FeatureSpec((), ["speaking_rate"], _compute_speaking_rate),
+    # The lists of interval lengths are not columns
+    "voiced_unvoiced": FeatureSpec(
+        (),
+        [
+            "voice_length_mean",
+            "voice_length_std",
+            "unvoice_length_mean",
+            "unvoice_length_std",
+            "voice_length_min",
+            "voice_length_max",
+            "unvoice_length_min",
+            "unvoice_length_max",
+            "voice_length_entropy",
+            "unvoice_length_entropy",
+            "speech_ratio",
+        ],
+        partial(_compute_attributes, get_voiced_unvoiced_segments),
+    ),
+    "energy": FeatureSpec(
+        (),
+        [f"{statistic}_energy" for statistic in ("min", "max", "mean", "stddev", "entropy")],
+        partial(_compute_attributes, get_energy),
+    ),
+}
+
+
+class FeaturePlan:
+    """
+    A fixed extraction plan for a list of features. Dependencies are computed once per file and
+    shared (their columns are only part of the output if they are requested too), and every file
+    fills a row of @num_columns floats in the order of @columns. Attributes a feature does not
+    return for a file (e.g. formants of a sound without pulses) are left NaN.
+
+    NOTE: Matrix features (lfcc, mfcc, delta_mfcc, delta_delta_mfcc) have one value per frame, so
+    their columns are the mean and standard deviation of every coefficient over the frames.
+    """
+
+    def __init__(self, features, options=None):
+        """
+        :param (list) features: names of the requested features, see FEATURES
+        :param (dict) options: keyword arguments of the feature functions by feature name, e.g.
+               {'formant': {'window_length': 0.04}}; the deltas take those of get_delta
+               (default: None, the defaults of every function)
+        """
+        unknown = [name for name in list(features) + list(options or ()) if name not in FEATURES]
+        if unknown:
+            raise ValueError(f"Argument for @features is not recognized: {', '.join(unknown)}!")
+
+        self.features = list(dict.fromkeys(features))
+        self.options = dict(options or ())
+        self.steps = self._resolve(self.features)
+
+        # Column layout: (feature, first column, column names) of every requested feature
+        self.columns = []
+        self.layout = []
+        for name in self.steps:
+            if name not in self.features:
+                continue
+            columns = FEATURES[name].columns
+            if callable(columns):
+                columns = columns(self.options)
+            self.layout.append((name, len(self.columns), list(columns)))
+            self.columns.extend(columns)
+
+    @staticmethod
+    def _resolve(features):
+        """
+        :return: the requested features and all their dependencies, every feature after the
+                 features it requires
+        """
+        steps, visiting = [], set()
+
+        def visit(name):
+            if name in steps:
+                return
+            if name in visiting:
+                raise ValueError(f"Feature '{name}' depends on itself!")
+            visiting.add(name)
+            for required in FEATURES[name].requires:
+                visit(required)
+            visiting.discard(name)
+            steps.append(name)
+
+        for name in features:
+            visit(name)
+        return steps
+
+    @property
+    def num_columns(self):
+        return len(self.columns)
+
+    def get_columns(self, feature):
+        """
+        :param (str) feature: a requested feature
+        :return: a slice with the columns of @feature
+        """
+        for name, start, columns in self.layout:
+            if name == feature:
+                return slice(start, start + len(columns))
+        raise ValueError("Argument for @feature is not recognized!")
+
+    def allocate(self, num_files):
+        """
+        :param (int) num_files: number of rows
+        :return: a float matrix (np.array) of NaN with shape (num_files, num_columns)
+        """
+        return np.full((num_files, self.num_columns), np.nan, dtype=np.float64)
+
+    def extract(self, sound, text="", out=None):
+        """
+        Function to extract the features of one sound into a row.
+
+        :param (str, parselmouth.Sound or PraatAnalyzer) sound: path of an audio file, sound
+               waveform or its analyzer
+        :param (str) text: text associated with the sound wave, for speaking_rate (default: '')
+        :param (np.array) out: row of @num_columns floats to fill, e.g. a row of a matrix from
+               allocate (default: None, a new row)
+        :return: the row (np.array)
+        """
+        if isinstance(sound, str):
+            sound = parselmouth.Sound(sound)
+        # All features share the intermediate Praat objects (pitch, pulses, silences, ...)
+        analyzer = get_analyzer(sound)
+
+        row = np.full(self.num_columns, np.nan) if out is None else out
+        columns = {name: (start, names) for name, start, names in self.layout}
+        outputs = dict()
+        for name in self.steps:
+            spec = FEATURES[name]
+            attributes, outputs[name] = spec.compute(
+                analyzer,
+                [outputs[required] for required in spec.requires],
+                text,
+                **self.options.get(name, dict()),
+            )
+            if name in columns:
+                start, names = columns[name]
+                row[start : start + len(names)] = [
+                    attributes.get(column, np.nan) for column in names
+                ]
+        return row
+
+    def extract_corpus(self, sounds, texts=None, desc=None):
+        """
+        Function to extract the features of many sounds into one matrix. Files that fail keep a
+        row of NaN; their errors can be printed with utils.batch_extraction.report_errors.
+
+        :param (list) sounds: paths of audio files (or sounds, see extract)
+        :param (list) texts: texts associated with the sounds, for speaking_rate (default: None)
+        :param (str) desc: description of the progress bar (default: None)
+        :return: (a matrix (np.array) with shape (len(sounds), num_columns), a dictionary of
+                  {index: error message})
+        """
+        matrix = self.allocate(len(sounds))
+        texts = [""] * len(sounds) if texts is None else texts
+        errors = dict()
+        for index, (sound, text) in enumerate(
+            tqdm(zip(sounds, texts), total=len(sounds), desc=desc, disable=desc is None)
+        ):
+            try:
+                self.extract(sound, text, out=matrix[index])
+            except Exception as e:
+                matrix[index] = np.nan
+                errors[index] = f"{repr(e)}\n{traceback.format_exc()}"
+        return matrix, errors
+
+    def to_frame(self, matrix, index=None):
+        """
+        :param (np.array) matrix: matrix from extract_corpus, or a single row from extract
+        :param index: index of the DataFrame (default: None)
+        :return: a pd.DataFrame with the columns of the plan
+        """
+        return pd.DataFrame(np.atleast_2d(matrix), columns=self.columns, index=index)
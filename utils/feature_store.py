@@ -0,0 +1,148 @@
+"""
+Columnar feature store for the extracted feature tables. Tables are written as Parquet (optionally
+partitioned) or Arrow IPC files with float32 feature columns and categorical metadata columns, and
+can be read back with column projection and memory mapping.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+ARROW_SUFFIXES = [".arrow", ".feather", ".ipc"]
+
+
+def _is_arrow_path(path):
+    return Path(path).suffix in ARROW_SUFFIXES
+
+
+def compact_feature_table(df, metadata_columns=None):
+    """
+    Function to shrink a feature table before writing: float columns are cast to float32 and
+    metadata (string) columns are stored as categoricals.
+
+    :param (pd.DataFrame) df: feature table
+    :param (list) metadata_columns: columns to store as categoricals (default: all string columns)
+    :return: a new compacted pd.DataFrame
+    """
+    if metadata_columns is None:
+        metadata_columns = [
+            col
+            for col in df.columns
+            if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])
+        ]
+
+    dtypes = dict()
+    for col in df.columns:
+        if col in metadata_columns:
+            dtypes[col] = "category"
+        elif pd.api.types.is_float_dtype(df[col]):
+            dtypes[col] = np.float32
+
+    return df.astype(dtypes)
+
+
+def write_feature_table(
+    df,
+    path,
+    metadata_columns=None,
+    partition_cols=None,
+    row_group_size=1024,
+    compression="zstd",
+):
+    """
+    Function to write a feature table to a Parquet file/dataset or an Arrow IPC file.
+
+    :param (pd.DataFrame) df: feature table
+    :param (str) path: output path; '.arrow', '.feather' or '.ipc' writes Arrow IPC, anything
+           else Parquet
+    :param (list) metadata_columns: columns to store as categoricals (default: all string columns)
+    :param (list) partition_cols: columns used to partition a Parquet dataset into directories,
+           e.g. ['locale'] (default: None, single file)
+    :param (int) row_group_size: number of rows per Parquet row group (default: 1024)
+    :param (str) compression: compression codec (default: 'zstd')
+    :return: the output path
+    """
+    df = compact_feature_table(df, metadata_columns)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Partition columns are moved to the end when a dataset is read back, so keep the original
+    # column order in the schema metadata to restore it in read_feature_table
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[b"feature_store.columns"] = json.dumps([str(c) for c in df.columns]).encode()
+    table = table.replace_schema_metadata(schema_metadata)
+
+    path = Path(path)
+    if _is_arrow_path(path):
+        if partition_cols:
+            raise ValueError("Partitioning is only supported for Parquet outputs!")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Arrow IPC is written uncompressed so that it can be memory-mapped without copies
+        feather.write_feather(table, path, compression="uncompressed")
+    elif partition_cols:
+        pq.write_to_dataset(
+            table,
+            root_path=path,
+            partition_cols=partition_cols,
+            row_group_size=row_group_size,
+            compression=compression,
+            # Overwrite partitions from a previous run instead of appending duplicate rows
+            existing_data_behavior="delete_matching",
+        )
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, path, row_group_size=row_group_size, compression=compression)
+
+    return path
+
+
+def read_feature_table(path, columns=None, filters=None, memory_map=True):
+    """
+    Function to read a feature table written by write_feature_table.
+
+    :param (str) path: path to a Parquet file/dataset directory or an Arrow IPC file
+    :param (list) columns: columns to load; the rest is never read from disk (default: all)
+    :param (list) filters: Parquet row filters, e.g. [('locale', '=', 'en-US')] (default: None)
+    :param (bool) memory_map: memory-map the file(s) instead of reading them into buffers
+           (default: True)
+    :return: a pd.DataFrame
+    """
+    if _is_arrow_path(path):
+        if filters:
+            raise ValueError("Filters are only supported for Parquet inputs!")
+        table = feather.read_table(path, columns=columns, memory_map=memory_map)
+    else:
+        table = pq.read_table(path, columns=columns, filters=filters, memory_map=memory_map)
+
+    df = table.to_pandas()
+
+    stored_columns = (table.schema.metadata or {}).get(b"feature_store.columns")
+    if columns is None and stored_columns is not None:
+        order = [col for col in json.loads(stored_columns) if col in df.columns]
+        if len(order) == len(df.columns):
+            df = df[order]
+
+    return df
+
+
+def read_feature_columns(path):
+    """
+    Function to list the columns of a stored feature table without reading any data.
+
+    :param (str) path: path to a Parquet file/dataset directory or an Arrow IPC file
+    :return: a list of column names
+    """
+    if _is_arrow_path(path):
+        with pa.memory_map(str(path)) as source:
+            schema = pa.ipc.open_file(source).schema
+    else:
+        schema = pq.read_schema(path) if Path(path).is_file() else pq.ParquetDataset(path).schema
+
+    stored_columns = (schema.metadata or {}).get(b"feature_store.columns")
+    if stored_columns is not None:
+        return json.loads(stored_columns)
+    return schema.names
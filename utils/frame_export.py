@@ -0,0 +1,101 @@
+"""
+Streaming export of frame-level features. Frames are produced by a generator pipeline in
+fixed-size chunks and written to Parquet row groups one chunk at a time, so memory stays bounded
+regardless of corpus size.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm.auto import tqdm
+
+
+def iter_frame_chunks(file_paths, frame_fn, chunk_size=65536, skip_silent=True):
+    """
+    Generator of fixed-size chunks of frame-level features for a list of audio files.
+
+    :param (list) file_paths: paths to the audio files; the position in this list is the file_id
+    :param (callable) frame_fn: function returning a (num_frames, num_features) matrix for a file
+    :param (int) chunk_size: number of frames per chunk; only the last chunk may be smaller
+           (default: 65536)
+    :param (bool) skip_silent: leave out frames whose features are all zero (default: True)
+    :return: yields (file_ids, frame_indices, features) with shapes (n,), (n,), (n, num_features)
+    """
+    buffered_ids, buffered_frames, buffered_features = [], [], []
+    num_buffered = 0
+
+    for file_id, file_path in enumerate(tqdm(file_paths)):
+        try:
+            features = np.asarray(frame_fn(file_path), dtype=np.float32)
+        except Exception as e:
+            print("Error:", file_path, repr(e))
+            continue
+
+        frame_indices = np.arange(len(features), dtype=np.int32)
+        if skip_silent:
+            keep = np.any(features, axis=1)
+            features, frame_indices = features[keep], frame_indices[keep]
+
+        buffered_ids.append(np.full(len(features), file_id, dtype=np.int32))
+        buffered_frames.append(frame_indices)
+        buffered_features.append(features)
+        num_buffered += len(features)
+
+        while num_buffered >= chunk_size:
+            file_ids = np.concatenate(buffered_ids)
+            frames = np.concatenate(buffered_frames)
+            all_features = np.concatenate(buffered_features)
+
+            yield file_ids[:chunk_size], frames[:chunk_size], all_features[:chunk_size]
+
+            buffered_ids = [file_ids[chunk_size:]]
+            buffered_frames = [frames[chunk_size:]]
+            buffered_features = [all_features[chunk_size:]]
+            num_buffered -= chunk_size
+
+    if num_buffered > 0:
+        yield (
+            np.concatenate(buffered_ids),
+            np.concatenate(buffered_frames),
+            np.concatenate(buffered_features),
+        )
+
+
+def write_frame_chunks(chunks, path, feature_names, compression="zstd"):
+    """
+    Function to write frame chunks to a Parquet file, one row group per chunk.
+
+    :param (iterable) chunks: (file_ids, frame_indices, features) chunks (see iter_frame_chunks)
+    :param (str) path: output Parquet path
+    :param (list) feature_names: names of the feature columns
+    :param (str) compression: compression codec (default: 'zstd')
+    :return: number of frames written
+    """
+    schema = pa.schema(
+        [("file_id", pa.int32()), ("Frame", pa.int32())]
+        + [(name, pa.float32()) for name in feature_names]
+    )
+
+    num_frames = 0
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for file_ids, frame_indices, features in chunks:
+            columns = [pa.array(file_ids), pa.array(frame_indices)]
+            columns += [pa.array(features[:, i]) for i in range(features.shape[1])]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            num_frames += len(file_ids)
+
+    return num_frames
+
+
+def iter_frame_table(path, columns=None, batch_size=65536):
+    """
+    Generator over a frame-level Parquet file that never loads more than one batch at a time.
+
+    :param (str) path: path to a Parquet file written by write_frame_chunks
+    :param (list) columns: columns to read (default: all)
+    :param (int) batch_size: maximum number of frames per batch (default: 65536)
+    :return: yields pd.DataFrame batches
+    """
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
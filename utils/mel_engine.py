@@ -0,0 +1,200 @@
+"""
+Batched mel-spectrogram statistics on CPU or GPU. Transforms and filterbanks are built once per
+configuration and reused, and variable-length waveforms are processed together using length masks.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+import torchaudio
+
+from utils.profiling import timer
+
+
+def get_default_device():
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+class MelEngine:
+    """
+    Computes per-band mean and standard deviation of the dB mel spectrogram for batches of
+    waveforms. The results match running torchaudio's MelSpectrogram (center=True, reflect
+    padding) and AmplitudeToDB on every waveform separately.
+    """
+
+    def __init__(
+        self,
+        sample_rate=16000,
+        n_mels=128,
+        n_fft=1024,
+        hop_length=512,
+        device=None,
+    ):
+        """
+        :param (int) sample_rate: sample rate the waveforms are resampled to (default: 16000)
+        :param (int) n_mels: number of mel bands (default: 128)
+        :param (int) n_fft: FFT size (default: 1024)
+        :param (int) hop_length: number of samples between frames (default: 512)
+        :param (torch.device) device: device used for the computation (default: CUDA if
+               available, CPU otherwise)
+        """
+        self.sample_rate = sample_rate
+        self.n_mels = n_mels
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.device = device if device is not None else get_default_device()
+
+        # Padding is done per waveform in _pad_batch, so the transform itself must not center
+        self.mel_spectrogram = torchaudio.transforms.MelSpectrogram(
+            sample_rate=sample_rate,
+            n_mels=n_mels,
+            n_fft=n_fft,
+            hop_length=hop_length,
+            center=False,
+            power=2.0,
+            norm="slaney",
+            mel_scale="htk",
+            win_length=None,
+        ).to(self.device)
+        self.amplitude_to_db = torchaudio.transforms.AmplitudeToDB().to(self.device)
+        self.resamplers = dict()
+
+    def resample(self, waveform, sr):
+        """
+        Function to resample a waveform to the engine sample rate with a cached Resample
+        transform for every source sample rate.
+
+        :param (torch.Tensor) waveform: waveform of shape (num_samples,) or (channels, num_samples)
+        :param (int) sr: sample rate of @waveform
+        :return: resampled waveform on the engine device
+        """
+        waveform = waveform.to(self.device)
+        if sr == self.sample_rate:
+            return waveform
+        if sr not in self.resamplers:
+            self.resamplers[sr] = torchaudio.transforms.Resample(
+                orig_freq=sr, new_freq=self.sample_rate
+            ).to(self.device)
+        return self.resamplers[sr](waveform)
+
+    def num_frames(self, num_samples):
+        """
+        :param (int) num_samples: waveform length at the engine sample rate
+        :return: number of frames in a centered mel spectrogram of that waveform
+        """
+        return 1 + num_samples // self.hop_length
+
+    def _pad_batch(self, waveforms):
+        # Reflect-pad every waveform on its own, exactly like center=True would, then zero-pad all
+        # of them to the same length so they can be stacked
+        half_window = self.n_fft // 2
+        padded = [
+            F.pad(waveform.view(1, 1, -1), (half_window, half_window), mode="reflect").view(-1)
+            for waveform in waveforms
+        ]
+        max_length = max(len(waveform) for waveform in padded)
+        batch = torch.zeros((len(padded), max_length), device=self.device)
+        for i, waveform in enumerate(padded):
+            batch[i, : len(waveform)] = waveform
+        return batch
+
+    @torch.inference_mode()
+    def compute(self, waveforms):
+        """
+        Function to compute the dB mel spectrograms of a batch of waveforms in one pass.
+
+        :param (list) waveforms: 1-D waveforms (torch.Tensor) at the engine sample rate
+        :return: (dB mel spectrograms of shape (batch, n_mels, max_frames),
+                  frame mask of shape (batch, max_frames))
+        """
+        with timer("mel.spectrogram"):
+            batch = self._pad_batch(waveforms)
+            mel_db = self.amplitude_to_db(self.mel_spectrogram(batch))
+
+        lengths = torch.tensor(
+            [self.num_frames(len(waveform)) for waveform in waveforms], device=self.device
+        )
+        frames = torch.arange(mel_db.shape[-1], device=self.device)
+        mask = frames.unsqueeze(0) < lengths.unsqueeze(1)
+        return mel_db, mask
+
+    @staticmethod
+    def masked_stats(mel_db, mask):
+        """
+        Function to compute the per-band mean and (unbiased) standard deviation over the valid
+        frames of a batch of padded mel spectrograms.
+
+        :param (torch.Tensor) mel_db: mel spectrograms of shape (batch, n_mels, max_frames)
+        :param (torch.Tensor) mask: frame mask of shape (batch, max_frames)
+        :return: (means, stds), two np.arrays of shape (batch, n_mels)
+        """
+        mask = mask.unsqueeze(1).to(mel_db.dtype)
+        counts = mask.sum(dim=-1)
+
+        means = (mel_db * mask).sum(dim=-1) / counts
+        squared_deviations = ((mel_db - means.unsqueeze(-1)) * mask) ** 2
+        stds = torch.sqrt(squared_deviations.sum(dim=-1) / (counts - 1))
+
+        return means.cpu().numpy(), stds.cpu().numpy()
+
+    def compute_stats(self, waveforms):
+        """
+        Function to compute the per-band mean and (unbiased) standard deviation over time of the
+        dB mel spectrograms of a batch of waveforms.
+
+        :param (list) waveforms: 1-D waveforms (torch.Tensor) at the engine sample rate
+        :return: (means, stds), two np.arrays of shape (batch, n_mels)
+        """
+        return self.masked_stats(*self.compute(waveforms))
+
+    def compute_file_stats(self, waveforms, sample_rates, batch_size=32):
+        """
+        Function to compute mel statistics for decoded audio files of different lengths and sample
+        rates. Waveforms are downmixed to mono, resampled, sorted by length and processed in
+        batches of similar lengths to keep the padding small.
+
+        :param (list) waveforms: waveforms (torch.Tensor) of shape (channels, num_samples)
+        :param (list) sample_rates: sample rate of each waveform
+        :param (int) batch_size: number of waveforms per forward pass (default: 32)
+        :return: (means, stds), two np.arrays of shape (num_waveforms, n_mels) in input order
+        """
+        with timer("mel.resample"):
+            waveforms = [
+                self.resample(waveform.mean(dim=0) if waveform.dim() > 1 else waveform, sr)
+                for waveform, sr in zip(waveforms, sample_rates)
+            ]
+        order = np.argsort([len(waveform) for waveform in waveforms], kind="stable")
+
+        means = np.empty((len(waveforms), self.n_mels), dtype=np.float32)
+        stds = np.empty((len(waveforms), self.n_mels), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            indices = order[start : start + batch_size]
+            batch_means, batch_stds = self.compute_stats([waveforms[i] for i in indices])
+            means[indices] = batch_means
+            stds[indices] = batch_stds
+
+        return means, stds
+
+
+@lru_cache(maxsize=None)
+def get_mel_engine(sample_rate=16000, n_mels=128, n_fft=1024, hop_length=512, device=None):
+    """
+    Function to get the MelEngine for a configuration, building it only on the first call in
+    each process.
+
+    :param (int) sample_rate: target sample rate (default: 16000)
+    :param (int) n_mels: number of mel bands (default: 128)
+    :param (int) n_fft: FFT size (default: 1024)
+    :param (int) hop_length: number of samples between frames (default: 512)
+    :param (str) device: device name, e.g. 'cpu' or 'cuda' (default: CUDA if available)
+    :return: a MelEngine
+    """
+    return MelEngine(
+        sample_rate=sample_rate,
+        n_mels=n_mels,
+        n_fft=n_fft,
+        hop_length=hop_length,
+        device=torch.device(device) if device is not None else None,
+    )
@@ -8,22 +8,705 @@ import statistics
 
 import numpy as np
 import parselmouth
-from parselmouth.praat import call
+from parselmouth import praat
+
+from utils.entropy import calculate_entropy
+from utils.profiling import counted_call, profiled, timer
+from utils.track_statistics import (
+    INTERPOLATION_METHODS,
+    STATISTICS,
+    Track,
+    get_quantiles,
+    get_statistic_names,
+    get_track_statistics,
+)
+from utils.voice_engine import (
+    detect_silences,
+    get_intensity,
+    get_jitter_local,
+    get_pulses,
+    get_segment_length_attributes,
+    get_shimmer_local,
+    track_pitch,
+)
+
+# Engines of get_local_jitter, get_local_shimmer and get_voiced_unvoiced_segments: Praat objects,
+# or the vectorized NumPy ports of utils.voice_engine (see Benchmarks.voice_engine_validation)
+ENGINES = ("praat", "numpy")
+
+# Every Praat command goes through this dispatcher, so profiled runs count the calls per command
+call = counted_call(praat.call, "praat.call")
+
+
+def get_cepstral_matrix(cepstrum, num_coefficients):
+    """
+    Function to read all frames of a cepstral object (MFCC or LFCC) into a matrix in one step,
+    instead of querying 'Get value in frame' once per (frame, coefficient) cell.
+
+    NOTE: Praat's 'To Matrix' leaves out c0, so row i of the matrix holds coefficient i + 1,
+    which is exactly what 'Get value in frame' returns for coefficient_no = i + 1. Frames with
+    fewer coefficients (e.g. LFCC of near-silent frames, where the LPC order drops) are padded
+    with zeros in the matrix but NaN for 'Get value in frame', so they are NaN here as well.
+
+    :param cepstrum: a Praat MFCC or LFCC object
+    :param (int) num_coefficients: number of coefficients to keep, starting from c1
+    :return: a matrix (np.array) with shape (num_frames, num_coefficients)
+    """
+    matrix = call(cepstrum, "To Matrix")
+    values = np.array(matrix.values[:num_coefficients].T, dtype=np.float64)
+
+    # Only frames ending in an exact zero can be short, their length is queried one by one
+    for frame_no in np.flatnonzero(values[:, -1] == 0.0) + 1:
+        frame_coefficients = call(cepstrum, "Get number of coefficients", int(frame_no))
+        values[frame_no - 1, frame_coefficients:] = np.nan
+    return values
+
+
+# Praat's conversions of pitch values from Hertz to the other pitch units
+PITCH_UNIT_CONVERSIONS = {
+    "Hertz": lambda f: f,
+    "Hertz (logarithmic)": lambda f: f,
+    "mel": lambda f: 550.0 * np.log1p(f / 550.0),
+    "logHertz": np.log10,
+    "semitones re 1 Hz": lambda f: 12.0 * np.log2(f),
+    "semitones re 100 Hz": lambda f: 12.0 * np.log2(f / 100.0),
+    "semitones re 200 Hz": lambda f: 12.0 * np.log2(f / 200.0),
+    "semitones re 440 Hz": lambda f: 12.0 * np.log2(f / 440.0),
+    "ERB": lambda f: 11.17 * np.log((f + 312.0) / (f + 14680.0)) + 43.0,
+}
+
+
+def get_track_values(praat_object, unit="Hertz"):
+    """
+    Function to read all frame values of a Pitch, Intensity or Harmonicity object into a NumPy
+    array in one step. Values are the same as the ones returned by 'Get value in frame' for frame
+    numbers 1 to num_frames, i.e. unvoiced pitch frames are NaN and unvoiced harmonicity frames
+    keep Praat's -200 dB sentinel.
+
+    :param praat_object: a Praat Pitch, Intensity or Harmonicity object
+    :param (str) unit: units of the pitch values, see PITCH_UNIT_CONVERSIONS (default: 'Hertz')
+           NOTE: Other units fall back to per-frame queries.
+    :return: an array (np.array) with shape (num_frames,)
+    """
+    if isinstance(praat_object, parselmouth.Pitch):
+        if unit not in PITCH_UNIT_CONVERSIONS:
+            return np.array(
+                [
+                    call(praat_object, "Get value in frame", frame_no, unit)
+                    for frame_no in range(1, praat_object.n_frames + 1)
+                ],
+                dtype=np.float64,
+            )
+        values = np.array(praat_object.selected_array["frequency"], dtype=np.float64)
+        values[values == 0.0] = np.nan
+        return PITCH_UNIT_CONVERSIONS[unit](values)
+
+    if isinstance(praat_object, (parselmouth.Intensity, parselmouth.Harmonicity)):
+        return np.array(praat_object.values[0], dtype=np.float64)
+
+    raise TypeError(f"Cannot read frame values from a {type(praat_object).__name__} object!")
+
+
+def get_track(praat_object, unit="Hertz"):
+    """
+    :param praat_object: a Praat Pitch, Intensity or Harmonicity object
+    :param (str) unit: units of the pitch values, see get_track_values (default: 'Hertz')
+    :return: a Track with all frame values and the time axis of @praat_object
+    """
+    return Track(
+        get_track_values(praat_object, unit),
+        praat_object.x1,
+        praat_object.dx,
+        praat_object.xmin,
+        praat_object.xmax,
+    )
+
+
+def replace_nan(values, replacement_for_nan=0.0):
+    """
+    :param (np.array) values: frame or bin values
+    :param (float) replacement_for_nan: value of the NaN entries in the result (default: 0.)
+    :return: a contiguous float32 copy (np.array) of @values with NaN replaced
+    """
+    values = np.where(np.isnan(values), replacement_for_nan, values)
+    return np.ascontiguousarray(values, dtype=np.float32)
+
+
+def get_formant_tracks(formant, num_formants=4, unit="Hertz"):
+    """
+    Function to read the first formant tracks of a Formant object into a matrix in one step.
+    Frames in which a formant is not defined are NaN, as returned by 'Get value at time'.
+
+    :param formant: a Praat Formant object
+    :param (int) num_formants: number of formant tracks to read, starting from F1 (default: 4)
+    :param (str) unit: units of the result, 'Hertz' or 'Bark' (default: 'Hertz')
+    :return: a matrix (np.array) with shape (num_frames, num_formants)
+    """
+    if unit not in ["Hertz", "Bark"]:
+        raise ValueError("Argument for @unit is not recognized!")
+
+    tracks = np.empty((formant.n_frames, num_formants), dtype=np.float64)
+    for formant_no in range(1, num_formants + 1):
+        tracks[:, formant_no - 1] = call(formant, "To Matrix", formant_no).values[0]
+
+    # Praat stores undefined formants as 0 Hz in the matrix representation
+    tracks[tracks == 0.0] = np.nan
+
+    if unit == "Bark":
+        tracks = 7.0 * np.arcsinh(tracks / 650.0)
+
+    return tracks
+
+
+def get_point_times(point_process):
+    """
+    Function to read all times of a PointProcess (e.g. glottal pulses) into an array in one step,
+    instead of querying 'Get time from index' once per point.
+
+    :param point_process: a Praat PointProcess object
+    :return: an array (np.array) of times in seconds, with shape (num_points,)
+    """
+    if call(point_process, "Get number of points") == 0:
+        return np.empty(0, dtype=np.float64)
+    return np.array(call(point_process, "To Matrix").values[0], dtype=np.float64)
 
 
-def calculate_entropy(signal):
+def sample_formant_tracks(formant, times, num_formants=4, unit="Hertz"):
     """
-    Function to calculate entropy of a signal.
-    :param (list) signal: a list of values representing the signal
-    :return: entropy of the signal
+    Function to sample the first formant tracks at many times at once. This is a vectorized
+    version of 'Get value at time' with linear interpolation: the nearest frame is interpolated
+    towards its other neighbour, and the nearest frame alone is used when that neighbour is
+    outside the track or undefined.
+
+    :param formant: a Praat Formant object
+    :param (np.array) times: times at which to sample the tracks, in seconds
+    :param (int) num_formants: number of formant tracks to sample, starting from F1 (default: 4)
+    :param (str) unit: units of the result, 'Hertz' or 'Bark' (default: 'Hertz')
+    :return: a matrix (np.array) with shape (num_times, num_formants), NaN where undefined
     """
-    prob = lambda x, signal: signal.count(x) / len(signal)
-    entropy = -sum(
-        [prob(el, signal) * math.log(prob(el, signal), 2) for el in set(signal)]
-    ) / math.log(len(set(signal)), 2)
-    return entropy
+    tracks = get_formant_tracks(formant, num_formants=num_formants, unit=unit)
+    times = np.asarray(times, dtype=np.float64)
+
+    # Same arithmetic as Praat, on 1-based frame indices
+    real_index = (times - formant.x1) / formant.dx + 1.0
+    left_index = np.floor(real_index)
+    phase = real_index - left_index
+    left_is_near = phase < 0.5
+    near_index = np.where(left_is_near, left_index, left_index + 1).astype(np.int64)
+    far_index = np.where(left_is_near, left_index + 1, left_index).astype(np.int64)
+    phase = np.where(left_is_near, phase, 1.0 - phase)[:, None]
+
+    num_frames = len(tracks)
+    near_values = tracks[np.clip(near_index, 1, num_frames) - 1]
+    far_values = tracks[np.clip(far_index, 1, num_frames) - 1]
+
+    use_far = ((far_index >= 1) & (far_index <= num_frames))[:, None] & ~np.isnan(far_values)
+    values = np.where(use_far, near_values + phase * (far_values - near_values), near_values)
+
+    in_range = (
+        (times >= formant.xmin)
+        & (times <= formant.xmax)
+        & (near_index >= 1)
+        & (near_index <= num_frames)
+    )
+    values[~in_range] = np.nan
+
+    return values
+
+
+def get_segment_bounds(start_time, end_time, segment_duration, overlap=0.0):
+    """
+    Function to split a time range into equally long segments of at most @segment_duration
+    seconds, in which consecutive segments overlap by @overlap seconds.
+
+    :param (float) start_time: start of the time range, in seconds
+    :param (float) end_time: end of the time range, in seconds
+    :param (float) segment_duration: maximum duration of a segment, in seconds
+    :param (float) overlap: overlap of consecutive segments, in seconds (default: 0.)
+    :return: a list of (start time, end time) tuples, a single one if the range is short enough
+    """
+    if overlap < 0.0 or overlap >= segment_duration:
+        raise ValueError("Argument for @overlap must be in [0, @segment_duration)!")
+
+    duration = end_time - start_time
+    num_segments = max(1, math.ceil((duration - overlap) / (segment_duration - overlap)))
+    step = (duration - overlap) / num_segments if num_segments > 1 else duration
+    return [
+        (start_time + i * step, min(end_time, start_time + i * step + step + overlap))
+        for i in range(num_segments)
+    ]
+
+
+def get_welch_spectrum(sound, segment_duration):
+    """
+    Function to get the spectrum of a long sound in memory that does not grow with its length:
+    the power spectra of Hann-windowed segments overlapping by half are summed on a fixed
+    frequency grid (Welch's method). Band energies agree with those of 'To Spectrum' on the whole
+    sound on average, as every sample gets the same total window weight, but bins are
+    1 / @segment_duration Hz wide and the spectrum is smoothed accordingly.
+
+    NOTE: The phase is lost; the real part of every bin holds its magnitude and the imaginary
+    part is 0, so all power-based queries (band energy, moments, ...) apply as usual.
+
+    :param (parselmouth.Sound) sound: sound waveform, channels are averaged
+    :param (float) segment_duration: duration of a segment, in seconds
+    :return: a Praat Spectrum object
+    """
+    sampling_frequency = sound.sampling_frequency
+    samples = sound.values
+    num_samples = samples.shape[1]
+    segment_length = max(2, 2 * round(segment_duration * sampling_frequency / 2))
+    hop = segment_length // 2
+    # Power of two as with the fast 'To Spectrum'
+    fft_length = 1 << (segment_length - 1).bit_length()
+
+    # Periodic Hann window: the squares of windows a hop apart add up to a constant
+    window = 0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(segment_length) / segment_length)
+    power = np.zeros(fft_length // 2 + 1)
+    segment = np.empty(segment_length)
+
+    # Segments start half a segment before the sound, so that its edges are not attenuated
+    for start in range(-hop, num_samples, hop):
+        segment[:] = 0.0
+        first, last = max(start, 0), min(start + segment_length, num_samples)
+        segment[first - start : last - start] = samples[:, first:last].mean(axis=0)
+        spectrum = np.fft.rfft(segment * window, fft_length) / sampling_frequency
+        power += spectrum.real**2 + spectrum.imag**2
+
+    power /= np.sum(window**2) / hop
+    return parselmouth.Spectrum(np.sqrt(power), sampling_frequency / 2.0)
+
+
+class PraatAnalyzer:
+    """
+    Lazily computes and memoizes the intermediate Praat objects (Pitch, PointProcess, Intensity,
+    Harmonicity, silences TextGrid, Spectrum, Formant) of one sound, so that every attribute
+    function drawing from the same analyzer runs each expensive analysis only once per parameter
+    set. All get_* functions accept a PraatAnalyzer wherever they accept a sound.
+    """
+
+    def __init__(self, sound):
+        """
+        :param (parselmouth.Sound or str) sound: sound waveform or path to an audio file
+        """
+        if not isinstance(sound, parselmouth.Sound):
+            sound = parselmouth.Sound(str(sound))
+        self.sound = sound
+        self._objects = dict()
+
+    def _memoize(self, key, compute):
+        if key not in self._objects:
+            with timer(f"praat.{key[0]}"):
+                self._objects[key] = compute()
+        return self._objects[key]
+
+    @property
+    def duration(self):
+        return self._memoize(("duration",), lambda: call(self.sound, "Get end time"))
+
+    @property
+    def samples(self):
+        """
+        :return: the samples of the sound (np.array), averaged over the channels
+        """
+        return self._memoize(("samples",), lambda: self.sound.values.mean(axis=0))
+
+    def native_pulses(self, pitch_floor=75.0, pitch_ceiling=600.0):
+        """
+        :return: the glottal pulse times (np.array) of utils.voice_engine, without Praat objects
+        """
+
+        def compute():
+            samples, sample_rate = self.samples, self.sound.sampling_frequency
+            pitch = track_pitch(
+                [samples], sample_rate, pitch_floor=pitch_floor, pitch_ceiling=pitch_ceiling
+            )[0]
+            return get_pulses(samples, sample_rate, pitch)
+
+        return self._memoize(("native_pulses", pitch_floor, pitch_ceiling), compute)
+
+    def native_silence_intervals(
+        self,
+        minimum_pitch=100.0,
+        silence_threshold=-25.0,
+        min_silent_interval=0.05,
+        min_sounding_interval=0.1,
+    ):
+        """
+        :return: the (start time, end time, label) tuples of utils.voice_engine.detect_silences
+        """
+
+        def compute():
+            intensity = get_intensity(
+                [self.samples], self.sound.sampling_frequency, minimum_pitch=minimum_pitch
+            )[0]
+            return detect_silences(
+                intensity, silence_threshold, min_silent_interval, min_sounding_interval
+            )
+
+        return self._memoize(
+            (
+                "native_silence_intervals",
+                minimum_pitch,
+                silence_threshold,
+                min_silent_interval,
+                min_sounding_interval,
+            ),
+            compute,
+        )
+
+    def pitch(self, pitch_type="preferred", time_step=0.0, pitch_floor=75.0, pitch_ceiling=600.0):
+        """
+        :param (str) pitch_type: 'preferred' (auto-correlation) or 'cc' (cross-correlation)
+        :return: a Praat Pitch object
+        """
+        if pitch_type == "preferred":
+            command = "To Pitch"
+        elif pitch_type == "cc":
+            command = "To Pitch (cc)"
+        else:
+            raise ValueError("Argument for @pitch_type not recognized!")
+
+        return self._memoize(
+            ("pitch", pitch_type, time_step, pitch_floor, pitch_ceiling),
+            lambda: call(self.sound, command, time_step, pitch_floor, pitch_ceiling),
+        )
+
+    def point_process(self, pitch_floor=75.0, pitch_ceiling=600.0):
+        """
+        NOTE: 'To PointProcess (periodic, cc)' internally runs 'To Pitch' with a default time
+        step, so the PointProcess is derived from the memoized Pitch instead, which gives the
+        same glottal pulses without a second pitch analysis.
+
+        :return: a Praat PointProcess object of the glottal pulses
+        """
+        return self._memoize(
+            ("point_process", pitch_floor, pitch_ceiling),
+            lambda: call(
+                [self.sound, self.pitch("preferred", 0.0, pitch_floor, pitch_ceiling)],
+                "To PointProcess (cc)",
+            ),
+        )
+
+    def intensity(self, pitch_floor=75.0, time_step=0.0):
+        """
+        :return: a Praat Intensity object
+        """
+        return self._memoize(
+            ("intensity", pitch_floor, time_step),
+            lambda: call(self.sound, "To Intensity", pitch_floor, time_step, "yes"),
+        )
+
+    def harmonicity(
+        self,
+        harmonics_type="preferred",
+        time_step=0.01,
+        minimum_pitch=75.0,
+        silence_threshold=0.1,
+        num_periods_per_window=1.0,
+    ):
+        """
+        :param (str) harmonics_type: 'preferred' (cross-correlation) or 'ac' (auto-correlation)
+        :return: a Praat Harmonicity object
+        """
+        if harmonics_type == "preferred":
+            command = "To Harmonicity (cc)"
+        elif harmonics_type == "ac":
+            command = "To Harmonicity (ac)"
+        else:
+            raise ValueError("Argument for @harmonics_type is not recognized!")
+
+        return self._memoize(
+            (
+                "harmonicity",
+                harmonics_type,
+                time_step,
+                minimum_pitch,
+                silence_threshold,
+                num_periods_per_window,
+            ),
+            lambda: call(
+                self.sound,
+                command,
+                time_step,
+                minimum_pitch,
+                silence_threshold,
+                num_periods_per_window,
+            ),
+        )
 
+    def silences(
+        self,
+        minimum_pitch=100.0,
+        time_step=0.0,
+        silence_threshold=-25.0,
+        min_silent_interval=0.05,
+        min_sounding_interval=0.1,
+    ):
+        """
+        :return: a Praat TextGrid with 'silent' and 'sounding' intervals
+        """
+        return self._memoize(
+            (
+                "silences",
+                minimum_pitch,
+                time_step,
+                silence_threshold,
+                min_silent_interval,
+                min_sounding_interval,
+            ),
+            lambda: call(
+                self.sound,
+                "To TextGrid (silences)",
+                minimum_pitch,
+                time_step,
+                silence_threshold,
+                min_silent_interval,
+                min_sounding_interval,
+                "silent",
+                "sounding",
+            ),
+        )
+
+    def silence_intervals(self, **silences_kwargs):
+        """
+        :param silences_kwargs: parameters of the silences TextGrid (see silences)
+        :return: a list of (start time, end time, label) tuples for all intervals of the TextGrid
+        """
+
+        def compute():
+            silence = self.silences(**silences_kwargs)
+            num_intervals = call(silence, "Get number of intervals", 1)
+            return [
+                (
+                    call(silence, "Get start time of interval", 1, i),
+                    call(silence, "Get end time of interval", 1, i),
+                    call(silence, "Get label of interval", 1, i),
+                )
+                for i in range(1, num_intervals + 1)
+            ]
+
+        return self._memoize(("silence_intervals", tuple(sorted(silences_kwargs.items()))), compute)
+
+    def spectrum(self, segment_duration=None):
+        """
+        :param (float) segment_duration: analyze the sound in segments of this many seconds, see
+               get_welch_spectrum (default: None, one spectrum of the whole sound)
+        :return: a Praat Spectrum object of the whole sound
+        """
+        if segment_duration is not None:
+            return self._memoize(
+                ("spectrum", segment_duration),
+                lambda: get_welch_spectrum(self.sound, segment_duration),
+            )
+        return self._memoize(("spectrum",), lambda: call(self.sound, "To Spectrum", "yes"))
+
+    def formant(
+        self,
+        time_step=0.0,
+        max_num_formants=5.0,
+        max_formant=5500.0,
+        window_length=0.025,
+        pre_emphasis_from=50.0,
+    ):
+        """
+        :return: a Praat Formant object
+        """
+        return self._memoize(
+            ("formant", time_step, max_num_formants, max_formant, window_length, pre_emphasis_from),
+            lambda: call(
+                self.sound,
+                "To Formant (burg)",
+                time_step,
+                max_num_formants,
+                max_formant,
+                window_length,
+                pre_emphasis_from,
+            ),
+        )
 
+
+def get_analyzer(sound):
+    """
+    Function to get a PraatAnalyzer for a sound, reusing it if one is passed in.
+
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
+    :return: a PraatAnalyzer
+    """
+    if isinstance(sound, PraatAnalyzer):
+        return sound
+    return PraatAnalyzer(sound)
+
+
+def get_track_attribute_names(track_name, percentiles=()):
+    """
+    :param (str) track_name: suffix of the attribute names, e.g. 'intensity'
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :return: a list of attribute names such as 'min_intensity', 'relative_min_intensity_time' or
+             'q1_intensity', in the column order of get_track_statistics
+    """
+    names = []
+    for statistic in get_statistic_names(percentiles):
+        if statistic.startswith("time_of_"):
+            names.append(f"relative_{statistic[len('time_of_'):]}_{track_name}_time")
+        else:
+            names.append(f"{statistic}_{track_name}")
+    return names
+
+
+def get_track_attributes(
+    praat_objects,
+    durations,
+    track_name,
+    min_time=0.0,
+    max_time=0.0,
+    unit=None,
+    interpolation_method="Parabolic",
+    excluded_value=None,
+    replacement_for_nan=0.0,
+    percentiles=(),
+    tracks=None,
+):
+    """
+    Function to get the summary statistics of the tracks of many sounds as one matrix, with the
+    times of the extrema relative to the sound durations. Statistics come from the vectorized
+    get_track_statistics; Praat is only queried for what it computes differently, i.e. the
+    extrema for interpolation methods other than 'None' and 'Parabolic', and the mean and
+    standard deviation within a time range (t1, t2).
+
+    :param (list) praat_objects: Praat Pitch, Intensity or Harmonicity objects
+    :param (list) durations: total duration of the sound of every object
+    :param (str) track_name: suffix of the attribute names, e.g. 'intensity'
+    :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
+    :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
+           NOTE: If max_time <= min_time, the entire time domain is considered
+    :param (str) unit: units of the pitch values, None for objects without units (default: None)
+    :param (str) interpolation_method: method of sampling new data points with a discrete set of
+           known data points (default: 'Parabolic')
+    :param (float) excluded_value: see get_track_statistics (default: None)
+    :param (float) replacement_for_nan: a float number that will represent frames with NaN values
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :param (list) tracks: Track of every object if already read (default: None, read here)
+    :return: (a matrix (np.array) with shape (num_objects, num_attributes), a list of the
+              attribute names)
+    """
+    unit_args = () if unit is None else (unit,)
+    if tracks is None:
+        tracks = [get_track(praat_object, *unit_args) for praat_object in praat_objects]
+
+    track_statistics = get_track_statistics(
+        tracks,
+        min_time,
+        max_time,
+        interpolation_method if interpolation_method in INTERPOLATION_METHODS else "None",
+        # Praat finds the extrema of tracks with undefined frames differently
+        interpolated_borders=any(isinstance(obj, parselmouth.Pitch) for obj in praat_objects),
+        excluded_value=excluded_value,
+        replacement_for_nan=replacement_for_nan,
+        percentiles=percentiles,
+    )
+
+    for row, praat_object in enumerate(praat_objects):
+        if interpolation_method not in INTERPOLATION_METHODS:
+            for command, column in [
+                ("minimum", STATISTICS.index("min")),
+                ("maximum", STATISTICS.index("max")),
+            ]:
+                track_statistics[row, column] = call(
+                    praat_object,
+                    f"Get {command}",
+                    min_time,
+                    max_time,
+                    *unit_args,
+                    interpolation_method,
+                )
+                track_statistics[row, column + 1] = call(
+                    praat_object,
+                    f"Get time of {command}",
+                    min_time,
+                    max_time,
+                    *unit_args,
+                    interpolation_method,
+                )
+        if max_time > min_time:
+            # Praat weights the partial frames at the borders of the time range
+            track_statistics[row, STATISTICS.index("mean")] = call(
+                praat_object, "Get mean", min_time, max_time, *unit_args
+            )
+            track_statistics[row, STATISTICS.index("stddev")] = call(
+                praat_object, "Get standard deviation", min_time, max_time, *unit_args
+            )
+
+    for statistic in ["time_of_min", "time_of_max"]:
+        track_statistics[:, STATISTICS.index(statistic)] /= np.asarray(durations, dtype=np.float64)
+
+    return track_statistics, get_track_attribute_names(track_name, percentiles)
+
+
+@profiled("praat.get_track_attributes_batch")
+def get_track_attributes_batch(
+    sounds,
+    track_type="intensity",
+    min_time=0.0,
+    max_time=0.0,
+    unit="Hertz",
+    interpolation_method="Parabolic",
+    replacement_for_nan=0.0,
+    percentiles=(),
+    **analysis_kwargs,
+):
+    """
+    Function to get the summary statistics of one track type for many sounds at once, e.g. all
+    files of a dataset, as one matrix with the same attributes as get_intensity_attributes,
+    get_pitch_attributes or get_harmonics_to_noise_ratio_attributes (without the pitch slopes and
+    the voiced fraction).
+
+    :param (list) sounds: sound waveforms or their analyzers
+    :param (str) track_type: 'intensity', 'pitch' or 'hnr' (default: 'intensity')
+    :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
+    :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
+           NOTE: If max_time <= min_time, the entire time domain is considered
+    :param (str) unit: units of the pitch values, only used for pitch (default: 'Hertz')
+    :param (str) interpolation_method: method of sampling new data points with a discrete set of
+           known data points (default: 'Parabolic')
+    :param (float) replacement_for_nan: a float number that will represent frames with NaN values
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :param analysis_kwargs: parameters of the analysis, see PraatAnalyzer.intensity,
+           PraatAnalyzer.pitch and PraatAnalyzer.harmonicity
+    :return: (a matrix (np.array) with shape (num_sounds, num_attributes), a list of the
+              attribute names)
+    """
+    analyzers = [get_analyzer(sound) for sound in sounds]
+    excluded_value = None
+
+    if track_type == "intensity":
+        praat_objects = [analyzer.intensity(**analysis_kwargs) for analyzer in analyzers]
+        unit = None
+    elif track_type == "pitch":
+        praat_objects = [analyzer.pitch(**analysis_kwargs) for analyzer in analyzers]
+    elif track_type == "hnr":
+        praat_objects = [analyzer.harmonicity(**analysis_kwargs) for analyzer in analyzers]
+        unit = None
+        # Silent harmonicity frames
+        excluded_value = -200.0
+    else:
+        raise ValueError("Argument for @track_type is not recognized!")
+
+    return get_track_attributes(
+        praat_objects,
+        [analyzer.duration for analyzer in analyzers],
+        track_type,
+        min_time=min_time,
+        max_time=max_time,
+        unit=unit,
+        interpolation_method=interpolation_method,
+        excluded_value=excluded_value,
+        replacement_for_nan=replacement_for_nan,
+        percentiles=percentiles,
+    )
+
+
+@profiled("praat.get_intensity_attributes")
 def get_intensity_attributes(
     sound,
     time_step=0.0,
@@ -33,10 +716,11 @@ def get_intensity_attributes(
     interpolation_method="Parabolic",
     return_values=False,
     replacement_for_nan=0.0,
+    percentiles=(),
 ):
     """
     Function to get intensity attributes such as minimum intensity, maximum intensity, mean
-    intensity, and standard deviation of intensity.
+    intensity, standard deviation, quantiles, entropy, skewness and kurtosis of intensity.
 
     NOTE: Notice that we don't need a unit parameter for intensity as intensity is consistently
     reported as dB SPL throughout Praat. dB SPL is simply dB relative to the normative auditory
@@ -46,7 +730,7 @@ def get_intensity_attributes(
     (logarithm) in the computation of intensity; sinc interpolation would be too stiff and may
     give unexpected results.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (float) time_step: the measurement interval (frame duration), in seconds (default: 0.)
            NOTE: The default 0. value corresponds to a time step of 0.75 / pitch floor
     :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
@@ -55,61 +739,39 @@ def get_intensity_attributes(
     :param pitch_floor: minimum pitch (default: 75.)
     :param (str) interpolation_method: method of sampling new data points with a discrete set of
            known data points, 'None', 'Parabolic', 'Cubic', or 'Sinc' (default: 'Parabolic')
-    :param (bool) return_values: whether to return a continuous list of intensity values
-           from all frames or not
+    :param (bool) return_values: whether to return the intensity values of all frames or not
     :param (float) replacement_for_nan: a float number that will represent frames with NaN values
-    :return: (a dictionary of mentioned attributes, a list of intensity values OR None)
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :return: (a dictionary of mentioned attributes, a float32 array (np.array) of intensity
+              values OR None)
     """
-    # Get total duration of the sound
-    duration = call(sound, "Get end time")
-
-    # Create Intensity object
-    intensity = call(sound, "To Intensity", pitch_floor, time_step, "yes")
-
-    attributes = dict()
-
-    attributes["min_intensity"] = call(
-        intensity, "Get minimum", min_time, max_time, interpolation_method
-    )
-
-    attributes["relative_min_intensity_time"] = (
-        call(intensity, "Get time of minimum", min_time, max_time, interpolation_method) / duration
-    )
-
-    attributes["max_intensity"] = call(
-        intensity, "Get maximum", min_time, max_time, interpolation_method
-    )
+    analyzer = get_analyzer(sound)
 
-    attributes["relative_max_intensity_time"] = (
-        call(intensity, "Get time of maximum", min_time, max_time, interpolation_method) / duration
+    # Get total duration of the sound
+    duration = analyzer.duration
+
+    # Get Intensity object
+    intensity = analyzer.intensity(pitch_floor, time_step)
+
+    # All frames are read once, every statistic is computed from them
+    track = get_track(intensity)
+    track_statistics, names = get_track_attributes(
+        [intensity],
+        [duration],
+        "intensity",
+        min_time=min_time,
+        max_time=max_time,
+        interpolation_method=interpolation_method,
+        replacement_for_nan=replacement_for_nan,
+        percentiles=percentiles,
+        tracks=[track],
     )
+    attributes = dict(zip(names, track_statistics[0].tolist()))
 
-    attributes["mean_intensity"] = call(intensity, "Get mean", min_time, max_time)
-
-    attributes["stddev_intensity"] = call(intensity, "Get standard deviation", min_time, max_time)
-
-    attributes["q1_intensity"] = call(intensity, "Get quantile", min_time, max_time, 0.25)
-
-    attributes["median_intensity"] = call(intensity, "Get quantile", min_time, max_time, 0.50)
-
-    attributes["q3_intensity"] = call(intensity, "Get quantile", min_time, max_time, 0.75)
-
-    intensity_values = None
-
-    if return_values:
-        intensity_values = [
-            call(intensity, "Get value in frame", frame_no) for frame_no in range(len(intensity))
-        ]
-        # Convert NaN values to floats (default: 0)
-        intensity_values = [
-            value if not math.isnan(value) else replacement_for_nan for value in intensity_values
-        ]
-
-    attributes["entropy_intensity"] = calculate_entropy(intensity_values)
-
-    return attributes, intensity_values
+    return attributes, replace_nan(track.values, replacement_for_nan) if return_values else None
 
 
+@profiled("praat.get_pitch_attributes")
 def get_pitch_attributes(
     sound,
     pitch_type="preferred",
@@ -122,12 +784,13 @@ def get_pitch_attributes(
     interpolation_method="Parabolic",
     return_values=False,
     replacement_for_nan=0.0,
+    percentiles=(),
 ):
     """
-    Function to get pitch attributes such as minimum pitch, maximum pitch, mean pitch, and
-    standard deviation of pitch.
+    Function to get pitch attributes such as minimum pitch, maximum pitch, mean pitch, standard
+    deviation, quantiles, entropy, skewness and kurtosis of pitch, and the pitch slopes.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (str) pitch_type: the type of pitch analysis to be performed; values include 'preferred'
            optimized for speech based on auto-correlation method, and 'cc' for performing acoustic
            periodicity detection based on cross-correlation method
@@ -143,96 +806,61 @@ def get_pitch_attributes(
     :param (str) unit: units of the result, 'Hertz' or 'Bark' (default: 'Hertz)
     :param (str) interpolation_method: method of sampling new data points with a discrete set of
            known data points, 'None' or 'Parabolic' (default: 'Parabolic')
-    :param (bool) return_values: whether to return a continuous list of pitch values from all frames
-           or not
+    :param (bool) return_values: whether to return the pitch values of all frames or not
     :param (float) replacement_for_nan: a float number that will represent frames with NaN values
-    :return: (a dictionary of mentioned attributes, a list of pitch values OR None)
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :return: (a dictionary of mentioned attributes, a float32 array (np.array) of pitch values
+              OR None)
     """
+    analyzer = get_analyzer(sound)
+
     # Get total duration of the sound
-    duration = call(sound, "Get end time")
+    duration = analyzer.duration
 
-    # Create pitch object
-    if pitch_type == "preferred":
-        pitch = call(sound, "To Pitch", time_step, pitch_floor, pitch_ceiling)
-    elif pitch_type == "cc":
-        pitch = call(sound, "To Pitch (cc)", time_step, pitch_floor, pitch_ceiling)
-    else:
-        raise ValueError("Argument for @pitch_type not recognized!")
+    # Get pitch object
+    pitch = analyzer.pitch(pitch_type, time_step, pitch_floor, pitch_ceiling)
 
     attributes = dict()
 
     attributes["voiced_fraction"] = call(pitch, "Count voiced frames") / len(pitch)
 
-    attributes["min_pitch"] = call(
-        pitch, "Get minimum", min_time, max_time, unit, interpolation_method
-    )
-
-    attributes["relative_min_pitch_time"] = (
-        call(pitch, "Get time of minimum", min_time, max_time, unit, interpolation_method)
-        / duration
-    )
-
-    attributes["max_pitch"] = call(
-        pitch, "Get maximum", min_time, max_time, unit, interpolation_method
-    )
-
-    attributes["relative_max_pitch_time"] = (
-        call(pitch, "Get time of maximum", min_time, max_time, unit, interpolation_method)
-        / duration
+    # All frames are read once, every statistic is computed from them
+    track = get_track(pitch, unit)
+    track_statistics, names = get_track_attributes(
+        [pitch],
+        [duration],
+        "pitch",
+        min_time=min_time,
+        max_time=max_time,
+        unit=unit,
+        interpolation_method=interpolation_method,
+        replacement_for_nan=replacement_for_nan,
+        percentiles=percentiles,
+        tracks=[track],
     )
-
-    attributes["mean_pitch"] = call(pitch, "Get mean", min_time, max_time, unit)
-
-    attributes["stddev_pitch"] = call(pitch, "Get standard deviation", min_time, max_time, unit)
-
-    attributes["q1_pitch"] = call(pitch, "Get quantile", min_time, max_time, 0.25, unit)
-
-    attributes["median_intensity"] = call(pitch, "Get quantile", min_time, max_time, 0.50, unit)
-
-    attributes["q3_pitch"] = call(pitch, "Get quantile", min_time, max_time, 0.75, unit)
+    attributes.update(zip(names, track_statistics[0].tolist()))
 
     attributes["mean_absolute_pitch_slope"] = call(pitch, "Get mean absolute slope", unit)
     attributes["pitch_slope_without_octave_jumps"] = call(pitch, "Get slope without octave jumps")
 
-    pitch_values = None
-
-    if return_values:
-        pitch_values = [
-            call(pitch, "Get value in frame", frame_no, unit) for frame_no in range(len(pitch))
-        ]
-        # Convert NaN values to floats (default: 0)
-        pitch_values = [
-            value if not math.isnan(value) else replacement_for_nan for value in pitch_values
-        ]
-
-    attributes["entropy_pitch"] = calculate_entropy(pitch_values)
-
-    return attributes, pitch_values
+    return attributes, replace_nan(track.values, replacement_for_nan) if return_values else None
 
 
+@profiled("praat.get_energy")
 def get_energy(sound):
     """
     Function to get energy attributes such as minimum energy, maximum energy, mean energy, and
     standard deviation of energy.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :return: (a dictionary of mentioned attributes, a list of energy values OR None)
     """
-    silence = call(
-        sound, "To TextGrid (silences)", 100, 0.0, -25.0, 0.05, 0.1, "silent", "sounding"
-    )
-    num_intervals = call(silence, "Get number of intervals", 1)
-    start_times = []
-    end_times = []
-    for i in range(1, num_intervals + 1):
-        label = call(silence, "Get label of interval", 1, i)
-        if label == "sounding":
-            start_times.append(call(silence, "Get start time of interval", 1, i))
-            end_times.append(call(silence, "Get end time of interval", 1, i))
+    analyzer = get_analyzer(sound)
+
     energy_values = []
-    for t1, t2 in zip(start_times, end_times):
-        energy = call(sound, "Get energy", t1, t2)
-        energy_values.append(energy)
+    for t1, t2, label in analyzer.silence_intervals():
+        if label == "sounding":
+            energy_values.append(call(analyzer.sound, "Get energy", t1, t2))
 
     attributes = dict()
     attributes["min_energy"] = min(energy_values)
@@ -244,6 +872,7 @@ def get_energy(sound):
     return attributes, energy_values
 
 
+@profiled("praat.get_harmonics_to_noise_ratio_attributes")
 def get_harmonics_to_noise_ratio_attributes(
     sound,
     harmonics_type="preferred",
@@ -256,18 +885,19 @@ def get_harmonics_to_noise_ratio_attributes(
     interpolation_method="Parabolic",
     return_values=False,
     replacement_for_nan=0.0,
+    percentiles=(),
 ):
     """
     Function to get Harmonics-to-Noise Ratio (HNR) attributes such as minimum HNR, maximum HNR,
-    mean HNR, and standard deviation of HNR. HNR is defined as a measure that quantifies the amount
-    of additive noise in a voice signal.
+    mean HNR, standard deviation, quantiles, entropy, skewness and kurtosis of HNR. HNR is defined
+    as a measure that quantifies the amount of additive noise in a voice signal.
 
     NOTE: Harmonicity object represents the degree of acoustic periodicity, also called
     Harmonics-to-Noise Ratio (HNR). Harmonicity is expressed in dB: if 99% of the energy of the
     signal is in the periodic part, and 1% is noise, the HNR is 10*log10(99/1) = 20 dB. A HNR of
     0 dB means that there is equal energy in the harmonics and in the noise.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (str) harmonics_type: the type of harmonicity analysis to be performed; values include
            'preferred' for short-term analysis on cross-correlation method, and 'ac' for performing
            acoustic periodicity detection based on an accurate auto-correlation method
@@ -285,75 +915,44 @@ def get_harmonics_to_noise_ratio_attributes(
     :param (str) interpolation_method: method of sampling new data points with a discrete set of
            known data points, 'None', 'Parabolic', 'Cubic', 'Sinc70', or 'Sinc700'
            (default: 'Parabolic')
-    :param (bool) return_values: whether to return a continuous list of harmonicity values
-           from all frames or not
+    :param (bool) return_values: whether to return the harmonicity values of all frames or not
+           NOTE: Silent frames keep Praat's -200 dB value.
     :param (float) replacement_for_nan: a float number that will represent frames with NaN values
-    :return: (a dictionary of mentioned attributes, a list of harmonicity values OR None)
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :return: (a dictionary of mentioned attributes, a float32 array (np.array) of harmonicity
+              values OR None)
     """
-    # Get total duration of the sound
-    duration = call(sound, "Get end time")
-
-    # Create a Harmonicity object
-    if harmonics_type == "preferred":
-        harmonicity = call(
-            sound,
-            "To Harmonicity (cc)",
-            time_step,
-            minimum_pitch,
-            silence_threshold,
-            num_periods_per_window,
-        )
-    elif harmonics_type == "ac":
-        harmonicity = call(
-            sound,
-            "To Harmonicity (ac)",
-            time_step,
-            minimum_pitch,
-            silence_threshold,
-            num_periods_per_window,
-        )
-    else:
-        raise ValueError("Argument for @harmonics_type is not recognized!")
-
-    attributes = dict()
-
-    attributes["min_hnr"] = call(
-        harmonicity, "Get minimum", min_time, max_time, interpolation_method
-    )
+    analyzer = get_analyzer(sound)
 
-    attributes["relative_min_hnr_time"] = (
-        call(harmonicity, "Get time of minimum", min_time, max_time, interpolation_method)
-        / duration
-    )
+    # Get total duration of the sound
+    duration = analyzer.duration
 
-    attributes["max_hnr"] = call(
-        harmonicity, "Get maximum", min_time, max_time, interpolation_method
+    # Get a Harmonicity object
+    harmonicity = analyzer.harmonicity(
+        harmonics_type, time_step, minimum_pitch, silence_threshold, num_periods_per_window
     )
 
-    attributes["relative_max_hnr_time"] = (
-        call(harmonicity, "Get time of maximum", min_time, max_time, interpolation_method)
-        / duration
+    # All frames are read once; as in Praat, silent frames (-200 dB) count for the extrema but
+    # not for the mean, standard deviation and quantiles
+    track = get_track(harmonicity)
+    track_statistics, names = get_track_attributes(
+        [harmonicity],
+        [duration],
+        "hnr",
+        min_time=min_time,
+        max_time=max_time,
+        interpolation_method=interpolation_method,
+        excluded_value=-200.0,
+        replacement_for_nan=replacement_for_nan,
+        percentiles=percentiles,
+        tracks=[track],
     )
+    attributes = dict(zip(names, track_statistics[0].tolist()))
 
-    attributes["mean_hnr"] = call(harmonicity, "Get mean", min_time, max_time)
-
-    attributes["stddev_hnr"] = call(harmonicity, "Get standard deviation", min_time, max_time)
-
-    harmonicity_values = None
-
-    if return_values:
-        harmonicity_values = [
-            call(harmonicity, "Get value in frame", frame_no)
-            for frame_no in range(len(harmonicity))
-        ]
-        # Convert NaN values to floats (default: 0)
-        harmonicity_values = [
-            value if not math.isnan(value) else replacement_for_nan for value in harmonicity_values
-        ]
-
-    return attributes, harmonicity_values
+    return attributes, replace_nan(track.values, replacement_for_nan) if return_values else None
 
 
+@profiled("praat.get_glottal_to_noise_ratio_attributes")
 def get_glottal_to_noise_ratio_attributes(
     sound,
     horizontal_minimum=0.0,
@@ -364,17 +963,24 @@ def get_glottal_to_noise_ratio_attributes(
     maximum_frequency=4500.0,
     bandwidth=1000.0,
     step=80.0,
+    segment_duration=None,
+    segment_overlap=0.5,
 ):
     """
     Function to get Glottal-to-Noise Ratio (GNE) attributes such as minimum GNE, maximum GNE,
-    mean GNE, standard deviation of GNE, and sum of GNE. GNE is a measure that indicates whether a
-    given voice signal originates from vibrations of the vocal folds or from turbulent noise
-    generated in the vocal tract and is thus related to (but not a direct measure of) breathiness.
-    (D.Michaelis et al. 1997)
+    mean GNE, standard deviation of GNE, quartiles of GNE, and sum of GNE. GNE is a measure that
+    indicates whether a given voice signal originates from vibrations of the vocal folds or from
+    turbulent noise generated in the vocal tract and is thus related to (but not a direct measure
+    of) breathiness. (D.Michaelis et al. 1997)
 
     NOTE: The default units for the operations performed in this function are all 'Hertz'.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    NOTE: The GNE analysis of a whole sound takes about 4 MB per second of audio. The GNE matrix
+    itself has a fixed size (one cell per pair of frequency bands), so with @segment_duration every
+    overlapping segment gets its own matrix, only their running sum is kept, and all attributes
+    are those of the average matrix.
+
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (float) horizontal_minimum: minimum value for the horizontal range (default: 0.)
     :param (float) horizontal_maximum: maximum value for the horizontal range (default: 0.)
     :param (float) vertical_minimum: minimum value for the vertical range (default: 0.)
@@ -384,12 +990,40 @@ def get_glottal_to_noise_ratio_attributes(
     :param (float) maximum_frequency: maximum frequency for analysis (default: 4500.)
     :param (float) bandwidth: frequency difference between upper and lower signals (default: 1000.)
     :param (float) step: frequency steps for intervals (default: 80.)
+    :param (float) segment_duration: for long recordings, analyze segments of at most this many
+           seconds (default: None, the whole sound at once)
+    :param (float) segment_overlap: overlap of consecutive segments, in seconds (default: 0.5)
     :return: a dictionary of mentioned attributes
     """
+    analyzer = get_analyzer(sound)
+    gne_arguments = (minimum_frequency, maximum_frequency, bandwidth, step)
+    ranges = (horizontal_minimum, horizontal_maximum, vertical_minimum, vertical_maximum)
+
+    if segment_duration is not None:
+        return get_segmented_gne_attributes(
+            analyzer.sound,
+            gne_arguments,
+            ranges,
+            segment_duration,
+            segment_overlap,
+        )
+
     # Create a Matrix object that represents GNE
-    matrix = call(
-        sound, "To Harmonicity (gne)", minimum_frequency, maximum_frequency, bandwidth, step
-    )
+    matrix = call(analyzer.sound, "To Harmonicity (gne)", *gne_arguments)
+
+    return get_gne_matrix_attributes(matrix, ranges), None
+
+
+def get_gne_matrix_attributes(matrix, ranges):
+    """
+    Function to get the GNE attributes of a GNE matrix, of a whole sound or averaged over segments.
+
+    :param matrix: a Praat Matrix from 'To Harmonicity (gne)'
+    :param (tuple) ranges: horizontal and vertical ranges of the mean, standard deviation and
+           quartiles, see get_matrix_cells
+    :return: a dictionary of mentioned attributes
+    """
+    horizontal_minimum, horizontal_maximum, vertical_minimum, vertical_maximum = ranges
 
     attributes = dict()
 
@@ -415,11 +1049,78 @@ def get_glottal_to_noise_ratio_attributes(
         vertical_maximum,
     )
 
+    attributes["q1_gne"], attributes["median_gne"], attributes["q3_gne"] = get_quantiles(
+        get_matrix_cells(matrix, *ranges).reshape(1, -1), [0.25, 0.5, 0.75]
+    )[0].tolist()
+
     attributes["sum_gne"] = call(matrix, "Get sum")
 
-    return attributes, None
+    return attributes
+
+
+def get_matrix_cells(
+    matrix, horizontal_minimum, horizontal_maximum, vertical_minimum, vertical_maximum
+):
+    """
+    Function to get the cells of a Praat Matrix whose centers lie in a horizontal and vertical
+    range, as used by its 'Get mean...' and 'Get standard deviation...' queries.
+
+    :param matrix: a Praat Matrix object
+    :param (float) horizontal_minimum: minimum of the horizontal range
+    :param (float) horizontal_maximum: maximum of the horizontal range
+    :param (float) vertical_minimum: minimum of the vertical range
+    :param (float) vertical_maximum: maximum of the vertical range
+           NOTE: A range whose maximum is not above its minimum covers the whole matrix.
+    :return: the selected cells (np.array) with shape (num_rows, num_columns)
+    """
+    values = matrix.values
+    x = matrix.x1 + np.arange(matrix.nx) * matrix.dx
+    y = matrix.y1 + np.arange(matrix.ny) * matrix.dy
+    columns = np.ones(matrix.nx, dtype=bool)
+    rows = np.ones(matrix.ny, dtype=bool)
+    if horizontal_maximum > horizontal_minimum:
+        columns = (x >= horizontal_minimum) & (x <= horizontal_maximum)
+    if vertical_maximum > vertical_minimum:
+        rows = (y >= vertical_minimum) & (y <= vertical_maximum)
+    return values[np.ix_(rows, columns)]
+
+
+def get_segmented_gne_attributes(
+    sound, gne_arguments, ranges, segment_duration, segment_overlap=0.5
+):
+    """
+    Function to get the GNE attributes of a long sound from the average GNE matrix of overlapping
+    segments (see get_glottal_to_noise_ratio_attributes).
+
+    :param (parselmouth.Sound) sound: sound waveform
+    :param (tuple) gne_arguments: minimum frequency, maximum frequency, bandwidth and step of
+           'To Harmonicity (gne)'
+    :param (tuple) ranges: horizontal and vertical ranges of the mean, standard deviation and
+           quartiles, see get_matrix_cells
+    :param (float) segment_duration: maximum duration of a segment, in seconds
+    :param (float) segment_overlap: overlap of consecutive segments, in seconds (default: 0.5)
+    :return: a dictionary of mentioned attributes
+    """
+    average, total = None, None
+
+    bounds = get_segment_bounds(sound.xmin, sound.xmax, segment_duration, segment_overlap)
+    for start_time, end_time in bounds:
+        with timer("praat.gne_segment"):
+            segment = call(sound, "Extract part", start_time, end_time, "rectangular", 1.0, "no")
+            matrix = call(segment, "To Harmonicity (gne)", *gne_arguments)
+        if total is None:
+            # The first segment matrix holds the average, so it keeps the axes of a GNE matrix
+            average, total = matrix, matrix.values.copy()
+        else:
+            total += matrix.values
+        # Only the running sum outlives the segment
+        del segment, matrix
 
+    average.values = total / len(bounds)
+    return get_gne_matrix_attributes(average, ranges), None
 
+
+@profiled("praat.get_local_jitter")
 def get_local_jitter(
     sound,
     min_time=0.0,
@@ -429,11 +1130,12 @@ def get_local_jitter(
     period_floor=0.0001,
     period_ceiling=0.02,
     max_period_factor=1.3,
+    engine="praat",
 ):
     """
     Function to calculate (local) jitter from a periodic PointProcess.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
     :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
            NOTE: If max_time <= min_time, the entire time domain is considered
@@ -445,10 +1147,24 @@ def get_local_jitter(
            computation of jitter, in seconds (default: 0.02)
     :param (float) max_period_factor: the largest possible difference between consecutive intervals
            that will be used in the computation of jitter (default: 1.3)
+    :param (str) engine: 'praat', or 'numpy' for the pitch and cross-correlation pulses of
+           utils.voice_engine instead of the PointProcess (default: 'praat')
     :return: value of (local) jitter
     """
-    # Create a PointProcess object
-    point_process = call(sound, "To PointProcess (periodic, cc)", pitch_floor, pitch_ceiling)
+    if engine not in ENGINES:
+        raise ValueError("Argument for @engine is not recognized!")
+    if engine == "numpy":
+        return get_jitter_local(
+            get_analyzer(sound).native_pulses(pitch_floor, pitch_ceiling),
+            min_time,
+            max_time,
+            period_floor,
+            period_ceiling,
+            max_period_factor,
+        )
+
+    # Get a PointProcess object
+    point_process = get_analyzer(sound).point_process(pitch_floor, pitch_ceiling)
 
     local_jitter = call(
         point_process,
@@ -463,6 +1179,7 @@ def get_local_jitter(
     return local_jitter
 
 
+@profiled("praat.get_local_shimmer")
 def get_local_shimmer(
     sound,
     min_time=0.0,
@@ -473,11 +1190,12 @@ def get_local_shimmer(
     period_ceiling=0.02,
     max_period_factor=1.3,
     max_amplitude_factor=1.6,
+    engine="praat",
 ):
     """
     Function to calculate (local) shimmer from a periodic PointProcess.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
     :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
            NOTE: If max_time <= min_time, the entire time domain is considered
@@ -490,13 +1208,32 @@ def get_local_shimmer(
     :param (float) max_period_factor: the largest possible difference between consecutive intervals
            that will be used in the computation of shimmer (default: 1.3)
     :param (float) max_amplitude_factor: maximum amplitude factor for shimmer (default: 1.6)
+    :param (str) engine: 'praat', or 'numpy' for the pitch and cross-correlation pulses of
+           utils.voice_engine instead of the PointProcess (default: 'praat')
     :return: value of (local) shimmer
     """
-    # Create a PointProcess object
-    point_process = call(sound, "To PointProcess (periodic, cc)", pitch_floor, pitch_ceiling)
+    analyzer = get_analyzer(sound)
+
+    if engine not in ENGINES:
+        raise ValueError("Argument for @engine is not recognized!")
+    if engine == "numpy":
+        return get_shimmer_local(
+            analyzer.samples,
+            analyzer.sound.sampling_frequency,
+            analyzer.native_pulses(pitch_floor, pitch_ceiling),
+            min_time,
+            max_time,
+            period_floor,
+            period_ceiling,
+            max_period_factor,
+            max_amplitude_factor,
+        )
+
+    # Get a PointProcess object
+    point_process = analyzer.point_process(pitch_floor, pitch_ceiling)
 
     local_shimmer = call(
-        [sound, point_process],
+        [analyzer.sound, point_process],
         "Get shimmer (local)",
         min_time,
         max_time,
@@ -509,6 +1246,7 @@ def get_local_shimmer(
     return local_shimmer
 
 
+@profiled("praat.get_spectrum_attributes")
 def get_spectrum_attributes(
     sound,
     band_floor=200.0,
@@ -521,13 +1259,14 @@ def get_spectrum_attributes(
     moment=3.0,
     return_values=False,
     replacement_for_nan=0.0,
+    segment_duration=None,
 ):
     """
     Function to get spectrum-based attributes such as center of gravity, skewness, kurtosis, etc.
 
     NOTE: All frequency units are 'Hertz' in this function.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (float) band_floor: minimum pitch for the general case (default: 200.)
     :param (float) band_ceiling: maximum pitch for the general case (default: 1000.)
     :param (float) low_band_floor: minimum pitch of low band in difference (default: 0.)
@@ -538,13 +1277,18 @@ def get_spectrum_attributes(
            second central moment (default: 2.)
     :param (float) moment: nth central spectral moments, the average over the entire frequency
            domain (default: [3.])
-    :param (bool) return_values: whether to return a continuous list of pitch values from all frames
-           or not
-    :param (float) replacement_for_nan: a float number that will represent frames with NaN values
-    :return: (a dictionary of mentioned attributes, a list of pitch values OR None)
+    :param (bool) return_values: whether to return the real parts of all frequency bins or not
+           NOTE: With @segment_duration, these are the magnitudes of the averaged spectrum.
+    :param (float) replacement_for_nan: a float number that will represent bins with NaN values
+    :param (float) segment_duration: for long recordings, average the spectra of overlapping
+           segments of this many seconds instead of transforming the whole sound at once, which
+           bounds the memory and smooths the spectrum to bins of 1 / @segment_duration Hz
+           (see get_welch_spectrum) (default: None, one spectrum of the whole sound)
+    :return: (a dictionary of mentioned attributes, a float32 array (np.array) of the real parts
+              of the spectrum OR None)
     """
-    # Create a Spectrum object
-    spectrum = call(sound, "To Spectrum", "yes")
+    # Get a Spectrum object
+    spectrum = get_analyzer(sound).spectrum(segment_duration)
 
     attributes = dict()
 
@@ -577,17 +1321,13 @@ def get_spectrum_attributes(
     spectrum_values = None
 
     if return_values:
-        spectrum_values = [
-            call(spectrum, "Get real value in bin", bin_no) for bin_no in range(len(spectrum))
-        ]
-        # Convert NaN values to floats (default: 0)
-        spectrum_values = [
-            val if not math.isnan(val) else replacement_for_nan for val in spectrum_values
-        ]
+        # Row 0 holds the real parts of bins 1 to num_bins ('Get real value in bin')
+        spectrum_values = replace_nan(spectrum.values[0], replacement_for_nan)
 
     return attributes, spectrum_values
 
 
+@profiled("praat.get_formant_attributes")
 def get_formant_attributes(
     sound,
     time_step=0.0,
@@ -605,7 +1345,7 @@ def get_formant_attributes(
     Function to get formant-related attributes such as mean and median formants.
     Adapted from David Feinberg's work: https://github.com/drfeinberg/PraatScripts
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (float) time_step: the measurement interval (frame duration), in seconds (default: 0.0)
     :param (float) pitch_floor: minimum pitch (default: 75.)
     :param (float) pitch_ceiling: maximum pitch (default: 600.)
@@ -617,73 +1357,46 @@ def get_formant_attributes(
            increase by 6 dB/octave (default: 50.)
     :param (str) unit: units of the result, 'Hertz' or 'Bark' (default: 'Hertz)
     :param (str) interpolation_method: method of sampling new data points with (default: 'Linear)
+           NOTE: Praat only offers 'Linear' interpolation for formants.
     :param (float) replacement_for_nan: a float number that will represent frames with NaN values
            (default: 0.)
     :return: a dictionary of mentioned attributes
     """
-    # Create PointProcess object
-    point_process = call(sound, "To PointProcess (periodic, cc)", pitch_floor, pitch_ceiling)
+    if interpolation_method.lower() != "linear":
+        raise ValueError("Argument for @interpolation_method is not recognized!")
 
-    # Create Formant object
-    formant = call(
-        sound,
-        "To Formant (burg)",
-        time_step,
-        max_num_formants,
-        max_formant,
-        window_length,
-        pre_emphasis_from,
-    )
+    analyzer = get_analyzer(sound)
 
-    # Get number of points in PointProcess
-    num_points = call(point_process, "Get number of points")
-    if num_points == 0:
-        return dict(), None
+    # Get PointProcess object
+    point_process = analyzer.point_process(pitch_floor, pitch_ceiling)
 
-    f1_list, f2_list, f3_list, f4_list = [], [], [], []
+    # Get Formant object
+    formant = analyzer.formant(
+        time_step, max_num_formants, max_formant, window_length, pre_emphasis_from
+    )
 
     # Measure formants only at glottal pulses
-    for point in range(1, num_points + 1):
-        t = call(point_process, "Get time from index", point)
-        f1 = call(formant, "Get value at time", 1, t, unit, interpolation_method)
-        f2 = call(formant, "Get value at time", 2, t, unit, interpolation_method)
-        f3 = call(formant, "Get value at time", 3, t, unit, interpolation_method)
-        f4 = call(formant, "Get value at time", 4, t, unit, interpolation_method)
-        f1_list.append(f1 if not math.isnan(f1) else replacement_for_nan)
-        f2_list.append(f2 if not math.isnan(f2) else replacement_for_nan)
-        f3_list.append(f3 if not math.isnan(f3) else replacement_for_nan)
-        f4_list.append(f4 if not math.isnan(f4) else replacement_for_nan)
+    pulse_times = get_point_times(point_process)
+    if len(pulse_times) == 0:
+        return dict(), None
+
+    formant_values = sample_formant_tracks(formant, pulse_times, num_formants=4, unit=unit)
+    formant_values[np.isnan(formant_values)] = replacement_for_nan
 
     attributes = dict()
 
-    # Calculate mean formants across pulses
-    attributes["f1_mean"] = statistics.mean(f1_list)
-    attributes["f2_mean"] = statistics.mean(f2_list)
-    attributes["f3_mean"] = statistics.mean(f3_list)
-    attributes["f4_mean"] = statistics.mean(f4_list)
-
-    # Calculate median formants across pulses
-    attributes["f1_median"] = statistics.median(f1_list)
-    attributes["f2_median"] = statistics.median(f2_list)
-    attributes["f3_median"] = statistics.median(f3_list)
-    attributes["f4_median"] = statistics.median(f4_list)
-
-    # calculate the formant max and min
-    attributes["f1_max"] = max(f1_list)
-    attributes["f2_max"] = max(f2_list)
-    attributes["f3_max"] = max(f3_list)
-    attributes["f4_max"] = max(f4_list)
-
-    attributes["f1_min"] = min(f1_list)
-    attributes["f2_min"] = min(f2_list)
-    attributes["f3_min"] = min(f3_list)
-    attributes["f4_min"] = min(f4_list)
-
-    # calculate the formant entropy
-    attributes["f1_entropy"] = calculate_entropy(f1_list)
-    attributes["f2_entropy"] = calculate_entropy(f2_list)
-    attributes["f3_entropy"] = calculate_entropy(f3_list)
-    attributes["f4_entropy"] = calculate_entropy(f4_list)
+    # Calculate mean, median, max, min and entropy of every formant across pulses
+    for name, statistic in [
+        ("mean", np.mean),
+        ("median", np.median),
+        ("max", np.max),
+        ("min", np.min),
+        ("entropy", calculate_entropy),
+    ]:
+        for formant_no in range(1, 5):
+            attributes[f"f{formant_no}_{name}"] = float(
+                statistic(formant_values[:, formant_no - 1])
+            )
 
     # Formant Dispersion (Fitch, W. T. (1997). Vocal tract length and formant frequency
     # dispersion correlate with body size in rhesus macaques. The Journal of the Acoustical
@@ -738,58 +1451,45 @@ def get_formant_attributes(
     return attributes, None
 
 
+@profiled("praat.get_speaking_rate")
 def get_speaking_rate(sound, text):
     """
     Function to get speaking rate, approximated as number of words divided by total duration.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (str) text: text associated with the sound wave
     :return: speaking rate
     """
     # Get total duration of the sound
-    duration = call(sound, "Get end time")
+    duration = get_analyzer(sound).duration
 
     # Approximate speaking rate as #words / duration
     return len(text.split()) / duration
 
 
-def get_voiced_unvoiced_segments(sound):
-    silence = call(
-        sound, "To TextGrid (silences)", 100, 0.0, -25.0, 0.05, 0.1, "silent", "sounding"
-    )
-    num_segments = call(silence, "Get number of intervals", 1)
-    voice_lengths = []
-    unvoice_lengths = []
-    for i in range(1, num_segments + 1):
-        label = call(silence, "Get label of interval", 1, i)
-        if label == "sounding":
-            voice_lengths.append(
-                call(silence, "Get end time of interval", 1, i)
-                - call(silence, "Get start time of interval", 1, i)
-            )
-        else:
-            unvoice_lengths.append(
-                call(silence, "Get end time of interval", 1, i)
-                - call(silence, "Get start time of interval", 1, i)
-            )
-    attributes = dict()
-    attributes["voice_lengths"] = voice_lengths
-    attributes["unvoice_lengths"] = unvoice_lengths
-    attributes["voice_length_mean"] = np.mean(voice_lengths)
-    attributes["voice_length_std"] = np.std(voice_lengths)
-    attributes["unvoice_length_mean"] = np.mean(unvoice_lengths)
-    attributes["unvoice_length_std"] = np.std(unvoice_lengths)
-    attributes["voice_length_min"] = np.min(voice_lengths)
-    attributes["voice_length_max"] = np.max(voice_lengths)
-    attributes["unvoice_length_min"] = np.min(unvoice_lengths)
-    attributes["unvoice_length_max"] = np.max(unvoice_lengths)
-    attributes["voice_length_entropy"] = calculate_entropy(voice_lengths)
-    attributes["unvoice_length_entropy"] = calculate_entropy(unvoice_lengths)
-    attributes["speech_ratio"] = sum(voice_lengths) / (sum(voice_lengths) + sum(unvoice_lengths))
-
-    return attributes, [voice_lengths, unvoice_lengths]
+@profiled("praat.get_voiced_unvoiced_segments")
+def get_voiced_unvoiced_segments(sound, engine="praat"):
+    """
+    Function to summarize the lengths of the sounding and silent intervals of a sound.
 
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
+    :param (str) engine: 'praat' for 'To TextGrid (silences)', or 'numpy' for the energy-based
+           detector of utils.voice_engine (default: 'praat')
+    :return: a dictionary of attributes, and the lists of voiced and unvoiced lengths
+    """
+    if engine not in ENGINES:
+        raise ValueError("Argument for @engine is not recognized!")
+
+    analyzer = get_analyzer(sound)
+    if engine == "numpy":
+        intervals = analyzer.native_silence_intervals()
+    else:
+        intervals = analyzer.silence_intervals()
+
+    return get_segment_length_attributes(intervals)
 
+
+@profiled("praat.get_lfcc")
 def get_lfcc(
     sound,
     lpc_method="autocorrelation",
@@ -802,7 +1502,7 @@ def get_lfcc(
     """
     Function calculate LFCC (Linear Frequency Cepstral Coefficients).
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (str) lpc_method: method for calculating linear prediction coefficients (LPC)
            (default: 'autocorrelation')
     :param (int) prediction_order: the number of linear prediction coefficients (LPC) (default: 16)
@@ -819,7 +1519,7 @@ def get_lfcc(
     # Create LPC object
     if lpc_method != "maple":
         lpc = call(
-            sound,
+            get_analyzer(sound).sound,
             "To LPC (%s)" % lpc_method,
             prediction_order,
             window_length,
@@ -828,7 +1528,7 @@ def get_lfcc(
         )
     else:
         lpc = call(
-            sound,
+            get_analyzer(sound).sound,
             "To LPC (%s)" % lpc_method,
             prediction_order,
             window_length,
@@ -840,18 +1540,12 @@ def get_lfcc(
 
     # Create LFCC object
     lfcc = call(lpc, "To LFCC", num_coefficients)
-    num_frames = call(lfcc, "Get number of frames")
-
-    lfcc_matrix = np.zeros((num_frames, num_coefficients))
-
-    for frame_no in range(1, num_frames + 1):
-        for coefficient_no in range(1, num_coefficients + 1):
-            coefficient_value = call(lfcc, "Get value in frame", frame_no, coefficient_no)
-            lfcc_matrix[frame_no - 1, coefficient_no - 1] = coefficient_value
+    lfcc_matrix = get_cepstral_matrix(lfcc, num_coefficients)
 
     return lfcc_matrix
 
 
+@profiled("praat.get_mfcc")
 def get_mfcc(
     sound,
     num_coefficients=12,
@@ -871,7 +1565,7 @@ def get_mfcc(
     5. Take the DCT of the log filterbank energies,
     6. Finally, keep DCT coefficients 2-through-13.
 
-    :param (parselmouth.Sound) sound: sound waveform
+    :param (parselmouth.Sound or PraatAnalyzer) sound: sound waveform or its analyzer
     :param (int) num_coefficients: number of coefficients for DCT (default: 12)
     :param (float) window_length: the duration of the analysis window, in seconds (default: 0.015)
     :param (float) time_step: the measurement interval (frame duration), in seconds (default: 0.005)
@@ -882,7 +1576,7 @@ def get_mfcc(
     """
     # Create MFCC object
     mfcc = call(
-        sound,
+        get_analyzer(sound).sound,
         "To MFCC",
         num_coefficients,
         window_length,
@@ -891,47 +1585,71 @@ def get_mfcc(
         distance_between_filters,
         maximum_frequency,
     )
-    num_frames = call(mfcc, "Get number of frames")
+    mfcc_matrix = get_cepstral_matrix(mfcc, num_coefficients)
 
-    mfcc_matrix = np.zeros((num_frames, num_coefficients))
+    return mfcc_matrix
 
-    for frame_no in range(1, num_frames + 1):
-        for coefficient_no in range(1, num_coefficients + 1):
-            coefficient_value = call(mfcc, "Get value in frame", frame_no, coefficient_no)
-            mfcc_matrix[frame_no - 1, coefficient_no - 1] = coefficient_value
 
-    return mfcc_matrix
+@profiled("praat.get_deltas")
+def get_deltas(matrix, step_size=2, order=1):
+    """
+    Function to get the delta matrices of a given matrix up to an arbitrary order in one call,
+    e.g. order=2 gives the velocity and the acceleration of MFCCs. Every order is computed with
+    padded array shifts over the frame axis (see get_delta).
+
+    :param (np.array) matrix: matrix of (conventionally) size (num_frames, num_coefficients), or a
+           batch of such matrices of size (batch_size, num_frames, num_coefficients)
+    :param (int) step_size: the step size used while calculating the delta distances (default: 2)
+    :param (int) order: the highest delta order to compute (default: 1)
+    :return: a list with the delta matrices of orders 1 to @order, each with the shape of @matrix
+    """
+    if step_size < 2:
+        raise ValueError("Argument for @step_size must be at least 2!")
+    if order < 1:
+        raise ValueError("Argument for @order must be at least 1!")
+
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.ndim < 2:
+        raise ValueError("Argument for @matrix must have a frame and a coefficient axis!")
+
+    num_frames = matrix.shape[-2]
+    max_shift = step_size - 1
+    # Shifts beyond the first/last frame reuse the first/last frame (edge padding)
+    pad_width = [(0, 0)] * (matrix.ndim - 2) + [(max_shift, max_shift), (0, 0)]
+    denominator = 2 * sum(step_no**2 for step_no in range(step_size))
+
+    deltas = []
+    for _ in range(order):
+        padded = np.pad(matrix, pad_width, mode="edge")
+        numerator = np.zeros_like(matrix)
+        # Step 0 contributes nothing, so the sum starts at step 1
+        for step_no in range(1, step_size):
+            end = max_shift + step_no
+            start = max_shift - step_no
+            numerator += step_no * (
+                padded[..., end : end + num_frames, :] - padded[..., start : start + num_frames, :]
+            )
+
+        matrix = numerator / denominator
+        deltas.append(matrix)
+
+    return deltas
 
 
-def get_delta(matrix, step_size=2):
+def get_delta(matrix, step_size=2, order=1):
     """
     Function to get a delta matrix on a given matrix, adapted from:
     http://practicalcryptography.com/miscellaneous/machine-learning/guide-mel-frequency-cepstral-coefficients-mfccs/
     If you get the delta of a MFCC matrix, you will get the velocity of MFCC. If you get the delta
     on this resulting velocity, you will get the acceleration of MFCCs.
 
-    :param (np.array) matrix: matrix of (conventionally) size (num_frames, num_coefficients)
+    For frame t, the delta is sum_n n * (c[t + n] - c[t - n]) / (2 * sum_n n^2) over the steps
+    n = 0..step_size-1, where frames outside the matrix are replaced by the first/last frame.
+
+    :param (np.array) matrix: matrix of (conventionally) size (num_frames, num_coefficients), or a
+           batch of such matrices of size (batch_size, num_frames, num_coefficients)
     :param (int) step_size: the step size used while calculating the delta distances
-    :return: matrix (gradients) of size (num_frames, num_coefficients)
+    :param (int) order: 1 for the delta, 2 for the delta of the delta, etc. (default: 1)
+    :return: matrix (gradients) with the shape of @matrix
     """
-    num_frames, num_coefficients = matrix.shape[0], matrix.shape[1]
-
-    delta = np.zeros((num_frames, num_coefficients))
-
-    for frame_no in range(num_frames):
-        numerator, denominator = 0.0, 0.0
-
-        for step_no in range(step_size):
-            start_coefficients, end_coefficients = matrix[0, :], matrix[num_frames - 1, :]
-            if frame_no - step_no >= 0:
-                start_coefficients = matrix[frame_no - step_no, :]
-            if frame_no + step_no < num_frames:
-                end_coefficients = matrix[frame_no + step_no, :]
-
-            numerator += step_no * (end_coefficients - start_coefficients)
-            denominator += step_no**2
-
-        denominator *= 2
-        delta[frame_no, :] = numerator / denominator
-
-    return delta
+    return get_deltas(matrix, step_size=step_size, order=order)[-1]
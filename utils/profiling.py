@@ -0,0 +1,384 @@
+"""
+Lightweight per-stage instrumentation for the feature and TTS pipelines: timers usable as context
+managers or decorators, named counters (e.g. Praat `call` invocations per command), peak-memory
+sampling, a per-run summary and an optional Chrome trace (chrome://tracing or ui.perfetto.dev).
+
+Profiling is off by default. While disabled, a timer is a shared no-op context manager and a
+counter is a single flag check, so instrumented code runs at practically full speed.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+
+# Single no-op context manager returned by timer() while profiling is disabled
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def get_rss():
+    """
+    :return: current resident set size of this process in bytes, or its peak so far where the
+             current value cannot be read
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return get_peak_rss()
+
+
+def get_peak_rss():
+    """
+    :return: peak resident set size of this process in bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """
+    Collects timing statistics, counters, trace events and memory samples of one process.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace = False
+        self.memory_interval = None
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop_sampler = threading.Event()
+        self.reset()
+
+    def reset(self):
+        # name -> [count, total seconds, min seconds, max seconds]
+        self.stats = dict()
+        self.counters = Counter()
+        self.events = []
+        self.memory_samples = []
+        self.peak_rss = dict()
+        self.start_time = time.perf_counter()
+
+    def enable(self, trace=False, memory_interval=0.05):
+        """
+        :param (bool) trace: also keep every span for write_chrome_trace (default: False)
+        :param (float) memory_interval: seconds between two memory samples, None to disable the
+               sampling thread (default: 0.05)
+        """
+        self.disable()
+        self.reset()
+        self.trace = trace
+        self.memory_interval = memory_interval
+        self.enabled = True
+
+        if memory_interval:
+            self._stop_sampler.clear()
+            self._sampler = threading.Thread(target=self._sample_memory, daemon=True)
+            self._sampler.start()
+
+    def disable(self):
+        self.enabled = False
+        if self._sampler is not None:
+            self._stop_sampler.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample_memory(self):
+        pid = os.getpid()
+        while True:
+            self.memory_samples.append((pid, time.perf_counter(), get_rss()))
+            if self._stop_sampler.wait(self.memory_interval):
+                return
+
+    def add_span(self, name, start, end):
+        seconds = end - start
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [1, seconds, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = min(stat[2], seconds)
+                stat[3] = max(stat[3], seconds)
+            if self.trace:
+                self.events.append((name, start, seconds, os.getpid(), threading.get_ident()))
+
+    def export(self):
+        """
+        :return: a picklable snapshot of the collected data, see merge
+        """
+        with self._lock:
+            peak_rss = dict(self.peak_rss)
+            peak_rss[os.getpid()] = max(peak_rss.get(os.getpid(), 0), get_peak_rss())
+            return {
+                "stats": {name: list(stat) for name, stat in self.stats.items()},
+                "counters": dict(self.counters),
+                "events": list(self.events),
+                "memory_samples": list(self.memory_samples),
+                "peak_rss": peak_rss,
+            }
+
+    def merge(self, state):
+        """
+        Function to add the data collected by another process, e.g. a run_batch worker.
+
+        :param (dict) state: snapshot returned by export
+        """
+        with self._lock:
+            for name, (count, total, minimum, maximum) in state["stats"].items():
+                stat = self.stats.get(name)
+                if stat is None:
+                    self.stats[name] = [count, total, minimum, maximum]
+                else:
+                    stat[0] += count
+                    stat[1] += total
+                    stat[2] = min(stat[2], minimum)
+                    stat[3] = max(stat[3], maximum)
+            self.counters.update(state["counters"])
+            self.events += state["events"]
+            self.memory_samples += state["memory_samples"]
+            for pid, peak in state["peak_rss"].items():
+                self.peak_rss[pid] = max(self.peak_rss.get(pid, 0), peak)
+
+
+class _Span:
+    __slots__ = ["name", "start"]
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _profiler.add_span(self.name, self.start, time.perf_counter())
+        return False
+
+
+_profiler = Profiler()
+
+
+def enable(trace=False, memory_interval=0.05):
+    """
+    Function to start collecting profiling data in this process, discarding earlier data.
+
+    :param (bool) trace: also keep every span for write_chrome_trace (default: False)
+    :param (float) memory_interval: seconds between two memory samples, None to disable the
+           sampling thread (default: 0.05)
+    """
+    _profiler.enable(trace=trace, memory_interval=memory_interval)
+
+
+def disable():
+    _profiler.disable()
+
+
+def is_enabled():
+    return _profiler.enabled
+
+
+def timer(name):
+    """
+    Context manager timing a stage under @name, e.g. `with timer("mel.stft"): ...`.
+
+    :param (str) name: stage name; spans with the same name are aggregated
+    :return: a context manager (a shared no-op while profiling is disabled)
+    """
+    if not _profiler.enabled:
+        return _NULL_TIMER
+    return _Span(name)
+
+
+def profiled(name=None):
+    """
+    Decorator timing every call of a function.
+
+    :param (str) name: stage name (default: None, the qualified function name)
+    """
+
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _profiler.enabled:
+                return fn(*args, **kwargs)
+            with _Span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, n=1):
+    """
+    :param (str) name: counter name
+    :param (int) n: increment (default: 1)
+    """
+    if _profiler.enabled:
+        with _profiler._lock:
+            _profiler.counters[name] += n
+
+
+def counted_call(call, prefix):
+    """
+    Function to wrap a command dispatcher such as parselmouth.praat.call so that every invocation
+    is counted per command, e.g. 'praat.call:To Pitch'.
+
+    :param (callable) call: dispatcher called as call(object(s), command, *arguments)
+    :param (str) prefix: counter name prefix, e.g. 'praat.call'
+    :return: the wrapped dispatcher
+    """
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        if _profiler.enabled:
+            command = args[1] if len(args) > 1 and isinstance(args[1], str) else "?"
+            count(f"{prefix}:{command}")
+        return call(*args, **kwargs)
+
+    return wrapper
+
+
+def get_worker_config():
+    """
+    :return: the settings a worker process needs to profile like this process, None if profiling
+             is disabled (see collect)
+    """
+    if not _profiler.enabled:
+        return None
+    return {"trace": _profiler.trace, "memory_interval": _profiler.memory_interval}
+
+
+def collect(config, fn, *args, **kwargs):
+    """
+    Function to run @fn in a worker process with profiling enabled and return what it collected,
+    so the parent process can merge it.
+
+    :param (dict) config: settings from get_worker_config
+    :param (callable) fn: function to run
+    :return: (result of @fn, profiling snapshot)
+    """
+    if not _profiler.enabled:
+        _profiler.enable(**config)
+    _profiler.reset()
+    result = fn(*args, **kwargs)
+    return result, _profiler.export()
+
+
+def merge(state):
+    """
+    :param (dict) state: profiling snapshot of another process (see collect)
+    """
+    _profiler.merge(state)
+
+
+def get_summary():
+    """
+    :return: a dictionary with per-stage statistics sorted by total time, counters, the peak
+             resident memory of every profiled process and the wall time since enable
+    """
+    state = _profiler.export()
+    stages = [
+        {
+            "name": name,
+            "count": count,
+            "total_seconds": total,
+            "mean_seconds": total / count,
+            "min_seconds": minimum,
+            "max_seconds": maximum,
+        }
+        for name, (count, total, minimum, maximum) in state["stats"].items()
+    ]
+    stages.sort(key=lambda stage: stage["total_seconds"], reverse=True)
+
+    return {
+        "wall_seconds": time.perf_counter() - _profiler.start_time,
+        "stages": stages,
+        "counters": dict(sorted(state["counters"].items(), key=lambda kv: kv[1], reverse=True)),
+        "peak_rss": state["peak_rss"],
+    }
+
+
+def print_summary(max_counters=20):
+    """
+    Function to print the per-run summary: time per stage, the most frequent counters and the
+    peak memory.
+
+    NOTE: Stage times are inclusive, nested stages are also part of their parent's time. Stages
+    run in worker processes add up across workers, so they can exceed the wall time.
+
+    :param (int) max_counters: number of counters to print (default: 20)
+    """
+    summary = get_summary()
+    print(f"Profile ({summary['wall_seconds']:.2f}s wall time)")
+    print(f"{'stage':<48} {'calls':>8} {'total':>10} {'mean':>10} {'max':>10}")
+    for stage in summary["stages"]:
+        print(
+            f"{stage['name']:<48} {stage['count']:>8} {stage['total_seconds']:>9.3f}s "
+            f"{stage['mean_seconds'] * 1e3:>8.2f}ms {stage['max_seconds'] * 1e3:>8.2f}ms"
+        )
+
+    counters = list(summary["counters"].items())
+    if counters:
+        print(f"{'counter':<48} {'count':>8}")
+        for name, value in counters[:max_counters]:
+            print(f"{name:<48} {value:>8}")
+        if len(counters) > max_counters:
+            print(f"... {len(counters) - max_counters} more counters")
+
+    peaks = summary["peak_rss"]
+    main_peak = peaks.get(os.getpid(), 0)
+    print(f"Peak memory: {main_peak / 2**20:.1f} MiB (main process)", end="")
+    worker_peaks = [peak for pid, peak in peaks.items() if pid != os.getpid()]
+    if worker_peaks:
+        print(f", {max(worker_peaks) / 2**20:.1f} MiB (largest of {len(worker_peaks)} workers)")
+    else:
+        print()
+
+
+def write_chrome_trace(path):
+    """
+    Function to write the recorded spans and memory samples in the Chrome trace event format.
+    Spans are only recorded with enable(trace=True).
+
+    :param (str) path: output JSON path
+    """
+    state = _profiler.export()
+    origin = _profiler.start_time
+
+    events = [
+        {
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": (start - origin) * 1e6,
+            "dur": seconds * 1e6,
+            "pid": pid,
+            "tid": tid,
+        }
+        for name, start, seconds, pid, tid in state["events"]
+    ]
+    events += [
+        {
+            "name": "memory",
+            "ph": "C",
+            "ts": (t - origin) * 1e6,
+            "pid": pid,
+            "args": {"rss_MiB": rss / 2**20},
+        }
+        for pid, t, rss in state["memory_samples"]
+    ]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
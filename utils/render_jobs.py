@@ -0,0 +1,124 @@
+"""
+Concurrent runner for external rendering commands such as ffmpeg. Commands are run as argument
+lists (no shell), outputs are written to a temporary file and moved into place on success, and jobs
+whose output is newer than all of their inputs are skipped.
+"""
+
+import os
+import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from tqdm.auto import tqdm
+
+# @command is the full argument list without the output path, which the runner appends
+RenderJob = namedtuple("RenderJob", ["command", "inputs", "output"])
+RenderResult = namedtuple("RenderResult", ["job", "status", "seconds", "error"])
+
+STATUS_DONE, STATUS_SKIPPED, STATUS_FAILED = "done", "skipped", "failed"
+
+
+def is_up_to_date(job):
+    """
+    :param (RenderJob) job: a rendering job
+    :return: True if the output exists and is newer than every input
+    """
+    output = Path(job.output)
+    if not output.exists():
+        return False
+    output_time = output.stat().st_mtime
+    return all(Path(path).stat().st_mtime <= output_time for path in job.inputs)
+
+
+def get_partial_path(output):
+    """
+    :param (str) output: final output path
+    :return: temporary path with the same extension, so tools still infer the output format
+    """
+    output = Path(output)
+    return output.with_name(f"{output.stem}.partial{output.suffix}")
+
+
+def run_render_job(job, skip_up_to_date=True, timeout=None):
+    """
+    Function to run one rendering job.
+
+    :param (RenderJob) job: a rendering job
+    :param (bool) skip_up_to_date: do not run jobs whose output is up to date (default: True)
+    :param (float) timeout: maximum run time of the command, in seconds (default: None)
+    :return: a RenderResult
+    """
+    if skip_up_to_date and is_up_to_date(job):
+        return RenderResult(job, STATUS_SKIPPED, 0.0, None)
+
+    os.makedirs(Path(job.output).parent, exist_ok=True)
+    partial_path = get_partial_path(job.output)
+
+    start_time = time.perf_counter()
+    try:
+        process = subprocess.run(
+            [str(argument) for argument in job.command] + [str(partial_path)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+        )
+        error = None
+        if process.returncode != 0:
+            stderr = process.stderr.decode(errors="replace").strip().splitlines()
+            error = f"exit code {process.returncode}: " + " | ".join(stderr[-3:])
+    except (OSError, subprocess.TimeoutExpired) as e:
+        error = repr(e)
+    seconds = time.perf_counter() - start_time
+
+    if error is None:
+        os.replace(partial_path, job.output)
+        return RenderResult(job, STATUS_DONE, seconds, None)
+
+    if partial_path.exists():
+        partial_path.unlink()
+    return RenderResult(job, STATUS_FAILED, seconds, error)
+
+
+def run_render_jobs(jobs, num_workers=None, skip_up_to_date=True, timeout=None, desc=None):
+    """
+    Function to run rendering jobs with a fixed number of concurrent processes.
+
+    :param (list) jobs: RenderJob tuples
+    :param (int) num_workers: number of commands run at the same time (default: CPU count)
+    :param (bool) skip_up_to_date: see run_render_job (default: True)
+    :param (float) timeout: see run_render_job (default: None)
+    :param (str) desc: progress bar description (default: None)
+    :return: a list of RenderResult aligned with @jobs
+    """
+    num_workers = num_workers or os.cpu_count()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(run_render_job, job, skip_up_to_date, timeout) for job in jobs]
+        return [future.result() for future in tqdm(futures, desc=desc)]
+
+
+def report_render_results(results, wall_time=None):
+    """
+    Function to print a summary of rendering results: counts per status, per-job timing and the
+    failed jobs.
+
+    :param (list) results: RenderResult tuples (see run_render_jobs)
+    :param (float) wall_time: total elapsed time of the run, in seconds (default: None)
+    """
+    rendered = [result for result in results if result.status == STATUS_DONE]
+    failed = [result for result in results if result.status == STATUS_FAILED]
+    skipped = len(results) - len(rendered) - len(failed)
+
+    print(f"Rendered: {len(rendered)}, skipped (up to date): {skipped}, failed: {len(failed)}")
+    if rendered:
+        seconds = sorted(result.seconds for result in rendered)
+        print(
+            f"Per job: mean {sum(seconds) / len(seconds):.2f}s, "
+            f"median {seconds[len(seconds) // 2]:.2f}s, max {seconds[-1]:.2f}s"
+        )
+    if wall_time:
+        print(f"Wall time: {wall_time:.1f}s ({len(rendered) / wall_time:.2f} jobs/s)")
+    for result in failed:
+        print("Error:", result.job.output, result.error)
@@ -0,0 +1,320 @@
+"""
+Summary statistics of frame tracks (intensity, pitch, harmonicity, ...) for many tracks at once.
+Tracks are stacked into one NaN-padded matrix and every statistic is computed by vectorized
+operations along its rows, so a batch of files gives one statistics matrix instead of one Praat
+query per statistic and file.
+
+Over the whole time domain the results are those of Praat's 'Get minimum', 'Get time of minimum',
+'Get maximum', 'Get time of maximum', 'Get mean', 'Get standard deviation' and 'Get quantile'
+(Hazen quantiles of the sorted frame values, extrema refined by parabolic interpolation).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from utils.entropy import calculate_entropy_rows
+
+Track = namedtuple("Track", ["values", "x1", "dx", "xmin", "xmax"])
+
+# Frames of many tracks in one NaN-padded matrix, see stack_tracks
+StackedTracks = namedtuple(
+    "StackedTracks",
+    ["values", "lengths", "x1", "dx", "xmin", "xmax", "before", "after", "start", "end"],
+)
+
+STATISTICS = (
+    "min",
+    "time_of_min",
+    "max",
+    "time_of_max",
+    "mean",
+    "stddev",
+    "q1",
+    "median",
+    "q3",
+    "entropy",
+    "skew",
+    "kurtosis",
+)
+
+# Interpolation methods of the extrema
+INTERPOLATION_METHODS = ("None", "Parabolic")
+
+
+def get_statistic_names(percentiles=()):
+    """
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :return: a list of the statistic names, in the column order of get_track_statistics
+    """
+    return list(STATISTICS) + [f"p{percentile:g}" for percentile in percentiles]
+
+
+def get_value_at_time(track, time):
+    """
+    Function to get the value of a track at a time as Praat's 'Get value at time' with linear
+    interpolation does: the nearest frame is interpolated towards its other neighbour, and the
+    nearest frame alone is used when that neighbour is outside the track or undefined.
+
+    :param (Track) track: frame values and time axis
+    :param (float) time: time, in seconds
+    :return: the value at @time, NaN if undefined
+    """
+    num_frames = len(track.values)
+    real_index = (time - track.x1) / track.dx
+    left_index = int(np.floor(real_index))
+    phase = real_index - left_index
+    if phase < 0.5:
+        near_index, far_index = left_index, left_index + 1
+    else:
+        near_index, far_index = left_index + 1, left_index
+        phase = 1.0 - phase
+
+    if time < track.xmin or time > track.xmax or not 0 <= near_index < num_frames:
+        return np.nan
+    near = track.values[near_index]
+    if not 0 <= far_index < num_frames or np.isnan(near) or np.isnan(track.values[far_index]):
+        return near
+    return near + phase * (track.values[far_index] - near)
+
+
+def stack_tracks(tracks, min_time=0.0, max_time=0.0):
+    """
+    Function to stack tracks of different lengths into one matrix, keeping only the frames whose
+    centers lie in the time range (t1, t2).
+
+    :param (list) tracks: Track tuples
+    :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
+    :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
+           NOTE: If max_time <= min_time, the entire time domain is considered
+    :return: a StackedTracks tuple of the NaN-padded frame matrix with shape
+             (num_tracks, max_num_frames) and, per track, the number of kept frames, the time of
+             the first kept frame, the time step, the start and end times of the considered range,
+             the values of the frames just before and after the kept ones (NaN if none), and the
+             values at the start and end times (see get_value_at_time)
+    """
+    num_tracks = len(tracks)
+    x1, dx, xmin, xmax = (
+        np.array([getattr(track, field) for track in tracks], dtype=np.float64)
+        for field in ("x1", "dx", "xmin", "xmax")
+    )
+    first, last = np.zeros(num_tracks, dtype=np.int64), np.zeros(num_tracks, dtype=np.int64)
+
+    for i, track in enumerate(tracks):
+        last[i] = len(track.values)
+        if max_time > min_time:
+            first[i] = max(0, int(np.ceil((min_time - track.x1) / track.dx)))
+            last[i] = min(last[i], int(np.floor((max_time - track.x1) / track.dx)) + 1)
+    if max_time > min_time:
+        xmin, xmax = np.maximum(xmin, min_time), np.minimum(xmax, max_time)
+
+    lengths = np.maximum(last - first, 0)
+    values = np.full((num_tracks, max(lengths, default=0)), np.nan)
+    before, after = np.full(num_tracks, np.nan), np.full(num_tracks, np.nan)
+    start, end = np.empty(num_tracks), np.empty(num_tracks)
+    for i, track in enumerate(tracks):
+        values[i, : lengths[i]] = track.values[first[i] : first[i] + lengths[i]]
+        if lengths[i] and first[i] > 0:
+            before[i] = track.values[first[i] - 1]
+        if lengths[i] and last[i] < len(track.values):
+            after[i] = track.values[last[i]]
+        start[i] = get_value_at_time(track, xmin[i])
+        end[i] = get_value_at_time(track, xmax[i])
+
+    return StackedTracks(
+        values, lengths, x1 + first * dx, dx, xmin, xmax, before, after, start, end
+    )
+
+
+def get_extrema(stacked, interpolation_method="Parabolic", interpolated_borders=False):
+    """
+    Function to get the minimum and maximum of every track, with the time at which they occur.
+    As in Praat, a local extremum between two defined neighbours is refined by fitting a parabola
+    through the three frames, while a frame next to an undefined one or at the border of the
+    track only counts with its own value. Neighbours outside the considered time range still
+    count as neighbours.
+
+    :param (StackedTracks) stacked: tracks returned by stack_tracks
+    :param (str) interpolation_method: 'None' or 'Parabolic' (default: 'Parabolic')
+    :param (bool) interpolated_borders: with 'Parabolic', also consider the values at the start
+           and end times of the range, as Praat does for tracks with undefined frames (Pitch);
+           otherwise the first and last frames of the range count with their own value, as for
+           Intensity and Harmonicity (default: False)
+    :return: (minima, times of the minima, maxima, times of the maxima), arrays with shape
+             (num_tracks,), NaN for tracks without defined frames
+    """
+    if interpolation_method not in INTERPOLATION_METHODS:
+        raise ValueError("Argument for @interpolation_method is not recognized!")
+
+    values, lengths = stacked.values, stacked.lengths
+    num_tracks, num_frames = values.shape
+    defined = ~np.isnan(values)
+    times = stacked.x1[:, None] + np.arange(num_frames) * stacked.dx[:, None]
+    rows = np.arange(num_tracks)
+    has_last = lengths > 0
+    last_frames = lengths[has_last] - 1
+
+    extrema = []
+    for sign in (1.0, -1.0):
+        # Maxima are the minima of the negated track
+        y = sign * values
+        candidates = np.where(defined, y, np.inf)
+        candidate_times = times
+
+        # Without interpolation, a track with undefined frames simply takes its extreme frame
+        if interpolation_method == "Parabolic" or not interpolated_borders:
+            left = np.full_like(y, np.nan)
+            left[:, 1:] = y[:, :-1]
+            right = np.full_like(y, np.nan)
+            right[:, :-1] = y[:, 1:]
+            if num_frames:
+                left[:, 0] = sign * stacked.before
+                right[rows[has_last], last_frames] = sign * stacked.after[has_last]
+
+            is_border = np.isnan(left) | np.isnan(right)
+            if not interpolated_borders and num_frames:
+                is_border[:, 0] = True
+                is_border[rows[has_last], last_frames] = True
+            # Comparisons with NaN neighbours are False, so only interior frames remain
+            is_local = (y < left) & (y <= right)
+            local_candidates, local_times = y, times
+            if interpolation_method == "Parabolic":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    dy = 0.5 * (right - left)
+                    d2y = 2.0 * y - left - right
+                    local_candidates = y + 0.5 * dy * dy / d2y
+                    local_times = times + stacked.dx[:, None] * dy / d2y
+            is_border &= defined
+            candidates = np.where(is_border, y, np.inf)
+            # A frame at the border of the range can also be a refined local extremum
+            is_refined = is_local & (local_candidates < candidates)
+            candidates = np.where(is_refined, local_candidates, candidates)
+            candidate_times = np.where(is_refined, local_times, times)
+
+            if not interpolated_borders and num_frames > 1:
+                # Praat checks the first and the last frame of the range before the others, so
+                # they win ties: reorder the columns as first, last, second, third, ...
+                order = np.maximum(np.arange(num_frames) - 1, 0)[None, :].repeat(num_tracks, 0)
+                order[:, 1] = np.maximum(lengths - 1, 0)
+                candidates = np.take_along_axis(candidates, order, axis=1)
+                candidate_times = np.take_along_axis(candidate_times, order, axis=1)
+
+            if interpolated_borders:
+                # Praat checks the start and end values first, so they win ties
+                borders = sign * np.stack([stacked.start, stacked.end], axis=1)
+                candidates = np.hstack([np.where(np.isnan(borders), np.inf, borders), candidates])
+                candidate_times = np.hstack(
+                    [np.stack([stacked.xmin, stacked.xmax], axis=1), candidate_times]
+                )
+
+        extremum, time = np.full(num_tracks, np.nan), np.full(num_tracks, np.nan)
+        if candidates.shape[1]:
+            best = np.argmin(candidates, axis=1)
+            found = np.isfinite(candidates[rows, best])
+            extremum[found] = sign * candidates[rows, best][found]
+            time[found] = candidate_times[rows, best][found]
+        extrema += [extremum, np.clip(time, stacked.xmin, stacked.xmax)]
+
+    return tuple(extrema)
+
+
+def get_quantiles(values, quantiles):
+    """
+    Function to get quantiles of the defined values of every row as Praat's 'Get quantile' does,
+    i.e. linear interpolation between the sorted values at the (1-based) position q * n + 0.5.
+
+    :param (np.array) values: a NaN-padded matrix with shape (num_tracks, num_frames)
+    :param (list) quantiles: quantiles, in [0, 1]
+    :return: a matrix (np.array) with shape (num_tracks, num_quantiles), NaN for rows without
+             defined values
+    """
+    # NaN values are sorted to the end of every row
+    sorted_values = np.sort(values, axis=1)
+    counts = np.count_nonzero(~np.isnan(values), axis=1)[:, None]
+    rows = np.arange(len(values))[:, None]
+
+    places = np.asarray(quantiles, dtype=np.float64)[None, :] * counts + 0.5
+    left = np.clip(np.floor(places).astype(np.int64), 1, np.maximum(counts, 1))
+    right = np.minimum(left + 1, np.maximum(counts, 1))
+    left_values = sorted_values[rows, left - 1] if sorted_values.size else np.nan
+    right_values = sorted_values[rows, right - 1] if sorted_values.size else np.nan
+
+    result = np.where(
+        left >= counts, left_values, left_values + (places - left) * (right_values - left_values)
+    )
+    return np.where(counts > 0, result, np.nan)
+
+
+def get_track_statistics(
+    tracks,
+    min_time=0.0,
+    max_time=0.0,
+    interpolation_method="Parabolic",
+    interpolated_borders=False,
+    excluded_value=None,
+    replacement_for_nan=0.0,
+    percentiles=(),
+):
+    """
+    Function to get the summary statistics of many tracks at once, see STATISTICS:
+    - min, max and their times come from get_extrema
+    - mean, stddev (n - 1 denominator), q1, median, q3, skew, kurtosis (excess, i.e. 0 for a
+      normal distribution) and the percentiles are computed over the defined values
+    - entropy is the normalized entropy of all frames, with NaN values replaced
+
+    NOTE: Within a time range (t1, t2), mean and stddev are plain averages over the frames in the
+    range, whereas Praat weights the partial frames at the borders of the range.
+
+    :param (list) tracks: Track tuples, e.g. one per file
+    :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
+    :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
+           NOTE: If max_time <= min_time, the entire time domain is considered
+    :param (str) interpolation_method: 'None' or 'Parabolic' (default: 'Parabolic')
+    :param (bool) interpolated_borders: see get_extrema; True for pitch tracks (default: False)
+    :param (float) excluded_value: a value that does not count as defined for the distribution
+           statistics, only for the extrema and the entropy, e.g. -200 for silent harmonicity
+           frames (default: None)
+    :param (float) replacement_for_nan: a float number that will represent frames with NaN values
+           in the entropy (default: 0.)
+    :param (list) percentiles: additional percentiles, in [0, 100] (default: ())
+    :return: a matrix (np.array) with shape (num_tracks, num_statistics), columns named by
+             get_statistic_names(@percentiles)
+    """
+    stacked = stack_tracks(tracks, min_time, max_time)
+    values, lengths = stacked.values, stacked.lengths
+    num_tracks, num_frames = values.shape
+
+    statistics = np.full((num_tracks, len(STATISTICS) + len(percentiles)), np.nan)
+    statistics[:, :4] = np.stack(
+        get_extrema(stacked, interpolation_method, interpolated_borders), axis=1
+    )
+
+    samples = values
+    if excluded_value is not None:
+        samples = np.where(values == excluded_value, np.nan, values)
+    defined = ~np.isnan(samples)
+    counts = np.count_nonzero(defined, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(defined, samples, 0.0).sum(axis=1) / counts
+        deviations = np.where(defined, samples - mean[:, None], 0.0)
+        squares = deviations * deviations
+        m2 = squares.sum(axis=1)
+        m3 = (squares * deviations).sum(axis=1) / counts
+        m4 = (squares * squares).sum(axis=1) / counts
+        statistics[:, 4] = mean
+        statistics[:, 5] = np.where(counts > 1, np.sqrt(m2 / (counts - 1)), np.nan)
+        m2 /= counts
+        statistics[:, 10] = m3 / m2**1.5
+        statistics[:, 11] = m4 / m2**2 - 3.0
+
+    quantiles = [0.25, 0.5, 0.75] + [percentile / 100.0 for percentile in percentiles]
+    quantile_values = get_quantiles(samples, quantiles)
+    statistics[:, 6:9] = quantile_values[:, :3]
+    statistics[:, len(STATISTICS) :] = quantile_values[:, 3:]
+
+    in_track = np.arange(num_frames)[None, :] < lengths[:, None]
+    replaced = np.where(np.isnan(values) & in_track, replacement_for_nan, values)
+    statistics[:, 9] = calculate_entropy_rows(replaced, lengths)
+
+    return statistics
@@ -0,0 +1,163 @@
+"""
+Resumable manifest of a text-to-speech corpus. Every output file is recorded in a SQLite table
+together with the voice, text hash, sample rate and generation config it was made from, so a rerun
+only synthesizes jobs that are missing, failed, or whose text or config changed.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.feature_cache import hash_file
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def hash_text(text):
+    """
+    :param (str) text: text of a synthesis job
+    :return: SHA-256 hex digest of @text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class GenerationManifest:
+    """
+    SQLite manifest with one row per output path. It is safe to update from the worker threads of
+    utils.tts_pipeline, and every update is committed immediately so progress survives a crash.
+    """
+
+    def __init__(self, path="./outputs/tts_manifest.sqlite", config=None):
+        """
+        :param (str) path: path to the SQLite database, created if needed
+               (default: './outputs/tts_manifest.sqlite')
+        :param (dict) config: generation settings that affect the audio (e.g. output format,
+               backend); jobs generated with a different config are regenerated (default: None)
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.config_hash = hash_text(json.dumps(config or dict(), sort_keys=True, default=str))
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                save_path TEXT PRIMARY KEY,
+                voice_name TEXT,
+                text_hash TEXT,
+                sample_rate INTEGER,
+                config_hash TEXT,
+                status TEXT,
+                duration REAL,
+                checksum TEXT,
+                error TEXT,
+                attempts INTEGER,
+                updated_at REAL
+            )
+            """)
+        self.connection.commit()
+
+    def get_record(self, save_path):
+        """
+        :param (str) save_path: output path of a job
+        :return: the manifest row of @save_path as a dictionary, or None
+        """
+        with self.lock:
+            cursor = self.connection.execute("SELECT * FROM jobs WHERE save_path = ?", (save_path,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+
+    def is_complete(self, job, verify_checksum=False):
+        """
+        Function to check whether a job's output is up to date: it was generated successfully from
+        the same voice, text, sample rate and config, and the file is still on disk.
+
+        :param job: a SynthesisJob
+        :param (bool) verify_checksum: also compare the file content hash (default: False)
+        :return: True if the job can be skipped
+        """
+        record = self.get_record(job.save_path)
+        if (
+            record is None
+            or record["status"] != STATUS_DONE
+            or record["voice_name"] != job.voice_name
+            or record["text_hash"] != hash_text(job.text)
+            or record["sample_rate"] != job.sample_rate
+            or record["config_hash"] != self.config_hash
+            or not os.path.isfile(job.save_path)
+        ):
+            return False
+        return not verify_checksum or hash_file(job.save_path) == record["checksum"]
+
+    def pending_jobs(self, jobs, verify_checksum=False):
+        """
+        :param (list) jobs: SynthesisJob tuples
+        :param (bool) verify_checksum: see is_complete (default: False)
+        :return: the jobs of @jobs that still have to be synthesized, in input order
+        """
+        return [job for job in jobs if not self.is_complete(job, verify_checksum)]
+
+    def _upsert(self, job, status, duration=None, checksum=None, error=None):
+        with self.lock:
+            self.connection.execute(
+                """
+                INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(save_path) DO UPDATE SET
+                    voice_name = excluded.voice_name,
+                    text_hash = excluded.text_hash,
+                    sample_rate = excluded.sample_rate,
+                    config_hash = excluded.config_hash,
+                    status = excluded.status,
+                    duration = excluded.duration,
+                    checksum = excluded.checksum,
+                    error = excluded.error,
+                    attempts = jobs.attempts + 1,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    job.save_path,
+                    job.voice_name,
+                    hash_text(job.text),
+                    job.sample_rate,
+                    self.config_hash,
+                    status,
+                    duration,
+                    checksum,
+                    error,
+                    time.time(),
+                ),
+            )
+            self.connection.commit()
+
+    def mark_done(self, job, duration):
+        """
+        Function to record a successfully written output, with the checksum of the file on disk.
+
+        :param job: a SynthesisJob
+        :param (float) duration: duration of the generated audio, in seconds
+        """
+        self._upsert(job, STATUS_DONE, duration=duration, checksum=hash_file(job.save_path))
+
+    def mark_failed(self, job, error):
+        """
+        :param job: a SynthesisJob
+        :param (str) error: error message of the failed attempt
+        """
+        self._upsert(job, STATUS_FAILED, error=error)
+
+    def summary(self):
+        """
+        :return: a dictionary {status: number of jobs}
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            return dict(rows.fetchall())
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,208 @@
+"""
+Concurrent text-to-speech generation. A fixed number of asyncio workers pull jobs from a queue,
+each worker keeps one synthesizer of a pluggable backend for its whole lifetime, and failed
+requests are retried with exponential backoff. Audio is passed around as in-memory WAV buffers.
+
+A backend is any object with two (blocking) methods:
+- create_synthesizer(): returns a synthesizer that is reused for all jobs of one worker
+- synthesize(synthesizer, text, voice_name): returns the audio as WAV (RIFF) bytes, or raises
+  SynthesisError
+"""
+
+import asyncio
+import io
+import random
+import threading
+import time
+import traceback
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.io.wavfile import write as write_wav
+from tqdm.auto import tqdm
+
+from utils.profiling import count, profiled
+
+SynthesisJob = namedtuple("SynthesisJob", ["voice_name", "text", "save_path", "sample_rate"])
+
+
+class SynthesisError(Exception):
+    """
+    Raised by a backend when a request fails. Only retryable errors (throttling, timeouts,
+    dropped connections) are attempted again.
+    """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class FakeSynthesisBackend:
+    """
+    Local stand-in for a cloud TTS service. It returns a harmonic tone whose pitch depends on the
+    voice and whose length depends on the text, after a simulated network latency, and can fail
+    randomly to exercise the retry logic.
+    """
+
+    def __init__(
+        self, sample_rate=16000, latency=0.05, failure_rate=0.0, seconds_per_char=0.06, seed=None
+    ):
+        """
+        :param (int) sample_rate: sample rate of the returned audio (default: 16000)
+        :param (float) latency: simulated duration of one request, in seconds (default: 0.05)
+        :param (float) failure_rate: probability that a request fails with a retryable
+               SynthesisError (default: 0.)
+        :param (float) seconds_per_char: audio duration per character of text (default: 0.06)
+        :param (int) seed: seed for the simulated failures (default: None)
+        """
+        self.sample_rate = sample_rate
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seconds_per_char = seconds_per_char
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.num_synthesizers = 0
+        self.num_requests = 0
+
+    def create_synthesizer(self):
+        with self.lock:
+            self.num_synthesizers += 1
+        return object()
+
+    def synthesize(self, synthesizer, text, voice_name):
+        with self.lock:
+            self.num_requests += 1
+            failed = self.random.random() < self.failure_rate
+        time.sleep(self.latency)
+        if failed:
+            raise SynthesisError("Simulated throttling", retryable=True)
+
+        # Stable pitch per voice between 100 and 250 Hz
+        f0 = 100.0 + zlib.crc32(voice_name.encode()) % 150
+        t = np.arange(int(self.sample_rate * self.seconds_per_char * max(len(text), 1)))
+        phase = 2 * np.pi * f0 * t / self.sample_rate
+        audio = sum(np.sin(k * phase) / k for k in range(1, 6)) * 0.2
+
+        buffer = io.BytesIO()
+        write_wav(buffer, self.sample_rate, (audio * 32767).astype(np.int16))
+        return buffer.getvalue()
+
+
+class RateLimiter:
+    """
+    Spaces the start of consecutive requests by at least 1 / @max_per_second seconds.
+    """
+
+    def __init__(self, max_per_second):
+        self.interval = 1.0 / max_per_second
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def get_backoff(attempt, backoff=1.0, max_backoff=30.0):
+    """
+    :param (int) attempt: number of failed attempts so far, starting at 1
+    :param (float) backoff: delay after the first failure, in seconds (default: 1.)
+    :param (float) max_backoff: maximum delay, in seconds (default: 30.)
+    :return: exponential backoff delay with full jitter, in seconds
+    """
+    return random.uniform(0.0, min(max_backoff, backoff * 2 ** (attempt - 1)))
+
+
+async def synthesize_all(
+    jobs,
+    backend,
+    handle_audio,
+    num_workers=4,
+    max_retries=3,
+    backoff=1.0,
+    max_backoff=30.0,
+    max_requests_per_second=None,
+    desc=None,
+):
+    """
+    Function to synthesize a list of jobs with a bounded number of concurrent requests.
+
+    :param (list) jobs: SynthesisJob tuples
+    :param backend: synthesis backend (see module docstring)
+    :param (callable) handle_audio: blocking function called as handle_audio(job, audio_data) for
+           every synthesized job, e.g. to resample and save the audio; runs in a worker thread
+    :param (int) num_workers: maximum number of requests in flight (default: 4)
+    :param (int) max_retries: number of retries of a request after a retryable error (default: 3)
+    :param (float) backoff: delay after the first failure, in seconds (default: 1.)
+    :param (float) max_backoff: maximum delay between retries, in seconds (default: 30.)
+    :param (float) max_requests_per_second: limit on the request rate (default: None, no limit)
+    :param (str) desc: progress bar description (default: None)
+    :return: (a list of handle_audio results aligned with @jobs, None for failed jobs,
+              a dictionary {job: error message} of failed jobs)
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    for i, job in enumerate(jobs):
+        queue.put_nowait((i, job))
+
+    rate_limiter = RateLimiter(max_requests_per_second) if max_requests_per_second else None
+    # Timed in the executor threads, so concurrent requests show up as separate trace rows
+    create_synthesizer = profiled("tts.create_synthesizer")(backend.create_synthesizer)
+    synthesize = profiled("tts.synthesize")(backend.synthesize)
+    handle_audio = profiled("tts.handle_audio")(handle_audio)
+    results = [None] * len(jobs)
+    errors = dict()
+    progress = tqdm(total=len(jobs), desc=desc)
+
+    async def worker(executor):
+        synthesizer = None
+        while not queue.empty():
+            i, job = queue.get_nowait()
+            for attempt in range(max_retries + 1):
+                try:
+                    if synthesizer is None:
+                        synthesizer = await loop.run_in_executor(executor, create_synthesizer)
+                    if rate_limiter is not None:
+                        await rate_limiter.wait()
+                    audio_data = await loop.run_in_executor(
+                        executor, synthesize, synthesizer, job.text, job.voice_name
+                    )
+                    results[i] = await loop.run_in_executor(executor, handle_audio, job, audio_data)
+                    break
+                except SynthesisError as e:
+                    count("tts.synthesis_error")
+                    if not e.retryable or attempt == max_retries:
+                        errors[job] = repr(e)
+                        break
+                    # The connection of a failed synthesizer may be broken, start a new one
+                    synthesizer = None
+                    await asyncio.sleep(get_backoff(attempt + 1, backoff, max_backoff))
+                except Exception:
+                    errors[job] = traceback.format_exc()
+                    break
+            progress.update()
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        await asyncio.gather(*[worker(executor) for _ in range(min(num_workers, len(jobs)))])
+    progress.close()
+
+    return results, errors
+
+
+def run_synthesis(jobs, backend, handle_audio, **kwargs):
+    """
+    Function to run synthesize_all from synchronous code.
+
+    :param (list) jobs: SynthesisJob tuples
+    :param backend: synthesis backend (see module docstring)
+    :param (callable) handle_audio: see synthesize_all
+    :param kwargs: keyword arguments of synthesize_all
+    :return: (results aligned with @jobs, a dictionary {job: error message} of failed jobs)
+    """
+    return asyncio.run(synthesize_all(jobs, backend, handle_audio, **kwargs))
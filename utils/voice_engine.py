@@ -0,0 +1,982 @@
+"""
+Voice analysis in vectorized NumPy, without Praat objects: an autocorrelation pitch tracker with
+Praat's path finder, glottal pulses placed by cross-correlation as in 'To PointProcess (cc)', local
+jitter and shimmer, and an energy-based voice activity detector. Frames of a whole batch of signals
+are analyzed together in chunks.
+
+Given the same pulses, jitter and shimmer are computed exactly as Praat's 'Get jitter (local)' and
+'Get shimmer (local)', and the silent/sounding intervals follow 'To TextGrid (silences)' (a boundary
+may move by a frame where the intensity is right at the threshold). The pitch tracker approximates
+'To Pitch' (parabolic instead of sinc peak interpolation); its deviation, and that of the pulses,
+jitter and shimmer, from Praat is checked by Benchmarks.voice_engine_validation.
+"""
+
+import math
+
+import numpy as np
+
+from utils.entropy import calculate_entropy
+from utils.profiling import timer
+from utils.track_statistics import Track
+
+# Frames analyzed at once, bounds the memory of the frame matrices
+MAX_FRAMES_PER_CHUNK = 2048
+
+
+def get_frame_layout(num_samples, sample_rate, window_duration, time_step):
+    """
+    Function to place analysis frames as Praat does: as many frames as fit in the signal, centred
+    on it.
+
+    :param (int) num_samples: length of the signal
+    :param (int) sample_rate: sample rate of the signal
+    :param (float) window_duration: duration of the analysis window, in seconds
+    :param (float) time_step: time between frame centres, in seconds
+    :return: number of frames and time of the first frame centre, in seconds
+    """
+    duration = num_samples * (1.0 / sample_rate)
+    num_frames = max(int(np.floor((duration - window_duration) / time_step)) + 1, 0)
+    # Same floating point operations as Praat, frame centres are rounded to samples later
+    first_time = 0.5 * duration - 0.5 * (num_frames * time_step) + 0.5 * time_step
+    return num_frames, first_time
+
+
+def get_frame_layouts(signals, sample_rate, window_duration, time_step):
+    """
+    :return: the number of frames and the time of the first frame centre of every signal (see
+             get_frame_layout), as two arrays (np.array)
+    """
+    layouts = [
+        get_frame_layout(len(signal), sample_rate, window_duration, time_step) for signal in signals
+    ]
+    num_frames = np.array([layout[0] for layout in layouts], dtype=np.int64)
+    first_times = np.array([layout[1] for layout in layouts], dtype=np.float64)
+    return num_frames, first_times
+
+
+def iter_frames(signals, sample_rate, window_duration, time_step, half_window=None):
+    """
+    Function to cut a batch of signals into frames, yielding chunks of about MAX_FRAMES_PER_CHUNK
+    frames that may span several signals. Frames are numbered over the whole batch, signal after
+    signal.
+
+    :param (list) signals: 1-d float arrays (np.array)
+    :param (int) sample_rate: sample rate of all signals
+    :param (float) window_duration: duration of the analysis window, in seconds
+    :param (float) time_step: time between frame centres, in seconds
+    :param (int) half_window: frames span the centre sample +- this many samples (default: None,
+           half of @window_duration)
+    :return: a generator of (frames, starts, ends, signal_indices, frame_indices); frames of shape
+             (num_frames, 2 * half_window + 1) are zero outside their signal, i.e. before the
+             column starts and from the column ends of every row
+    """
+    if half_window is None:
+        half_window = int(0.5 * window_duration * sample_rate)
+    width = 2 * half_window + 1
+    num_frames, first_times = get_frame_layouts(signals, sample_rate, window_duration, time_step)
+    frame_offsets = np.concatenate(([0], np.cumsum(num_frames)))
+
+    chunk = []
+    for signal_index, signal in enumerate(signals):
+        padded = np.zeros(len(signal) + 2 * width)
+        padded[width : width + len(signal)] = signal
+        windows = np.lib.stride_tricks.sliding_window_view(padded, width)
+
+        for start in range(0, num_frames[signal_index], MAX_FRAMES_PER_CHUNK):
+            local_indices = np.arange(
+                start, min(start + MAX_FRAMES_PER_CHUNK, num_frames[signal_index])
+            )
+            times = first_times[signal_index] + local_indices * time_step
+            # Sample i lies at time (i + 0.5) / sample_rate, rounded half up like Praat
+            dx = 1.0 / sample_rate
+            centres = np.floor((times - 0.5 * dx) / dx + 1.5).astype(np.int64) - 1
+            first_samples = centres - half_window
+            chunk.append(
+                (
+                    windows[first_samples + width],
+                    np.clip(-first_samples, 0, width),
+                    np.clip(len(signal) - first_samples, 0, width),
+                    np.full(len(local_indices), signal_index),
+                    frame_offsets[signal_index] + local_indices,
+                )
+            )
+            if sum(len(part[-1]) for part in chunk) >= MAX_FRAMES_PER_CHUNK:
+                yield tuple(np.concatenate(parts) for parts in zip(*chunk))
+                chunk = []
+    if chunk:
+        yield tuple(np.concatenate(parts) for parts in zip(*chunk))
+
+
+def get_fast_length(length, multiple=1):
+    """
+    :return: the smallest multiple of @multiple that is at least @length and whose quotient has
+             no prime factors above 5, for a fast FFT
+    """
+    quotient = int(np.ceil(length / multiple))
+    while True:
+        remainder = quotient
+        for factor in (2, 3, 5):
+            while remainder % factor == 0:
+                remainder //= factor
+        if remainder == 1:
+            return quotient * multiple
+        quotient += 1
+
+
+def split_tracks(values, signals, sample_rate, window_duration, time_step):
+    """
+    :param (np.array) values: values of all frames of a batch, numbered as in iter_frames
+    :return: a list of Track, one per signal
+    """
+    num_frames, first_times = get_frame_layouts(signals, sample_rate, window_duration, time_step)
+    return [
+        Track(track_values, first_time, time_step, 0.0, len(signal) / sample_rate)
+        for track_values, first_time, signal in zip(
+            np.split(values, np.cumsum(num_frames)[:-1]), first_times, signals
+        )
+    ]
+
+
+def get_intensity(signals, sample_rate, minimum_pitch=100.0, time_step=0.0, subtract_mean=True):
+    """
+    Function to compute the intensity contours of a batch of signals like Praat's 'To Intensity':
+    the Kaiser-windowed mean power of every frame, in dB re 2e-5 Pa.
+
+    :param (list) signals: 1-d float arrays (np.array), mono
+    :param (int) sample_rate: sample rate of all signals
+    :param (float) minimum_pitch: lowest pitch the window is long enough for (default: 100.)
+    :param (float) time_step: time between frames, in seconds (default: 0., 0.8 / minimum_pitch)
+    :param (bool) subtract_mean: subtract the mean of every frame first (default: True)
+    :return: a list of Track with the intensity of every signal, in dB
+    """
+    if time_step <= 0.0:
+        time_step = 0.8 / minimum_pitch
+    window_duration = 6.4 / minimum_pitch
+    half_window = int(np.floor(0.5 * window_duration * sample_rate))
+    phase = np.arange(-half_window, half_window + 1) / (0.5 * window_duration * sample_rate)
+    window = np.i0((2 * np.pi**2 + 0.5) * np.sqrt(np.clip(1.0 - phase**2, 0.0, None)))
+    window[phase**2 >= 1.0] = 0.0
+    cumulative_window = np.concatenate(([0.0], np.cumsum(window)))
+
+    signals = [np.asarray(signal, dtype=np.float64) for signal in signals]
+    frame_chunks = zip(
+        iter_frames(signals, sample_rate, window_duration, time_step, half_window),
+        iter_frames(
+            [signal * signal for signal in signals],
+            sample_rate,
+            window_duration,
+            time_step,
+            half_window,
+        ),
+    )
+    values = np.empty(get_frame_layouts(signals, sample_rate, window_duration, time_step)[0].sum())
+    with timer("voice_engine.intensity"):
+        # Frames are zero outside their signal, so only the sums of the weights need the bounds
+        for (frames, starts, ends, _, frame_indices), (squares, *_) in frame_chunks:
+            weight_sums = cumulative_window[ends] - cumulative_window[starts]
+            # sum(w * (x - m)**2) = sum(w * x**2) - 2 * m * sum(w * x) + m**2 * sum(w)
+            power = squares @ window
+            if subtract_mean:
+                means = frames.sum(axis=1) / (ends - starts)
+                power += means * (means * weight_sums - 2.0 * (frames @ window))
+            power /= weight_sums * 4e-10
+            with np.errstate(divide="ignore"):
+                values[frame_indices] = np.where(power < 1e-30, -300.0, 10.0 * np.log10(power))
+
+    return split_tracks(values, signals, sample_rate, window_duration, time_step)
+
+
+def find_pitch_path(
+    frequencies, strengths, time_step, octave_jump_cost=0.35, voiced_unvoiced_cost=0.14
+):
+    """
+    Function to choose one pitch candidate per frame as Praat's path finder does: the Viterbi path
+    with the largest sum of candidate strengths minus the transition costs, which are
+    @octave_jump_cost per octave between voiced frames and @voiced_unvoiced_cost per voicing
+    change, both scaled to a time step of 10 ms.
+
+    :param (np.array) frequencies: candidate frequencies with shape (num_frames, num_candidates),
+           0. for unvoiced candidates
+    :param (np.array) strengths: candidate strengths with the shape of @frequencies, -inf for
+           missing candidates
+    :param (float) time_step: time between frames, in seconds
+    :param (float) octave_jump_cost: cost of an octave jump between frames (default: 0.35)
+    :param (float) voiced_unvoiced_cost: cost of a voicing change between frames (default: 0.14)
+    :return: the index (np.array) of the chosen candidate of every frame
+    """
+    num_frames = len(frequencies)
+    if num_frames == 0:
+        return np.empty(0, dtype=np.int64)
+    # Candidates missing in all frames cannot be on the path
+    kept = np.isfinite(strengths).any(axis=0)
+    kept[0] = True
+    frequencies, strengths = frequencies[:, kept], strengths[:, kept]
+    correction = 0.01 / time_step
+    voiced = frequencies > 0.0
+    log_frequencies = np.log2(np.where(voiced, frequencies, 1.0))
+
+    delta = strengths[0]
+    previous = np.zeros((num_frames, frequencies.shape[1]), dtype=np.int64)
+    for block_start in range(1, num_frames, MAX_FRAMES_PER_CHUNK):
+        block = slice(block_start, min(block_start + MAX_FRAMES_PER_CHUNK, num_frames))
+        before = slice(block.start - 1, block.stop - 1)
+        # Transition costs from every candidate of the previous frame to every candidate
+        voiced_before, voiced_now = voiced[before][:, :, None], voiced[block][:, None, :]
+        costs = np.where(
+            voiced_before & voiced_now,
+            octave_jump_cost
+            * correction
+            * np.abs(log_frequencies[before][:, :, None] - log_frequencies[block][:, None, :]),
+            np.where(voiced_before != voiced_now, voiced_unvoiced_cost * correction, 0.0),
+        )
+        for frame, frame_costs, frame_strengths in zip(
+            range(block.start, block.stop), costs, strengths[block]
+        ):
+            values = delta[:, None] - frame_costs
+            previous[frame] = values.argmax(axis=0)
+            delta = values.max(axis=0) + frame_strengths
+
+    path = np.empty(num_frames, dtype=np.int64)
+    path[-1] = delta.argmax()
+    for frame in range(num_frames - 1, 0, -1):
+        path[frame - 1] = previous[frame, path[frame]]
+    return path
+
+
+def track_pitch(
+    signals,
+    sample_rate,
+    time_step=0.0,
+    pitch_floor=75.0,
+    pitch_ceiling=600.0,
+    silence_threshold=0.03,
+    voicing_threshold=0.45,
+    octave_cost=0.01,
+    octave_jump_cost=0.35,
+    voiced_unvoiced_cost=0.14,
+    max_candidates=15,
+    max_frequency=None,
+):
+    """
+    Function to track the pitch of a batch of signals with the autocorrelation method of Boersma
+    (1993), as in Praat's 'To Pitch': every Hann-windowed frame's autocorrelation is divided by the
+    window's, its strongest peaks and an unvoiced candidate are kept, and the path through the
+    candidates of all frames is chosen by Praat's path finder (see find_pitch_path). Unlike Praat,
+    the autocorrelation only keeps the frequencies below @max_frequency, on a coarser lag grid, and
+    peaks are refined by parabolic instead of sinc interpolation.
+
+    :param (list) signals: 1-d float arrays (np.array), mono
+    :param (int) sample_rate: sample rate of all signals
+    :param (float) time_step: time between frames, in seconds (default: 0., 0.75 / pitch_floor)
+    :param (float) pitch_floor: minimum pitch, in Hertz (default: 75.)
+    :param (float) pitch_ceiling: maximum pitch, in Hertz (default: 600.)
+    :param (float) silence_threshold: frames whose peak is below this fraction of the global peak
+           are unvoiced (default: 0.03)
+    :param (float) voicing_threshold: minimum normalized autocorrelation of a voiced frame
+           (default: 0.45)
+    :param (float) octave_cost: strength added per octave of pitch, against subharmonics
+           (default: 0.01)
+    :param (float) octave_jump_cost: cost of an octave jump between frames (default: 0.35)
+    :param (float) voiced_unvoiced_cost: cost of a voicing change between frames (default: 0.14)
+    :param (int) max_candidates: candidates per frame, including the unvoiced one (default: 15)
+    :param (float) max_frequency: highest frequency kept in the autocorrelation, in Hertz
+           (default: None, 10 * pitch_ceiling)
+    :return: a list of Track with the pitch of every signal in Hertz, NaN for unvoiced frames
+    """
+    if time_step <= 0.0:
+        time_step = 0.75 / pitch_floor
+    if max_frequency is None:
+        max_frequency = 10.0 * pitch_ceiling
+    window_duration = 3.0 / pitch_floor
+    # Praat's frame: an even number of samples, from half_window - 1 before to half_window after
+    # the sample below the frame centre; the local mean spans one longest period on both sides of
+    # it, and the local peak of the windowed frame half a longest period
+    half_window = int(window_duration * sample_rate) // 2 - 1
+    width = 2 * half_window
+    period = int(sample_rate / pitch_floor)
+    half_period = period // 2 + 1
+    min_lag = sample_rate / pitch_ceiling
+    max_lag = min(sample_rate / pitch_floor, width / 2)
+
+    # The autocorrelation is computed every @lag_step samples from the low band of the spectrum
+    lag_step = max(int(sample_rate / (2.0 * max_frequency)), 1)
+    fft_length = get_fast_length(width + max_lag + 2 * lag_step, lag_step)
+    num_bins = fft_length // lag_step // 2 + 1
+    # One lag more on both sides for the neighbours of the peaks
+    lags = np.arange(max(int(min_lag / lag_step) - 1, 1), int(np.ceil(max_lag / lag_step)) + 2)
+
+    window = np.hanning(width + 2)[1:-1]
+    window_spectrum = np.fft.rfft(window, fft_length)[:num_bins]
+    window_autocorrelation = np.fft.irfft(np.abs(window_spectrum) ** 2, fft_length // lag_step)
+    window_autocorrelation = window_autocorrelation[lags] / window_autocorrelation[0]
+
+    signals = [np.asarray(signal, dtype=np.float64) for signal in signals]
+    global_peaks = np.array([np.abs(s - s.mean()).max() if len(s) else 0.0 for s in signals])
+    num_frames = get_frame_layouts(signals, sample_rate, window_duration, time_step)[0]
+    # Column 0 holds the unvoiced candidate (frequency 0.), missing candidates have -inf strength
+    num_voiced = max_candidates - 1
+    frequencies = np.zeros((num_frames.sum(), max_candidates))
+    strengths = np.full((num_frames.sum(), max_candidates), -np.inf)
+    first_times = get_frame_layouts(signals, sample_rate, window_duration, time_step)[1]
+    frame_offsets = np.concatenate(([0], np.cumsum(num_frames)))
+    with timer("voice_engine.pitch"):
+        # Frames of one sample more on both sides, cut to Praat's frames below
+        for frames, _, _, signal_indices, frame_indices in iter_frames(
+            signals, sample_rate, window_duration, time_step, half_window + 1
+        ):
+            times = first_times[signal_indices] + time_step * (
+                frame_indices - frame_offsets[signal_indices]
+            )
+            dx = 1.0 / sample_rate
+            centres = np.floor((times - 0.5 * dx) / dx + 1.5).astype(np.int64) - 1
+            lows = np.floor((times - 0.5 * dx) / dx).astype(np.int64)
+            # The frame starts one or two samples into the wider frame
+            shifted = lows == centres
+            frames = np.where(shifted[:, None], frames[:, 2 : width + 2], frames[:, 1 : width + 1])
+
+            local_means = frames[:, half_window - period : half_window + period].sum(axis=1)
+            frames -= (local_means / (2 * period))[:, None]
+            frames *= window
+            local_peaks = np.abs(
+                frames[:, max(half_window - half_period, 0) : half_window + half_period]
+            ).max(axis=1)
+
+            spectra = np.fft.rfft(frames, fft_length, axis=1)[:, :num_bins]
+            autocorrelation = np.fft.irfft(
+                spectra.real**2 + spectra.imag**2, fft_length // lag_step, axis=1
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r = autocorrelation[:, lags] / autocorrelation[:, :1] / window_autocorrelation
+            r = np.nan_to_num(r, nan=0.0)
+
+            # Local maxima inside the lag range, refined by parabolic interpolation
+            left, centre, right = r[:, :-2], r[:, 1:-1], r[:, 2:]
+            rows, columns = np.nonzero(
+                (centre > left) & (centre >= right) & (centre > 0.5 * voicing_threshold)
+            )
+            left, centre, right = left[rows, columns], centre[rows, columns], right[rows, columns]
+            shift = 0.5 * (left - right) / (left - 2.0 * centre + right)
+            peak_lags = (lags[1:-1][columns] + shift) * lag_step
+            peak_values = centre - 0.25 * (left - right) * shift
+            # High values due to short windows are reflected around 1
+            peak_values = np.where(peak_values > 1.0, 1.0 / peak_values, peak_values)
+            in_range = (peak_lags >= min_lag) & (peak_lags <= max_lag)
+            rows, peak_lags, peak_values = (
+                rows[in_range],
+                peak_lags[in_range],
+                peak_values[in_range],
+            )
+            peak_strengths = peak_values - octave_cost * np.log2(
+                pitch_ceiling * peak_lags / sample_rate
+            )
+
+            # The strongest peaks of every frame are its voiced candidates, strongest first
+            order = np.lexsort((-peak_strengths, rows))
+            rows, peak_lags, peak_strengths = rows[order], peak_lags[order], peak_strengths[order]
+            ranks = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+            kept = ranks < num_voiced
+            rows, columns = frame_indices[rows[kept]], 1 + ranks[kept]
+            strengths[rows, columns] = peak_strengths[kept]
+            frequencies[rows, columns] = sample_rate / peak_lags[kept]
+
+            global_peak = global_peaks[signal_indices]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                relative_peaks = np.where(global_peak > 0.0, local_peaks / global_peak, 0.0)
+            relative_peaks = np.minimum(relative_peaks, 1.0)
+            strengths[frame_indices, 0] = voicing_threshold + np.maximum(
+                0.0, 2.0 - relative_peaks / (silence_threshold / (1.0 + voicing_threshold))
+            )
+
+    values = np.empty(num_frames.sum())
+    with timer("voice_engine.pitch_path"):
+        end = 0
+        for count in num_frames:
+            start, end = end, end + count
+            path = find_pitch_path(
+                frequencies[start:end],
+                strengths[start:end],
+                time_step,
+                octave_jump_cost,
+                voiced_unvoiced_cost,
+            )
+            chosen = frequencies[np.arange(start, end), path]
+            values[start:end] = np.where(chosen > 0.0, chosen, np.nan)
+
+    return split_tracks(values, signals, sample_rate, window_duration, time_step)
+
+
+def get_pitch_at_time(pitch, time):
+    """
+    :param (Track) pitch: pitch track in Hertz, NaN for unvoiced frames
+    :param (float) time: time, in seconds
+    :return: the pitch at @time linearly interpolated from the nearest frame and its neighbour, as
+             Praat's 'Get value at time' (the nearest frame if the neighbour is unvoiced), NaN if
+             the nearest frame is unvoiced or @time is outside the track
+    """
+    if time < pitch.xmin or time > pitch.xmax:
+        return math.nan
+    values = pitch.values
+    index = (time - pitch.x1) / pitch.dx
+    left = math.floor(index)
+    phase = index - left
+    if phase < 0.5:
+        near, far = left, left + 1
+    else:
+        near, far, phase = left + 1, left, 1.0 - phase
+    if near < 0 or near >= len(values) or math.isnan(values[near]):
+        return math.nan
+    if far < 0 or far >= len(values) or math.isnan(values[far]):
+        return values[near]
+    return values[near] + phase * (values[far] - values[near])
+
+
+def get_voiced_intervals(pitch):
+    """
+    :param (Track) pitch: pitch track in Hertz, NaN for unvoiced frames
+    :return: the (start time, end time) of every run of voiced frames, each frame covering
+             half a time step on both sides, clipped to the time domain of @pitch
+    """
+    voiced = np.concatenate(([False], ~np.isnan(pitch.values), [False]))
+    changes = np.flatnonzero(voiced[1:] != voiced[:-1])
+    first_frames, last_frames = changes[::2], changes[1::2] - 1
+    starts = np.maximum(pitch.x1 + (first_frames - 0.5) * pitch.dx, pitch.xmin)
+    ends = np.minimum(pitch.x1 + (last_frames + 0.5) * pitch.dx, pitch.xmax)
+    keep = starts < pitch.xmax - 0.5 * pitch.dx
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+def find_extremum(samples, sample_rate, min_time, max_time):
+    """
+    :return: the time of the sample with the largest absolute value in [min_time, max_time],
+             refined by parabolic interpolation unless it is at the border of the range
+    """
+    start = max(int(np.floor(min_time * sample_rate - 0.5)), 0)
+    end = min(int(np.ceil(max_time * sample_rate - 0.5)), len(samples) - 1)
+    if end < start:
+        return 0.5 * (min_time + max_time)
+    x = samples[start : end + 1]
+    minimum, maximum = int(np.argmin(x)), int(np.argmax(x))
+    if x[minimum] == x[maximum]:
+        return (start + 0.5 * (len(x) - 1) + 0.5) / sample_rate
+    extremum = minimum if abs(x[minimum]) > abs(x[maximum]) else maximum
+    position = float(extremum)
+    if 0 < extremum < len(x) - 1:
+        left, centre, right = x[extremum - 1], x[extremum], x[extremum + 1]
+        position += 0.5 * (right - left) / (2.0 * centre - left - right)
+    return (start + position + 0.5) / sample_rate
+
+
+def find_maximum_correlation(samples, sample_rate, time, period, min_time, max_time, energies):
+    """
+    Function to find the cycle that best matches the cycle around @time, as in Praat's
+    'To PointProcess (cc)': a window of one @period centred on @time is correlated with windows
+    shifted so that their centres lie in [min_time, max_time], and the first local maximum with
+    the largest correlation is refined by parabolic interpolation.
+
+    :param (np.array) samples: 1-d float array, mono
+    :param (int) sample_rate: sample rate of @samples
+    :param (float) time: centre of the reference cycle, in seconds
+    :param (float) period: window length, in seconds
+    :param (float) min_time: earliest centre of the matching cycle, in seconds
+    :param (float) max_time: latest centre of the matching cycle, in seconds
+    :param (np.array) energies: cumulative sums of the squared samples, starting with 0.
+    :return: (the centre of the matching cycle in seconds, its correlation or -1. if there is
+              none, the absolute peak of the matching window)
+    """
+    num_samples = len(samples)
+    half_window = 0.5 * period
+    # Sample i is at (i + 0.5) / sample_rate: nearest samples of the reference window, and the
+    # samples below/above the earliest/latest start of the matching windows
+    first = math.floor((time - half_window) * sample_rate)
+    last = math.floor((time + half_window) * sample_rate)
+    first_shift = math.floor((min_time - half_window) * sample_rate - 0.5)
+    last_shift = math.ceil((max_time - half_window) * sample_rate - 0.5)
+    length = last - first + 1
+
+    if (
+        first >= 0
+        and last < num_samples
+        and first_shift >= 0
+        and last_shift + length <= num_samples
+    ):
+        reference = samples[first : last + 1]
+        products = np.correlate(samples[first_shift : last_shift + length], reference, "valid")
+        reference_norm = energies[last + 1] - energies[first]
+        window_norms = (
+            energies[first_shift + length : last_shift + length + 1]
+            - energies[first_shift : last_shift + 1]
+        )
+        peaks = None
+    else:
+        # Samples outside the signal are left out of both windows
+        offsets = np.arange(length)
+        indices = np.arange(first_shift, last_shift + 1)[:, None] + offsets[None, :]
+        valid = (indices >= 0) & (indices < num_samples)
+        valid &= ((first + offsets >= 0) & (first + offsets < num_samples))[None, :]
+        reference = np.where(valid, samples[np.clip(first + offsets, 0, num_samples - 1)], 0.0)
+        windows = np.where(valid, samples[np.clip(indices, 0, num_samples - 1)], 0.0)
+        products = np.einsum("ij,ij->i", windows, reference)
+        reference_norm = np.einsum("ij,ij->i", reference, reference)
+        window_norms = np.einsum("ij,ij->i", windows, windows)
+        peaks = np.abs(windows).max(axis=1, initial=0.0)
+    norms = np.sqrt(np.maximum(reference_norm * window_norms, 0.0))
+    # As in Praat, the shift before the first counts as a correlation of 0, the last shift is
+    # only a neighbour, and the peak is that of the window after the best one
+    r = np.zeros(len(products) + 2)
+    if norms.min() > 0.0:
+        np.divide(products, norms, out=r[2:])
+    else:
+        np.divide(products, norms, out=r[2:], where=(products != 0.0) & (norms > 0.0))
+    # The first largest correlation is a local maximum, unless only the last shift exceeds it
+    best = int(r[1:-1].argmax())
+    if r[best + 1] < r[best + 2] or r[best + 1] <= -1.0:
+        r1, r2, r3 = r[:-2], r[1:-1], r[2:]
+        candidates = np.flatnonzero((r2 >= r1) & (r2 >= r3) & (r2 > -1.0))
+        if len(candidates) == 0:
+            return time, -1.0, 0.0
+        best = int(candidates[r2[candidates].argmax()])
+    if peaks is None:
+        start = first_shift + best
+        peak = np.abs(samples[start : start + length]).max()
+    else:
+        peak = peaks[best]
+    before, correlation, after = r[best].item(), r[best + 1].item(), r[best + 2].item()
+    shift = float(first_shift + best - 1 - first)
+    curvature = 2.0 * correlation - before - after
+    if curvature != 0.0:
+        slope = 0.5 * (after - before)
+        correlation += 0.5 * slope * slope / curvature
+        shift += slope / curvature
+    return time + shift / sample_rate, correlation, peak
+
+
+def get_pulses(samples, sample_rate, pitch):
+    """
+    Function to place glottal pulses in the voiced parts of a signal as Praat's
+    'To PointProcess (cc)' does: every voiced interval starts at the absolute extremum of the
+    period around its middle, and every next pulse, to the left and then to the right, is the
+    centre of the cycle that correlates best with the previous one, one period (0.8 to 1.25 of
+    the local period) away.
+
+    :param (np.array) samples: 1-d float array, mono
+    :param (int) sample_rate: sample rate of @samples
+    :param (Track) pitch: pitch track of @samples in Hertz, NaN for unvoiced frames (see
+           track_pitch)
+    :return: an array (np.array) with the pulse times, in seconds
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if len(samples) == 0:
+        return np.empty(0)
+    global_peak = np.abs(samples).max()
+    energies = np.concatenate(([0.0], np.cumsum(samples * samples)))
+
+    voiced_intervals = get_voiced_intervals(pitch)
+    # Frame values as Python floats, looked up once per pulse
+    pitch = pitch._replace(values=pitch.values.tolist())
+
+    pulses, added_right = [], -np.inf
+    for start_time, end_time in voiced_intervals:
+        middle = 0.5 * (start_time + end_time)
+        middle_pitch = get_pitch_at_time(pitch, middle)
+        time = find_extremum(
+            samples, sample_rate, middle - 0.5 / middle_pitch, middle + 0.5 / middle_pitch
+        )
+        pulses.append(time)
+        middle_time = time
+
+        # Leftwards, without pulses closer than 0.8 periods to those of the previous interval
+        while True:
+            frequency = get_pitch_at_time(pitch, time)
+            if math.isnan(frequency):
+                break
+            time, correlation, peak = find_maximum_correlation(
+                samples,
+                sample_rate,
+                time,
+                1.0 / frequency,
+                time - 1.25 / frequency,
+                time - 0.8 / frequency,
+                energies,
+            )
+            if correlation == -1.0:
+                time -= 1.0 / frequency
+            if time < start_time:
+                if (
+                    correlation > 0.7
+                    and peak > 0.023333 * global_peak
+                    and time - added_right > 0.8 / frequency
+                ):
+                    pulses.append(time)
+                break
+            if correlation > 0.3 and (peak == 0.0 or peak > 0.01 * global_peak):
+                if time - added_right > 0.8 / frequency:
+                    pulses.append(time)
+
+        time = middle_time
+        while True:
+            frequency = get_pitch_at_time(pitch, time)
+            if math.isnan(frequency):
+                break
+            time, correlation, peak = find_maximum_correlation(
+                samples,
+                sample_rate,
+                time,
+                1.0 / frequency,
+                time + 0.8 / frequency,
+                time + 1.25 / frequency,
+                energies,
+            )
+            if correlation == -1.0:
+                time += 1.0 / frequency
+            if time > end_time:
+                if correlation > 0.7 and peak > 0.023333 * global_peak:
+                    pulses.append(time)
+                    added_right = time
+                break
+            if correlation > 0.3 and (peak == 0.0 or peak > 0.01 * global_peak):
+                pulses.append(time)
+                added_right = time
+
+    return np.unique(pulses)
+
+
+def get_window_pulses(pulse_times, min_time=0.0, max_time=0.0):
+    """
+    :param (np.array) pulse_times: sorted pulse times, in seconds
+    :param (float) min_time: start of the time range (default: 0.)
+    :param (float) max_time: end of the time range; if max_time <= min_time, all pulses are used
+           (default: 0.)
+    :return: the pulse times (np.array) within [min_time, max_time]
+    """
+    pulse_times = np.asarray(pulse_times, dtype=np.float64)
+    if max_time <= min_time:
+        return pulse_times
+    return pulse_times[(pulse_times >= min_time) & (pulse_times <= max_time)]
+
+
+def get_period_pairs(pulse_times, period_floor, period_ceiling, max_period_factor):
+    """
+    :return: the periods (np.array) between consecutive pulses, and for every pair of consecutive
+             periods whether both lie in [period_floor, period_ceiling] and differ at most by a
+             factor @max_period_factor
+    """
+    periods = np.diff(pulse_times)
+    p1, p2 = periods[:-1], periods[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factors = np.maximum(p1, p2) / np.minimum(p1, p2)
+    valid_pairs = (
+        (p1 >= period_floor)
+        & (p1 <= period_ceiling)
+        & (p2 >= period_floor)
+        & (p2 <= period_ceiling)
+        & (factors <= max_period_factor)
+    )
+    if period_floor == period_ceiling:
+        valid_pairs[:] = True
+    return periods, valid_pairs
+
+
+def get_jitter_local(
+    pulse_times,
+    min_time=0.0,
+    max_time=0.0,
+    period_floor=0.0001,
+    period_ceiling=0.02,
+    max_period_factor=1.3,
+):
+    """
+    Function to calculate (local) jitter of a sequence of pulses, as Praat's 'Get jitter (local)':
+    the mean absolute difference of consecutive valid periods, divided by the mean valid period.
+
+    :param (np.array) pulse_times: sorted pulse times, in seconds
+    :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
+    :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
+           NOTE: If max_time <= min_time, the entire time domain is considered
+    :param (float) period_floor: the shortest possible interval, in seconds (default: 0.0001)
+    :param (float) period_ceiling: the longest possible interval, in seconds (default: 0.02)
+    :param (float) max_period_factor: the largest possible difference between consecutive
+           intervals (default: 1.3)
+    :return: value of (local) jitter, NaN if there are fewer than two valid period pairs
+    """
+    pulse_times = get_window_pulses(pulse_times, min_time, max_time)
+    num_periods = len(pulse_times) - 1
+    if num_periods < 2:
+        return float("nan")
+
+    periods, valid_pairs = get_period_pairs(
+        pulse_times, period_floor, period_ceiling, max_period_factor
+    )
+    num_periods -= np.count_nonzero(~valid_pairs)
+    if num_periods < 2:
+        return float("nan")
+    numerator = np.abs(np.diff(periods))[valid_pairs].sum() / (num_periods - 1)
+
+    # Praat's mean period: a period counts unless it is out of range, or differs by more than the
+    # factor from both its neighbours (or has none)
+    in_range = (periods > 0.0) & (periods >= period_floor)
+    if period_ceiling > period_floor:
+        in_range &= periods <= period_ceiling
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = periods[1:] / periods[:-1]
+    ratios = np.maximum(ratios, 1.0 / ratios)
+    previous_factors = np.concatenate(([np.nan], ratios))
+    next_factors = np.concatenate((ratios, [np.nan]))
+    if max_period_factor >= 1.0:
+        in_range &= ~(np.isnan(previous_factors) & np.isnan(next_factors))
+        in_range &= ~((previous_factors > max_period_factor) & (next_factors > max_period_factor))
+    if not in_range.any():
+        return float("nan")
+    return float(numerator / periods[in_range].mean())
+
+
+def get_hann_windowed_rms(samples, sample_rate, centres, left_widths, right_widths):
+    """
+    Function to get the root mean square of a signal around many time points at once, weighted by
+    an asymmetric Hann window, as Praat's Sound_getHannWindowedRms.
+
+    :param (np.array) samples: 1-d float array, mono
+    :param (int) sample_rate: sample rate of @samples
+    :param (np.array) centres: window centres, in seconds
+    :param (np.array) left_widths: window half-widths before the centres, in seconds
+    :param (np.array) right_widths: window half-widths after the centres, in seconds
+    :return: an array (np.array) with the RMS at every centre, NaN for windows of fewer than
+             3 samples
+    """
+    # Sample i lies at time (i + 0.5) / sample_rate
+    first = np.maximum(np.ceil((centres - left_widths) * sample_rate - 0.5), 0).astype(np.int64)
+    last = np.minimum(
+        np.floor((centres + right_widths) * sample_rate - 0.5), len(samples) - 1
+    ).astype(np.int64)
+    num_samples = last - first + 1
+    rms = np.full(len(centres), np.nan)
+    if len(centres) == 0 or num_samples.max() < 3:
+        return rms
+
+    indices = first[:, None] + np.arange(num_samples.max())[None, :]
+    in_window = indices <= last[:, None]
+    indices = np.minimum(indices, len(samples) - 1)
+    offsets = (indices + 0.5) / sample_rate - centres[:, None]
+    widths = np.where(offsets < 0.0, left_widths[:, None], right_widths[:, None])
+    window = np.where(in_window, 0.5 + 0.5 * np.cos(np.pi * offsets / widths), 0.0)
+    windowed = samples[indices] * window
+
+    valid = num_samples >= 3
+    rms[valid] = np.sqrt(
+        (windowed * windowed).sum(axis=1)[valid] / (window * window).sum(axis=1)[valid]
+    )
+    return rms
+
+
+def get_shimmer_local(
+    samples,
+    sample_rate,
+    pulse_times,
+    min_time=0.0,
+    max_time=0.0,
+    period_floor=0.0001,
+    period_ceiling=0.02,
+    max_period_factor=1.3,
+    max_amplitude_factor=1.6,
+):
+    """
+    Function to calculate (local) shimmer of a signal and its pulses, as Praat's
+    'Get shimmer (local)': the amplitude of every pulse between two valid periods is the Hann
+    windowed RMS over 0.2 periods on both sides, and shimmer is the mean absolute difference of
+    consecutive amplitudes, divided by the mean amplitude.
+
+    :param (np.array) samples: 1-d float array, mono
+    :param (int) sample_rate: sample rate of @samples
+    :param (np.array) pulse_times: sorted pulse times, in seconds
+    :param (float) min_time: minimum time value considered for time range (t1, t2) (default: 0.)
+    :param (float) max_time: maximum time value considered for time range (t1, t2) (default: 0.)
+           NOTE: If max_time <= min_time, the entire time domain is considered
+    :param (float) period_floor: the shortest possible interval, in seconds (default: 0.0001)
+    :param (float) period_ceiling: the longest possible interval, in seconds (default: 0.02)
+    :param (float) max_period_factor: the largest possible difference between consecutive
+           intervals (default: 1.3)
+    :param (float) max_amplitude_factor: maximum amplitude factor for shimmer (default: 1.6)
+    :return: value of (local) shimmer, NaN if no pair of amplitudes is valid
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    pulse_times = get_window_pulses(pulse_times, min_time, max_time)
+    if len(pulse_times) < 3:
+        return float("nan")
+
+    periods, valid_pairs = get_period_pairs(
+        pulse_times, period_floor, period_ceiling, max_period_factor
+    )
+    pulses = np.flatnonzero(valid_pairs) + 1
+    amplitudes = get_hann_windowed_rms(
+        samples, sample_rate, pulse_times[pulses], 0.2 * periods[pulses - 1], 0.2 * periods[pulses]
+    )
+    defined = amplitudes > 0.0
+    times, amplitudes = pulse_times[pulses][defined], amplitudes[defined]
+
+    intervals = np.diff(times)
+    a1, a2 = amplitudes[:-1], amplitudes[1:]
+    valid = np.maximum(a1, a2) / np.minimum(a1, a2) <= max_amplitude_factor
+    if period_floor != period_ceiling:
+        valid &= (intervals >= period_floor) & (intervals <= period_ceiling)
+    if not valid.any():
+        return float("nan")
+    # Praat divides by the mean of all amplitudes but the last, valid pairs or not
+    return float(np.abs(a1 - a2)[valid].mean() / a1.mean())
+
+
+def detect_silences(
+    intensity,
+    silence_threshold=-25.0,
+    min_silent_interval=0.05,
+    min_sounding_interval=0.1,
+    silent_label="silent",
+    sounding_label="sounding",
+):
+    """
+    Function to split an intensity track into silent and sounding intervals, as Praat's
+    'To TextGrid (silences)': frames more than @silence_threshold dB below the maximum are silent,
+    then sounding intervals shorter than @min_sounding_interval and after them silent intervals
+    shorter than @min_silent_interval are merged into their neighbours.
+
+    :param (Track) intensity: intensity track in dB (see get_intensity)
+    :param (float) silence_threshold: threshold relative to the maximum intensity, in dB
+           (default: -25.)
+    :param (float) min_silent_interval: minimum duration of a silent interval (default: 0.05)
+    :param (float) min_sounding_interval: minimum duration of a sounding interval (default: 0.1)
+    :param (str) silent_label: label of the silent intervals (default: 'silent')
+    :param (str) sounding_label: label of the sounding intervals (default: 'sounding')
+    :return: a list of (start time, end time, label) tuples covering the whole track domain
+    """
+    values = np.asarray(intensity.values, dtype=np.float64)
+    if len(values) == 0:
+        return [(intensity.xmin, intensity.xmax, sounding_label)]
+
+    # Maximum with parabolic interpolation, like Praat's 'Get maximum'
+    peak = int(np.argmax(values))
+    maximum = values[peak]
+    if 0 < peak < len(values) - 1:
+        left, right = values[peak - 1], values[peak + 1]
+        curvature = left - 2.0 * maximum + right
+        if curvature < 0.0:
+            maximum -= 0.125 * (left - right) ** 2 / curvature
+    silent = values < maximum - abs(silence_threshold)
+
+    def get_runs(is_silent):
+        changes = np.flatnonzero(is_silent[1:] != is_silent[:-1]) + 1
+        starts = np.concatenate(([0], changes))
+        # Praat puts a boundary at the centre of the first frame of the new run, the outer ones
+        # at the ends of the domain
+        boundaries = intensity.x1 + changes * intensity.dx
+        times = np.concatenate(([intensity.xmin], boundaries, [intensity.xmax]))
+        return starts, np.concatenate((changes, [len(is_silent)])), times
+
+    for label_silent, min_duration in ((False, min_sounding_interval), (True, min_silent_interval)):
+        starts, ends, times = get_runs(silent)
+        if len(starts) < 2:
+            break
+        short = (np.diff(times) < min_duration) & (silent[starts] == label_silent)
+        run_labels = np.where(short, not label_silent, silent[starts])
+        silent = np.repeat(run_labels, ends - starts)
+
+    starts, _, times = get_runs(silent)
+    labels = np.where(silent[starts], silent_label, sounding_label)
+    return [(float(t1), float(t2), str(label)) for t1, t2, label in zip(times, times[1:], labels)]
+
+
+def get_segment_length_attributes(intervals, sounding_label="sounding"):
+    """
+    Function to summarize the lengths of the voiced (sounding) and unvoiced intervals of a sound.
+
+    :param (list) intervals: (start time, end time, label) tuples (see detect_silences)
+    :param (str) sounding_label: label of the voiced intervals (default: 'sounding')
+    :return: a dictionary of attributes, and the lists of voiced and unvoiced lengths
+    """
+    lengths = np.array([t2 - t1 for t1, t2, _ in intervals], dtype=np.float64)
+    is_voiced = np.array([label == sounding_label for _, _, label in intervals], dtype=bool)
+    voice_lengths = lengths[is_voiced].tolist()
+    unvoice_lengths = lengths[~is_voiced].tolist()
+
+    attributes = dict()
+    attributes["voice_lengths"] = voice_lengths
+    attributes["unvoice_lengths"] = unvoice_lengths
+    attributes["voice_length_mean"] = np.mean(voice_lengths)
+    attributes["voice_length_std"] = np.std(voice_lengths)
+    attributes["unvoice_length_mean"] = np.mean(unvoice_lengths)
+    attributes["unvoice_length_std"] = np.std(unvoice_lengths)
+    attributes["voice_length_min"] = np.min(voice_lengths)
+    attributes["voice_length_max"] = np.max(voice_lengths)
+    attributes["unvoice_length_min"] = np.min(unvoice_lengths)
+    attributes["unvoice_length_max"] = np.max(unvoice_lengths)
+    attributes["voice_length_entropy"] = calculate_entropy(voice_lengths)
+    attributes["unvoice_length_entropy"] = calculate_entropy(unvoice_lengths)
+    attributes["speech_ratio"] = sum(voice_lengths) / (sum(voice_lengths) + sum(unvoice_lengths))
+
+    return attributes, [voice_lengths, unvoice_lengths]
+
+
+def get_voice_attributes_batch(
+    signals,
+    sample_rate,
+    pitch_floor=75.0,
+    pitch_ceiling=600.0,
+    period_floor=0.0001,
+    period_ceiling=0.02,
+    max_period_factor=1.3,
+    max_amplitude_factor=1.6,
+    minimum_pitch=100.0,
+    silence_threshold=-25.0,
+    min_silent_interval=0.05,
+    min_sounding_interval=0.1,
+):
+    """
+    Function to compute local jitter, local shimmer and the voiced/unvoiced segment attributes of
+    a batch of signals; the pitch and intensity frames of all signals are analyzed together.
+
+    NOTE: Like get_voiced_unvoiced_segments, this raises a ValueError for a signal without any
+    voiced or without any unvoiced interval.
+
+    :param (list) signals: 1-d float arrays (np.array), mono
+    :param (int) sample_rate: sample rate of all signals
+    :param (float) pitch_floor: minimum pitch (default: 75.)
+    :param (float) pitch_ceiling: maximum pitch (default: 600.)
+    :param (float) period_floor: the shortest possible interval, in seconds (default: 0.0001)
+    :param (float) period_ceiling: the longest possible interval, in seconds (default: 0.02)
+    :param (float) max_period_factor: the largest possible difference between consecutive
+           intervals (default: 1.3)
+    :param (float) max_amplitude_factor: maximum amplitude factor for shimmer (default: 1.6)
+    :param (float) minimum_pitch: minimum pitch of the silence intensity (default: 100.)
+    :param (float) silence_threshold: see detect_silences (default: -25.)
+    :param (float) min_silent_interval: see detect_silences (default: 0.05)
+    :param (float) min_sounding_interval: see detect_silences (default: 0.1)
+    :return: a list with a dictionary of attributes for every signal
+    """
+    signals = [np.asarray(signal, dtype=np.float64) for signal in signals]
+    pitches = track_pitch(
+        signals, sample_rate, pitch_floor=pitch_floor, pitch_ceiling=pitch_ceiling
+    )
+    intensities = get_intensity(signals, sample_rate, minimum_pitch=minimum_pitch)
+
+    results = []
+    with timer("voice_engine.attributes"):
+        for signal, pitch, intensity in zip(signals, pitches, intensities):
+            pulse_times = get_pulses(signal, sample_rate, pitch)
+            intervals = detect_silences(
+                intensity, silence_threshold, min_silent_interval, min_sounding_interval
+            )
+            attributes, _ = get_segment_length_attributes(intervals)
+            attributes["local_jitter"] = get_jitter_local(
+                pulse_times,
+                period_floor=period_floor,
+                period_ceiling=period_ceiling,
+                max_period_factor=max_period_factor,
+            )
+            attributes["local_shimmer"] = get_shimmer_local(
+                signal,
+                sample_rate,
+                pulse_times,
+                period_floor=period_floor,
+                period_ceiling=period_ceiling,
+                max_period_factor=max_period_factor,
+                max_amplitude_factor=max_amplitude_factor,
+            )
+            results.append(attributes)
+    return results
@@ -0,0 +1,143 @@
+"""
+Voice-profile metadata for the generated audio files: a hashed index over voices.csv and a single
+parser for the pitch/speed augmentation tags in file names.
+"""
+
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+METADATA_COLUMNS = [
+    "locale",
+    "local_name",
+    "short_name",
+    "Pitch shifted",
+    "Speed changed",
+    "Gender",
+]
+
+# e.g. en-US-AriaNeural_pitch_shifted_90 or en-US-AriaNeural_speed_changed_110
+AUGMENTATION_PATTERN = re.compile(
+    r"^(?P<short_name>.+?)_(?P<tag>pitch_shifted|speed_changed)_(?P<value>\d+)$"
+)
+
+
+def load_voice_profiles(csv_path="./outputs/voices.csv", locale_filter="en-"):
+    """
+    Function to load the voice profiles and index them by short name, so every lookup is a hash
+    lookup instead of a scan over the table.
+
+    :param (str) csv_path: path to the voices.csv written by tts.py
+           (default: './outputs/voices.csv')
+    :param (str) locale_filter: only keep voices whose locale contains this string
+           (default: 'en-')
+    :return: a pd.DataFrame with columns ['locale', 'local_name', 'gender'] indexed by short_name
+    """
+    voice_profiles = pd.read_csv(csv_path)
+    if locale_filter:
+        voice_profiles = voice_profiles[voice_profiles["locale"].str.contains(locale_filter)]
+
+    voice_profiles = voice_profiles[["locale", "local_name", "short_name", "gender"]]
+    voice_profiles = voice_profiles.drop_duplicates("short_name").set_index("short_name")
+    return voice_profiles
+
+
+def parse_audio_filename(file_path, short_name_from="stem", default_factor=100):
+    """
+    Function to get the voice short name and the augmentation factors from an audio file path.
+
+    :param (str) file_path: path to the audio file
+    :param (str) short_name_from: where the short name of a non-augmented file comes from, 'stem'
+           for <short_name>.wav or 'parent' for <short_name>/<content>.wav (default: 'stem')
+    :param (int) default_factor: factor reported when a file is not pitch shifted/speed changed
+           (default: 100)
+    :return: (short name, pitch shifted factor, speed changed factor)
+    """
+    file_path = Path(file_path)
+    pitch_shifted = speed_changed = default_factor
+
+    match = AUGMENTATION_PATTERN.match(file_path.stem)
+    if match is None and short_name_from == "parent":
+        # Variants generated in memory tag the voice directory (see utils.augmented_loader)
+        match = AUGMENTATION_PATTERN.match(file_path.parent.stem)
+    if match is None:
+        short_name = file_path.stem if short_name_from == "stem" else file_path.parent.stem
+        return short_name, pitch_shifted, speed_changed
+
+    if match["tag"] == "pitch_shifted":
+        pitch_shifted = int(match["value"])
+    else:
+        speed_changed = int(match["value"])
+    return match["short_name"], pitch_shifted, speed_changed
+
+
+def resolve_metadata(file_paths, voice_profiles, short_name_from="stem", default_factor=100):
+    """
+    Function to get the metadata rows of a whole list of audio files with a single indexed join.
+
+    :param (list) file_paths: paths to the audio files
+    :param (pd.DataFrame) voice_profiles: voice profiles indexed by short name
+           (see load_voice_profiles)
+    :param (str) short_name_from: see parse_audio_filename (default: 'stem')
+    :param (int) default_factor: see parse_audio_filename (default: 100)
+    :return: (a pd.DataFrame with METADATA_COLUMNS and one row per known file, in input order,
+              a boolean np.array marking which of @file_paths were found in @voice_profiles)
+    """
+    parsed = pd.DataFrame(
+        [parse_audio_filename(f, short_name_from, default_factor) for f in file_paths],
+        columns=["short_name", "Pitch shifted", "Speed changed"],
+    )
+
+    profiles = voice_profiles.reindex(parsed["short_name"])
+    found = profiles["locale"].notna().to_numpy()
+
+    unknown_voices = sorted(set(parsed.loc[~found, "short_name"]))
+    if unknown_voices:
+        print(
+            f"WARNING: {int((~found).sum())} file(s) skipped, voices not in voice profiles: "
+            + ", ".join(unknown_voices)
+        )
+
+    metadata = pd.DataFrame(
+        {
+            "locale": profiles["locale"].to_numpy(),
+            "local_name": profiles["local_name"].to_numpy(),
+            "short_name": parsed["short_name"].to_numpy(),
+            "Pitch shifted": parsed["Pitch shifted"].to_numpy(),
+            "Speed changed": parsed["Speed changed"].to_numpy(),
+            "Gender": profiles["gender"].to_numpy(),
+        }
+    )
+    metadata = metadata[found].reset_index(drop=True)
+    metadata["Gender"] = metadata["Gender"].astype(int)
+
+    return metadata, found
+
+
+def build_feature_table(
+    file_paths, features, feature_names, voice_profiles, short_name_from="stem", default_factor=100
+):
+    """
+    Function to combine per-file feature vectors with their metadata into one table. Files whose
+    extraction failed (None) or whose voice is unknown are left out.
+
+    :param (list) file_paths: paths to the audio files
+    :param (list) features: one feature vector (np.array) per file, None for failed files
+    :param (list) feature_names: names of the feature columns
+    :param (pd.DataFrame) voice_profiles: voice profiles indexed by short name
+           (see load_voice_profiles)
+    :param (str) short_name_from: see parse_audio_filename (default: 'stem')
+    :param (int) default_factor: see parse_audio_filename (default: 100)
+    :return: a pd.DataFrame with METADATA_COLUMNS followed by @feature_names
+    """
+    extracted = [i for i, feature in enumerate(features) if feature is not None]
+    metadata, found = resolve_metadata(
+        [file_paths[i] for i in extracted], voice_profiles, short_name_from, default_factor
+    )
+
+    rows = [features[i] for i, is_found in zip(extracted, found) if is_found]
+    feature_matrix = np.stack(rows) if rows else np.empty((0, len(feature_names)))
+
+    return pd.concat([metadata, pd.DataFrame(feature_matrix, columns=list(feature_names))], axis=1)